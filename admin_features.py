@@ -1,10 +1,26 @@
 # admin_features.py
+import atexit
 import datetime
+import functools
+import os
 import random
 import hashlib
 import streamlit as st # Streamlit might not be needed directly here, but often used for session_state in broader apps
 import pandas as pd
 
+from anomaly_scoring import AnomalyScorer
+from honeypot_listener import HoneypotListener, parse_ports
+from honeypot_store import HoneypotStore
+from audit_log import DEFAULT_AUDIT_LOG, AuditMonitor, append_audit_event
+from payment_feed import DEFAULT_RATE, PaymentFeed
+from payment_ingest import hash_credential
+from retail_service import get_service
+from service_api import ServiceAPI
+from transaction_store import TransactionStore
+
+# Seeds the simulators' RNGs so runs are reproducible; unset draws from OS entropy.
+DEFAULT_SEED = os.environ.get("SECURE_RETAIL_SEED")
+
 def get_admin_action_logs():
     """Simulates fetching admin action logs."""
     logs = [
@@ -19,39 +35,88 @@ def get_admin_action_logs():
     ]
     return logs
 
-def simulate_zero_trust_check(user_id, device_id, location):
-    """Simulates Zero Trust Access Control checks and displays real-time stats."""
-    st.markdown(f"#### Zero Trust Check for **{user_id}** at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    
-    all_passed = True
+# Process-wide admin audit monitor; each refresh parses only newly appended lines
+_AUDIT_MONITOR = None
 
-    # Simulate TPM check
-    tpm_status = "🟢 Passed (Simulated TPM Check)"
-    st.write(tpm_status)
-    
-    # Simulate Geo-location check
-    current_location = "Bengaluru, Karnataka, India"
-    if "Bengaluru" in location or "Bengaluru" in current_location:
-        geo_status = f"🟢 Passed (Geo-location: Access from {location} / Current: {current_location})"
-    else:
-        geo_status = f"🔴 Failed (Geo-location: Access from {location} / Current: {current_location} - Outside Allowed Area)"
-        all_passed = False
-    st.write(geo_status)
+def get_admin_audit_monitor():
+    """Returns the shared audit log monitor, seeding a demo log if none exists yet.
 
-    # Simulate Device Check (randomly pass/fail for demo)
-    if random.random() > 0.2: # 80% chance to pass
-        device_status = "🟢 Passed (Device ID: Trusted)"
-    else:
-        device_status = "🔴 Failed (Device ID: Untrusted)"
-        all_passed = False
-    st.write(device_status)
+    Set SECURE_RETAIL_AUDIT_OFFSET to a file path to also persist the read offset
+    across restarts (rolling features then warm up from new events only).
+    """
+    global _AUDIT_MONITOR
+    if _AUDIT_MONITOR is None:
+        if not os.path.exists(DEFAULT_AUDIT_LOG):
+            for entry in sorted(get_admin_action_logs(), key=lambda entry: entry["timestamp"]):
+                append_audit_event(DEFAULT_AUDIT_LOG, entry)
+        _AUDIT_MONITOR = AuditMonitor(DEFAULT_AUDIT_LOG, offset_path=os.environ.get("SECURE_RETAIL_AUDIT_OFFSET"),
+                                      scorer=AnomalyScorer()) # Local model; pick another with SECURE_RETAIL_ANOMALY_BACKEND
+    return _AUDIT_MONITOR
+
+# Process-wide honeypot capture store (append-only JSON lines, indexed by IP and username)
+_HONEYPOT_STORE = None
+LEGACY_HONEYPOT_LOG = "honeyport_logs.txt"
+
+def get_honeypot_store():
+    """Returns the shared honeypot store, importing the legacy repr-format log into a new store."""
+    global _HONEYPOT_STORE
+    if _HONEYPOT_STORE is None:
+        _HONEYPOT_STORE = HoneypotStore()
+        atexit.register(_HONEYPOT_STORE.close)
+        if len(_HONEYPOT_STORE) == 0 and os.path.exists(LEGACY_HONEYPOT_LOG):
+            _HONEYPOT_STORE.import_legacy_log(LEGACY_HONEYPOT_LOG)
+    return _HONEYPOT_STORE
+
+_HONEYPOT_LISTENER = None
+
+def get_honeypot_listener():
+    """Returns the in-process TCP honeypot, started on first use, or None if not configured.
+
+    Set SECURE_RETAIL_HONEYPOT_PORTS (e.g. "ssh=2222,http=8080,telnet=2323") to serve
+    the fake services from the dashboard process, recording into get_honeypot_store().
+    """
+    global _HONEYPOT_LISTENER
+    ports = os.environ.get("SECURE_RETAIL_HONEYPOT_PORTS")
+    if _HONEYPOT_LISTENER is None and ports:
+        listener = HoneypotListener(get_honeypot_store(), parse_ports(ports),
+                                    host=os.environ.get("SECURE_RETAIL_HONEYPOT_HOST", "127.0.0.1"))
+        _HONEYPOT_LISTENER = listener.start_in_thread()
+        atexit.register(listener.stop)
+    return _HONEYPOT_LISTENER
+
+_SERVICE_API = None
+
+def get_service_api():
+    """Returns the in-process service HTTP API, started on first use, or None if not configured.
+
+    Set SECURE_RETAIL_API_PORT to serve service_api.py's endpoints from the dashboard
+    process, backed by the same RetailService the dashboard uses.
+    """
+    global _SERVICE_API
+    port = os.environ.get("SECURE_RETAIL_API_PORT")
+    if _SERVICE_API is None and port:
+        api = ServiceAPI(get_service(url=None), host=os.environ.get("SECURE_RETAIL_API_HOST", "127.0.0.1"), port=int(port))
+        _SERVICE_API = api.start_in_thread()
+        atexit.register(api.stop)
+    return _SERVICE_API
 
-    if all_passed:
+def simulate_zero_trust_check(user_id, device_id, location, service=None):
+    """Runs the Zero Trust Access Control checks through the service layer and displays the results.
+
+    Returns one status line per policy check (TPM, geo-location, device, access hours).
+    """
+    st.markdown(f"#### Zero Trust Check for **{user_id}** at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    result = (service or get_service()).zero_trust_check(user_id, device_id, location)
+    statuses = tuple(f"{'🟢 Passed' if check['passed'] else '🔴 Failed'} ({check['detail']})" for check in result["checks"])
+    for status in statuses:
+        st.write(status)
+
+    if result["granted"]:
         st.success(f"✅ Zero Trust Access Granted for {user_id}!")
     else:
         st.error(f"❌ Zero Trust Access Denied for {user_id}!")
 
-    return tpm_status, geo_status, device_status
+    return statuses
 
 
 def get_incoming_payments_summary():
@@ -69,19 +134,49 @@ def get_incoming_payments_summary():
     }
     return payments
 
-# Global list to store transactions for simulation
-_TRANSACTION_LOGS = []
+# Process-wide transaction store: bounded hot tier in memory, older entries spill to SQLite
+_TRANSACTION_STORE = None
+
+def get_transaction_store():
+    """Returns the shared transaction store, opening (and seeding) it on first use."""
+    global _TRANSACTION_STORE
+    if _TRANSACTION_STORE is None:
+        _TRANSACTION_STORE = TransactionStore()
+        atexit.register(_TRANSACTION_STORE.close)
+        if len(_TRANSACTION_STORE) == 0:
+            _seed_transaction_logs(_TRANSACTION_STORE, random.Random(DEFAULT_SEED))
+    return _TRANSACTION_STORE
+
+def _seed_transaction_logs(store, rng=random):
+    customer_names = ["Alice Smith", "Bob Johnson", "Charlie Brown", "Diana Prince", "Ethan Hunt"]
+    payment_methods = ["Visa ending 1234", "Mastercard ending 5678", "Amex ending 9012", "RuPay ending 3456", "UPI ID: example@upi"]
+    
+    for i in range(5): # Start with 5 initial transactions
+        customer = rng.choice(customer_names)
+        payment_detail = rng.choice(payment_methods)
+        hashed_credential = hash_credential(payment_detail)
+        store.append({
+            "timestamp": (datetime.datetime.now() - datetime.timedelta(minutes=rng.randint(1, 60))).strftime("%Y-%m-%d %H:%M:%S"),
+            "customer_name": customer,
+            "amount": f"${rng.randint(10, 500)}.00",
+            "payment_credential_hash": hashed_credential,
+            "status": "Completed"
+        })
+
+def generate_single_transaction_data(rng=random, hasher=None):
+    """Generates a single simulated transaction with both plain and hashed details.
 
-def generate_single_transaction_data():
-    """Generates a single simulated transaction with both plain and hashed details."""
+    ``hasher`` is a payment_ingest.CredentialHasher (default: the process-wide one).
+    """
     customer_names = ["Alice Smith", "Bob Johnson", "Charlie Brown", "Diana Prince", "Ethan Hunt"]
     payment_methods = ["Visa ending 1234", "Mastercard ending 5678", "Amex ending 9012", "RuPay ending 3456", "UPI ID: example@upi"]
     
-    customer = random.choice(customer_names)
-    plain_payment_detail = random.choice(payment_methods)
-    amount = f"${random.randint(10, 500)}.00"
+    customer = rng.choice(customer_names)
+    plain_payment_detail = rng.choice(payment_methods)
+    amount = f"${rng.randint(10, 500)}.00"
     
-    hashed_credential = hashlib.sha256(plain_payment_detail.encode()).hexdigest()
+    hashed_credential = (hasher.hash(plain_payment_detail) if hasher is not None
+                         else hash_credential(plain_payment_detail)) # Keyed HMAC; use payment_ingest for batches
     
     return {
         "plain": {
@@ -100,36 +195,38 @@ def generate_single_transaction_data():
         }
     }
 
-def get_hashed_transaction_logs(new_transaction_hashed=None):
+# Process-wide payment simulator; sessions follow it with their own cursor
+_PAYMENT_FEED = None
+
+def get_payment_feed():
+    """Returns the shared background payment feed, starting it on first use.
+
+    The rate (payments per second) defaults to one every 20 seconds and can be raised
+    for load tests with SECURE_RETAIL_PAYMENT_RATE or PaymentFeed.set_rate().
+    """
+    global _PAYMENT_FEED
+    if _PAYMENT_FEED is None:
+        rate = float(os.environ.get("SECURE_RETAIL_PAYMENT_RATE", DEFAULT_RATE))
+        generator = functools.partial(generate_single_transaction_data, rng=random.Random(DEFAULT_SEED))
+        _PAYMENT_FEED = PaymentFeed(generator, sink=get_transaction_store().extend, rate=rate)
+        _PAYMENT_FEED.start()
+        atexit.register(_PAYMENT_FEED.stop)
+    return _PAYMENT_FEED
+
+def get_hashed_transaction_logs(new_transaction_hashed=None, page=0, page_size=50):
     """
     Simulates a log of transactions with hashed payment credentials.
     Can append a new transaction for real-time simulation.
+    Returns one newest-first page; use get_transaction_store() for range queries.
     """
-    global _TRANSACTION_LOGS # Access the global list
-
-    if not _TRANSACTION_LOGS: # Initialize if empty
-        customer_names = ["Alice Smith", "Bob Johnson", "Charlie Brown", "Diana Prince", "Ethan Hunt"]
-        payment_methods = ["Visa ending 1234", "Mastercard ending 5678", "Amex ending 9012", "RuPay ending 3456", "UPI ID: example@upi"]
-        
-        for i in range(5): # Start with 5 initial transactions
-            customer = random.choice(customer_names)
-            payment_detail = random.choice(payment_methods)
-            hashed_credential = hashlib.sha256(payment_detail.encode()).hexdigest()
-            _TRANSACTION_LOGS.append({
-                "timestamp": (datetime.datetime.now() - datetime.timedelta(minutes=random.randint(1, 60))).strftime("%Y-%m-%d %H:%M:%S"),
-                "customer_name": customer,
-                "amount": f"${random.randint(10, 500)}.00",
-                "payment_credential_hash": hashed_credential,
-                "status": "Completed"
-            })
-        _TRANSACTION_LOGS.sort(key=lambda x: x['timestamp'], reverse=True) # Sort initial logs
+    store = get_transaction_store()
 
     if new_transaction_hashed:
-        _TRANSACTION_LOGS.insert(0, new_transaction_hashed) # Add new transaction to the top
+        store.append(new_transaction_hashed) # Indexed by timestamp, newest pages first
 
-    return _TRANSACTION_LOGS
+    return store.query(page=page, page_size=page_size)
 
-def generate_device_fingerprint(user_agent, ip_address):
+def generate_device_fingerprint(user_agent, ip_address, rng=random):
     """Simulates generating a unique device fingerprint."""
-    raw_fingerprint = f"{user_agent}-{ip_address}-{random.randint(10000, 99999)}"
+    raw_fingerprint = f"{user_agent}-{ip_address}-{rng.randint(10000, 99999)}"
     return hashlib.sha256(raw_fingerprint.encode()).hexdigest()
\ No newline at end of file
@@ -1,18 +1,33 @@
 import streamlit as st
 from firmware_detection import firmware_scan_ui
-from detection import check_and_recover
+from detection import iter_fleet_scan
 from admin_features import (
-    get_admin_action_logs,
+    get_admin_audit_monitor,
     simulate_zero_trust_check,
     get_incoming_payments_summary,
-    get_hashed_transaction_logs,
-    generate_single_transaction_data,
-    generate_device_fingerprint
+    get_transaction_store,
+    get_payment_feed,
+    get_honeypot_store,
+    get_honeypot_listener,
+    get_service_api,
+    generate_device_fingerprint,
+    DEFAULT_SEED
 )
+from session_state import SessionState
+from audit_log import DEFAULT_AUDIT_LOG, append_audit_event
+from honeypot_store import capture as honeypot_capture
+from retail_service import get_service
+from cart_risk import CartRiskDetector
+from catalog import ITEM_TYPES, load_catalog
 import pandas as pd
 import random
 import time
 import hashlib # For hashing admin inputs
+import os
+import streamlit.components.v1 as components
+from types import MappingProxyType
+
+STATIC_CACHE_TTL = 3600 # Seconds; process-wide caches shared by every session
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -282,106 +297,87 @@ def show_notification(message, type="info", duration=3):
     st.components.v1.html(script, height=0, width=0)
 
 # --- Enhanced Feature Card Function ---
-def feature_card(title, description):
-    """Generates a styled card for feature descriptions."""
-    st.markdown(f"""
+@st.cache_resource(ttl=STATIC_CACHE_TTL, show_spinner=False)
+def feature_card_html(title, description):
+    """Builds (once per process) the HTML for a feature card."""
+    return f"""
     <div class="feature-card">
         <h4>{title}</h4>
         <p>{description}</p>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+def feature_card(title, description):
+    """Generates a styled card for feature descriptions."""
+    st.markdown(feature_card_html(title, description), unsafe_allow_html=True)
 
 # --- Session State Initialization ---
-if 'overall_safety_score' not in st.session_state:
-    st.session_state.overall_safety_score = 70
-if 'logged_in_user' not in st.session_state:
-    st.session_state.logged_in_user = None
-if 'user_trust_score' not in st.session_state:
-    st.session_state.user_trust_score = 70
-if 'device_fingerprint' not in st.session_state:
-    st.session_state.device_fingerprint = None
-if 'last_known_ip' not in st.session_state:
-    st.session_state.last_known_ip = "192.168.1.1"
-if 'cart_value' not in st.session_state:
-    st.session_state.cart_value = 0
-if 'items_in_cart' not in st.session_state:
-    st.session_state.items_in_cart = 0
-if 'original_shipping_address' not in st.session_state:
-    st.session_state.original_shipping_address = "123 Main St, Anytown"
-if 'original_payment_method' not in st.session_state:
-    st.session_state.original_payment_method = "Visa ending 1234"
-if 'password_reauth_attempted' not in st.session_state:
-    st.session_state.password_reauth_attempted = False
-if 'last_simulated_payment' not in st.session_state:
-    st.session_state.last_simulated_payment = None
-if 'show_payment_details' not in st.session_state:
-    st.session_state.show_payment_details = False
-if 'last_payment_sim_time' not in st.session_state:
-    st.session_state.last_payment_sim_time = time.time()
-if 'page' not in st.session_state:
-    st.session_state.page = "Home & Demo Guide"
-if 'suspicious_shopping_activity_detected' not in st.session_state:
-    st.session_state.suspicious_shopping_activity_detected = False
-if 'high_priced_only_flag' not in st.session_state:
-    st.session_state.high_priced_only_flag = False
-if 'low_medium_item_count' not in st.session_state:
-    st.session_state.low_medium_item_count = 0
-if 'high_priced_item_count' not in st.session_state:
-    st.session_state.high_priced_item_count = 0
+payment_feed = get_payment_feed()
+if 'app_state' not in st.session_state:
+    # Only payments that arrive after the session starts are announced
+    st.session_state.app_state = SessionState(payment_feed_cursor=payment_feed.seq)
+session = st.session_state.app_state
 
 # --- Handle Query Parameters for Navigation ---
 query_params = st.query_params
 if 'trigger_payment_details' in query_params and query_params['trigger_payment_details'] == 'true':
-    st.session_state.page = "Admin Dashboard"
-    st.session_state.show_payment_details = True
+    session.page = "Admin Dashboard"
+    session.show_payment_details = True
     st.query_params.clear()
     st.rerun()
 
 # --- Overall Safety Score Update Function ---
+@st.cache_resource(show_spinner=False)
+def get_demo_rng():
+    """One RNG for every simulated outcome in the demo; SECURE_RETAIL_SEED makes runs repeatable."""
+    return random.Random(DEFAULT_SEED)
+
+demo_rng = get_demo_rng()
+
 def update_overall_safety_score(change_amount):
     """Updates the overall safety score by a variable amount."""
-    current_score = st.session_state.overall_safety_score
-    if change_amount > 0:
-        actual_change = random.randint(1, change_amount)
-    else:
-        actual_change = random.randint(change_amount, -1) if change_amount < 0 else 0
-    
-    new_score = current_score + actual_change
-    st.session_state.overall_safety_score = max(0, min(100, new_score))
-
-# --- Automated Payment Simulation Logic (every 20 seconds) ---
-current_time = time.time()
-if current_time - st.session_state.last_payment_sim_time >= 20:
-    new_payment_data = generate_single_transaction_data()
-    st.session_state.last_simulated_payment = new_payment_data
-    
-    get_hashed_transaction_logs(new_payment_data['hashed'])
+    session.adjust_safety_score(change_amount, demo_rng)
+
+# --- Automated Payment Feed (background producer, drained by a fragment) ---
+PAYMENT_FEED_POLL_SECONDS = 2
+
+@st.fragment(run_every=PAYMENT_FEED_POLL_SECONDS)
+def drain_payment_feed():
+    """Picks up payments published since this session's last poll without rerunning the page."""
+    previous_cursor = session.payment_feed_cursor
+    cursor, new_payments = payment_feed.drain(previous_cursor, limit=1) # Already stored by the feed; only the latest is shown
+    session.payment_feed_cursor = cursor
+    if not new_payments:
+        return
+    new_payment_data = new_payments[-1]
+    session.last_simulated_payment = new_payment_data
+    received = cursor - previous_cursor
+    more = f" (+{received - 1} more)" if received > 1 else ""
 
     action_link = (
         f"<a href='#' onclick='window.location.href = window.location.href.split(\"?\")[0] + \"?trigger_payment_details=true\"; return false;'>"
         f"Click to know more</a>"
     )
     notification_message = (
-        f"💰 New Incoming Payment: {new_payment_data['plain']['amount']} from {new_payment_data['plain']['customer_name']}! {action_link}"
+        f"💰 New Incoming Payment: {new_payment_data['plain']['amount']} from {new_payment_data['plain']['customer_name']}{more}! {action_link}"
     )
     show_notification(notification_message, type="success", duration=7)
-    update_overall_safety_score(random.randint(2, 5))
-    
-    st.session_state.last_payment_sim_time = current_time
-    st.rerun()
+    update_overall_safety_score(demo_rng.randint(2, 5))
+
+drain_payment_feed()
 
 # --- Enhanced Sidebar with Safety Score ---
 score_color = "green"
-if st.session_state.overall_safety_score < 40:
+if session.overall_safety_score < 40:
     score_color = "red"
-elif st.session_state.overall_safety_score < 70:
+elif session.overall_safety_score < 70:
     score_color = "orange"
 
 st.sidebar.markdown(f"""
 <div class="sidebar-score">
     <h3>Overall Safety Score</h3>
     <div style="font-size: 1.5em; font-weight: bold; color: {score_color};">
-        {st.session_state.overall_safety_score}/100
+        {session.overall_safety_score}/100
     </div>
 </div>
 """, unsafe_allow_html=True)
@@ -390,29 +386,65 @@ st.sidebar.markdown("---")
 
 # --- Sidebar Navigation ---
 st.sidebar.header("Navigation")
-page_selection = st.sidebar.radio("Go to", ["Home & Demo Guide", "Admin Dashboard", "User Features (Shopper/Customer)","Firmware Scanner (Experimental)"], index=["Home & Demo Guide", "Admin Dashboard", "User Features (Shopper/Customer)","Firmware Scanner (Experimental)"].index(st.session_state.page))
+page_selection = st.sidebar.radio("Go to", ["Home & Demo Guide", "Admin Dashboard", "User Features (Shopper/Customer)","Firmware Scanner (Experimental)"], index=["Home & Demo Guide", "Admin Dashboard", "User Features (Shopper/Customer)","Firmware Scanner (Experimental)"].index(session.page))
 
-if page_selection != st.session_state.page:
-    st.session_state.page = page_selection
+if page_selection != session.page:
+    session.page = page_selection
     st.rerun()
 
+# Records key-down/up timings in the browser; returns {"keystrokes": [[down_ms, up_ms], ...]}.
+keystroke_capture = components.declare_component(
+    "keystroke_capture", path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "keystroke_capture"))
+
+# Zero-trust checks and login scoring go through the service layer: in-process by default,
+# or a remote service_api.py server when SECURE_RETAIL_API_URL is set.
+get_service_api()  # also serves the API from this process if SECURE_RETAIL_API_PORT is set
+
 # --- Enhanced Shopping Items Definition ---
-SHOPPING_ITEMS = [
-    {"name": "USB-C Cable", "price": 15, "type": "daily"},
-    {"name": "Phone Case", "price": 25, "type": "daily"},
-    {"name": "Wireless Mouse", "price": 40, "type": "daily"},
-    {"name": "Bluetooth Speaker", "price": 75, "type": "daily"},
-    {"name": "Gaming Headset", "price": 120, "type": "medium"},
-    {"name": "Smartwatch", "price": 180, "type": "medium"},
-    {"name": "Laptop Backpack", "price": 60, "type": "daily"},
-    {"name": "Portable SSD 1TB", "price": 150, "type": "medium"},
-    {"name": "Noise-Cancelling Headphones", "price": 250, "type": "medium"},
-    {"name": "High-End Gaming Laptop", "price": 1800, "type": "luxury"},
-    {"name": "Premium DSLR Camera", "price": 1500, "type": "luxury"},
-    {"name": "4K Smart TV 65-inch", "price": 900, "type": "luxury"},
-]
+@st.cache_resource(ttl=STATIC_CACHE_TTL, show_spinner=False)
+def get_shopping_items():
+    """Static catalog built once per process; items are read-only views shared by all sessions."""
+    return tuple(MappingProxyType(item) for item in [
+        {"name": "USB-C Cable", "price": 15, "type": "daily"},
+        {"name": "Phone Case", "price": 25, "type": "daily"},
+        {"name": "Wireless Mouse", "price": 40, "type": "daily"},
+        {"name": "Bluetooth Speaker", "price": 75, "type": "daily"},
+        {"name": "Gaming Headset", "price": 120, "type": "medium"},
+        {"name": "Smartwatch", "price": 180, "type": "medium"},
+        {"name": "Laptop Backpack", "price": 60, "type": "daily"},
+        {"name": "Portable SSD 1TB", "price": 150, "type": "medium"},
+        {"name": "Noise-Cancelling Headphones", "price": 250, "type": "medium"},
+        {"name": "High-End Gaming Laptop", "price": 1800, "type": "luxury"},
+        {"name": "Premium DSLR Camera", "price": 1500, "type": "luxury"},
+        {"name": "4K Smart TV 65-inch", "price": 900, "type": "luxury"},
+    ])
+
+SHOPPING_ITEMS = get_shopping_items()
+CATALOG_PAGE_SIZE = 12
+
+@st.cache_resource(ttl=STATIC_CACHE_TTL, show_spinner=False)
+def get_catalog():
+    """Indexed, columnar catalog of the shopping items (plus any prebuilt or synthetic SKUs)."""
+    return load_catalog(SHOPPING_ITEMS)
+
+def reset_catalog_page():
+    st.session_state.catalog_page = 1
+
+@st.cache_resource(show_spinner=False)
+def get_cart_risk_detector():
+    """Cart totals and fraud windows per customer, shared by all sessions."""
+    return CartRiskDetector(sku_names=get_catalog().name_of)
+
+# Safety-score penalty range per cart_risk rule.
+CART_ALERT_PENALTIES = {
+    "high_value_cart": (-8, -3),
+    "lock_cart_value": (-15, -10),
+    "luxury_only": (-12, -7),
+    "velocity": (-15, -10),
+    "repeated_sku": (-5, -2),
+}
 # --- Page Content ---
-if st.session_state.page == "Home & Demo Guide":
+if session.page == "Home & Demo Guide":
     st.markdown("""
     <div class="home-hero">
         <h1>🛡️ Retail Trust Shield</h1>
@@ -491,7 +523,7 @@ if st.session_state.page == "Home & Demo Guide":
     </div>
     """, unsafe_allow_html=True)
 
-elif st.session_state.page == "Admin Dashboard":
+elif session.page == "Admin Dashboard":
     st.header("🏢 Admin/Owner Side Features")
 
     tab_firmware, tab_zero_trust, tab_admin_logs, tab_payments, tab_honeypot = st.tabs([
@@ -509,25 +541,40 @@ elif st.session_state.page == "Admin Dashboard":
             "<strong>Why Innovative:</strong> Targets deep hardware vulnerabilities.<br>"
             "<strong>How to Test:</strong> Click 'Run Check'. To simulate breach, edit `lojax_modified.bin` (or any `*_modified.bin`), save, then re-run."
         )
+        fleet_source = st.text_input(
+            "Fleet directory or manifest (optional)",
+            "",
+            help="Leave empty to check the demo images, or point to a folder of .bin dumps / a manifest of `path,label` lines.",
+            key="firmware_fleet_source"
+        )
+        full_rehash = st.checkbox("Full re-hash (ignore cached digests)", key="firmware_full_rehash",
+                                  help="Cached digests are reused while a file's size, times and inode are unchanged, and re-verified daily.")
         if st.button("Run Firmware Integrity Check", key="firmware_check_button"):
-            results = check_and_recover()
-            for name, status, action in results:
-                color = "🟢" if status == "Safe" else "🔴"
-                st.write(f"{color} **{name}**: {status}")
-                if action:
-                    st.info(f"{name} firmware was recovered automatically.")
-                    show_notification(f"✅ Firmware '{name}' recovered!", type="success")
-                    update_overall_safety_score(random.randint(5, 10))
-                else:
-                    show_notification(f"🟢 Firmware '{name}' is safe.", type="info")
-                    update_overall_safety_score(random.randint(1, 3))
+            try:
+                for name, status, action in iter_fleet_scan(fleet_source.strip() or None, full_rehash=full_rehash):
+                    color = {"Safe": "🟢", "Missing": "🟠"}.get(status, "🔴")
+                    st.write(f"{color} **{name}**: {status}")
+                    if status == "Missing":
+                        st.warning(action)
+                    elif status == "Recovery failed":
+                        st.error(action)
+                        show_notification(f"🚨 Firmware '{name}' could not be recovered!", type="danger")
+                    elif action:
+                        st.info(f"{name} firmware was recovered automatically. {action}")
+                        show_notification(f"✅ Firmware '{name}' recovered!", type="success")
+                        update_overall_safety_score(demo_rng.randint(5, 10))
+                    else:
+                        show_notification(f"🟢 Firmware '{name}' is safe.", type="info")
+                        update_overall_safety_score(demo_rng.randint(1, 3))
+            except FileNotFoundError as e:
+                st.error(f"Firmware integrity check could not run: {e}")
         else:
             st.write("Click the button to start integrity checks.")
 
     with tab_zero_trust:
         feature_card(
             "2. Zero Trust Access Control (Simulated)",
-            "<strong>What:</strong> Admin access requires TPM, geo-location, and device trust verification.<br>"
+            "<strong>What:</strong> Admin access requires TPM, geo-location, registered-device and access-hour checks.<br>"
             "<strong>Why Innovative:</strong> Modern, dynamic internal access control, beyond static passwords.<br>"
             "<strong>How to Test:</strong> Adjust inputs. Try 'New York' for geo-denial, or a random string for Device ID to trigger untrusted device. Click 'Run Checks'."
         )
@@ -538,7 +585,7 @@ elif st.session_state.page == "Admin Dashboard":
 
         if st.button("Run Zero Trust Checks", key="run_zt_checks_button"):
             st.markdown("##### Zero Trust Check Results:")
-            tpm_s, geo_s, device_s = simulate_zero_trust_check(user_id_input, device_id_input, location_input)
+            zt_statuses = simulate_zero_trust_check(user_id_input, device_id_input, location_input)
             
             st.markdown("---")
             st.markdown("##### Hashed Login Details for Auditing:")
@@ -548,12 +595,17 @@ elif st.session_state.page == "Admin Dashboard":
             st.write(f"**Hashed Device ID:** `{hashed_device_id[:10]}...`")
             st.info("These hashes are stored for auditing purposes without revealing plain text credentials.")
 
-            all_zt_passed = ("🟢 Passed" in tpm_s) and ("🟢 Passed" in geo_s) and ("🟢 Passed" in device_s)
+            all_zt_passed = all("🟢 Passed" in status for status in zt_statuses)
+            append_audit_event(DEFAULT_AUDIT_LOG, {
+                "user": user_id_input,
+                "action": f"Zero Trust access check from {location_input} (device {hashed_device_id[:10]})",
+                "status": "Success" if all_zt_passed else "Blocked - Zero Trust checks failed",
+            })
             if all_zt_passed:
-                update_overall_safety_score(random.randint(3, 7))
+                update_overall_safety_score(demo_rng.randint(3, 7))
                 show_notification("✅ Zero Trust Access Granted!", type="success")
             else:
-                update_overall_safety_score(random.randint(-10, -5))
+                update_overall_safety_score(demo_rng.randint(-10, -5))
                 show_notification("❌ Zero Trust Access Denied!", type="danger")
 
     with tab_admin_logs:
@@ -564,13 +616,32 @@ elif st.session_state.page == "Admin Dashboard":
             "<strong>How to Test:</strong> Click 'Refresh Logs'. Observe the simulated anomaly."
         )
         
+        audit_monitor = get_admin_audit_monitor()
         if st.button("Refresh Admin Action Logs"):
-            admin_logs = get_admin_action_logs()
-            df_admin_logs = pd.DataFrame(admin_logs)
-            st.dataframe(df_admin_logs)
-            st.info("LLM Monitoring (simulated): Anomaly detected - 'Attempted to download customer data' by 'charlie'.")
-            show_notification("🚨 Admin action anomaly detected!", type="warning")
-            update_overall_safety_score(random.randint(-5, -2))
+            new_anomalies = audit_monitor.refresh() # Parses only lines appended since the last refresh
+            if audit_monitor.scoring_error:
+                st.warning(f"Model scoring unavailable ({audit_monitor.scoring_error}); rule-based flags only.")
+            if new_anomalies:
+                latest = new_anomalies[-1]
+                st.info(f"LLM Monitoring (simulated): {len(new_anomalies)} new anomalies - latest '{latest.action}' by '{latest.user}'.")
+                show_notification("🚨 Admin action anomaly detected!", type="warning")
+                update_overall_safety_score(demo_rng.randint(-5, -2))
+            else:
+                st.info("LLM Monitoring (simulated): No new anomalies.")
+
+        recent_events = audit_monitor.recent_events()
+        if recent_events:
+            st.dataframe(pd.DataFrame(recent_events))
+            recent_anomalies = audit_monitor.recent_anomalies()
+            if recent_anomalies:
+                st.markdown("##### Flagged Actions:")
+                st.dataframe(pd.DataFrame(
+                    [{**anomaly._asdict(), "reasons": "; ".join(anomaly.reasons)} for anomaly in recent_anomalies]
+                ))
+            st.markdown("##### Rolling Per-User Activity (last hour):")
+            st.dataframe(pd.DataFrame(audit_monitor.tracker.all_features()))
+        else:
+            st.caption(f"No admin actions ingested yet from `{DEFAULT_AUDIT_LOG}`. Click 'Refresh Admin Action Logs'.")
 
     with tab_payments:
         feature_card(
@@ -593,29 +664,45 @@ elif st.session_state.page == "Admin Dashboard":
         st.write("Payment Method Breakdown:")
         st.json(payment_summary["Payment Method Breakdown"])
 
+        with st.expander("Payment Feed Simulator"):
+            st.number_input("Simulated payments per second (shared by all sessions)", min_value=0.0, max_value=5000.0,
+                            value=float(payment_feed.rate), step=1.0, format="%.2f", key="payment_feed_rate",
+                            on_change=lambda: payment_feed.set_rate(st.session_state.payment_feed_rate))
+            st.caption(f"{payment_feed.seq} payments published by this server; {payment_feed.skipped} skipped under overload.")
+            if payment_feed.errors:
+                st.warning(f"Storing simulated payments failed {payment_feed.errors} times: {payment_feed.last_error}")
+
         st.markdown("---")
 
-        if st.session_state.show_payment_details and st.session_state.last_simulated_payment:
+        if session.show_payment_details and session.last_simulated_payment:
             st.subheader("🔍 Latest Incoming Payment Details:")
             st.info("This section displays the most recent payment data. On the left is the plain text information (for immediate review), and on the right is the corresponding hashed information (how it is securely stored).")
             col_plain, col_hashed = st.columns(2)
             with col_plain:
                 st.markdown("##### Plain English Details:")
-                st.json(st.session_state.last_simulated_payment['plain'])
+                st.json(session.last_simulated_payment['plain'])
             with col_hashed:
                 st.markdown("##### Hashed Details (for secure storage):")
-                st.json(st.session_state.last_simulated_payment['hashed'])
+                st.json(session.last_simulated_payment['hashed'])
             
             if st.button("Close Payment Details", key="close_payment_details"):
-                st.session_state.show_payment_details = False
+                session.show_payment_details = False
                 st.rerun()
 
         st.markdown("---")
         st.subheader("🔒 Secure Transaction History (Hashed)")
-        hashed_logs = get_hashed_transaction_logs()
-        if hashed_logs:
-            df_hashed = pd.DataFrame(hashed_logs)
+        transaction_store = get_transaction_store()
+        total_transactions = len(transaction_store)
+        if total_transactions:
+            col_rows, col_page = st.columns(2)
+            with col_rows:
+                rows_per_page = st.selectbox("Rows per page", [25, 50, 100], key="txn_rows_per_page")
+            total_pages = max(1, -(-total_transactions // rows_per_page))
+            with col_page:
+                txn_page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, key="txn_page")
+            df_hashed = pd.DataFrame(transaction_store.query(page=txn_page - 1, page_size=rows_per_page))
             st.dataframe(df_hashed)
+            st.caption(f"{total_transactions} transactions stored; newest first.")
             st.info("All sensitive customer data is stored in hashed format to ensure privacy protection.")
         else:
             st.info("No transaction logs available yet. Wait for incoming payments to populate this section.")
@@ -628,6 +715,12 @@ elif st.session_state.page == "Admin Dashboard":
             "<strong>How to Test:</strong> Enter any username/password in the honeypot form below. Observe immediate detection alert."
         )
         
+        honeypot_store = get_honeypot_store()
+        honeypot_listener = get_honeypot_listener()
+        if honeypot_listener is not None:
+            listener_stats = honeypot_listener.stats()
+            st.info("📡 Live TCP honeypot: " + ", ".join(f"{service.upper()} :{port}" for service, port in listener_stats["ports"].items())
+                    + f" | {listener_stats['active']} open connections, {listener_stats['connections']} total, {listener_stats['attempts']} login attempts")
         st.markdown("##### Simulated Honeypot Admin Login:")
         st.warning("⚠️ This is a honeypot - any login attempt will be flagged as suspicious!")
         
@@ -638,19 +731,35 @@ elif st.session_state.page == "Admin Dashboard":
             
             if honeypot_submit:
                 if honeypot_user and honeypot_pass:
+                    attempt = honeypot_store.record(honeypot_capture(honeypot_user, honeypot_pass, session.last_known_ip)) # Password kept only as a hash
                     st.error("🚨 SECURITY ALERT: Unauthorized admin access attempt detected!")
                     st.markdown(f"""
                     **Detected Attempt:**
-                    - Username: `{honeypot_user}`
-                    - IP Address: `{st.session_state.last_known_ip}`
-                    - Timestamp: `{time.strftime('%Y-%m-%d %H:%M:%S')}`
+                    - IP Address: `{attempt['source_ip']}`
+                    - Timestamp: `{attempt['timestamp']}`
+                    - Attempts from this IP so far: `{len(honeypot_store.by_ip(attempt['source_ip']))}`
                     """)
                     show_notification("🚨 Honeypot triggered! Attacker detected!", type="danger")
-                    update_overall_safety_score(random.randint(-15, -8))
+                    update_overall_safety_score(demo_rng.randint(-15, -8))
                 else:
                     st.warning("Please enter both username and password to test the honeypot.")
 
-elif st.session_state.page == "User Features (Shopper/Customer)":
+        st.markdown("##### Captured Attempts:")
+        honeypot_lookup = st.text_input("Filter by source IP or username", key="honeypot_lookup",
+                                        help="Served from in-memory indexes; the capture files are never scanned.")
+        if honeypot_lookup:
+            attempts = honeypot_store.by_ip(honeypot_lookup) or honeypot_store.by_username(honeypot_lookup)
+            attempts = attempts[::-1]
+        else:
+            attempts = honeypot_store.recent(50)
+        if attempts:
+            st.dataframe(pd.DataFrame(attempts).drop(columns=["password_sha256"], errors="ignore"))
+            st.caption(f"{len(honeypot_store)} attempts captured; top sources: "
+                       + ", ".join(f"{ip} ({count})" for ip, count in honeypot_store.top_ips(3)))
+        else:
+            st.info("No honeypot attempts captured" + (f" for `{honeypot_lookup}`." if honeypot_lookup else " yet."))
+
+elif session.page == "User Features (Shopper/Customer)":
     st.header("🧑‍💻 User/Customer Side Features")
 
     tab_login, tab_shopping, tab_checkout = st.tabs([
@@ -667,33 +776,33 @@ elif st.session_state.page == "User Features (Shopper/Customer)":
             "<strong>How to Test:</strong> Type naturally (10-100 chars) for high trust. Try very short (`abc`) or very long pasted text for lower trust. Change IP after initial login to see trust score drop."
         )
 
-        if st.session_state.logged_in_user:
-            st.success(f"✅ Welcome back, {st.session_state.logged_in_user}!")
-            st.info(f"🎯 Your current trust score: {st.session_state.user_trust_score}/100")
+        if session.logged_in_user:
+            st.success(f"✅ Welcome back, {session.logged_in_user}!")
+            st.info(f"🎯 Your current trust score: {session.user_trust_score}/100")
             
             if st.button("Logout", key="logout_button"):
-                st.session_state.logged_in_user = None
-                st.session_state.user_trust_score = 70
-                st.session_state.device_fingerprint = None
+                session.logged_in_user = None
+                session.user_trust_score = 70
+                session.device_fingerprint = None
                 show_notification("👋 Logged out successfully!", type="info")
                 st.rerun()
         else:
             st.subheader("🔐 Customer Login")
             
+            st.markdown("##### Behavioral Biometrics Test:")
+            st.caption("Type a message naturally (this analyzes your typing rhythm - key hold and gap times, not the text):")
+            keystroke_sample = keystroke_capture(
+                placeholder="Type something here... (at least 10 keystrokes for trust scoring)",
+                key="keystroke_sample", default=None
+            )
+            
             with st.form("login_form"):
                 username = st.text_input("Username", placeholder="Enter your username")
                 password = st.text_input("Password", type="password", placeholder="Enter your password")
                 
-                st.markdown("##### Behavioral Biometrics Test:")
-                typing_sample = st.text_area(
-                    "Type a message naturally (this analyzes your typing pattern):",
-                    placeholder="Type something here... (10-100 characters for optimal trust scoring)",
-                    height=100
-                )
-                
                 ip_input = st.text_input(
                     "Simulate your IP Address", 
-                    value=st.session_state.last_known_ip,
+                    value=session.last_known_ip,
                     help="Change this after initial login to see trust score impact"
                 )
                 
@@ -702,52 +811,33 @@ elif st.session_state.page == "User Features (Shopper/Customer)":
                 if login_submit and username and password:
                     user_agent_sim = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
                     # Generate device fingerprint on first login
-                    if not st.session_state.device_fingerprint:
-                        st.session_state.device_fingerprint = generate_device_fingerprint(user_agent=user_agent_sim, ip_address=ip_input)
-                    
-                    # Behavioral biometrics scoring
-                    trust_score = 70  # Base score
+                    if not session.device_fingerprint:
+                        session.device_fingerprint = generate_device_fingerprint(user_agent=user_agent_sim, ip_address=ip_input, rng=demo_rng)
                     
-                    # Typing pattern analysis
-                    if typing_sample:
-                        typing_length = len(typing_sample)
-                        if 10 <= typing_length <= 100:
-                            trust_score += random.randint(10, 20)
-                            st.info("✅ Natural typing pattern detected - trust score increased!")
-                        elif typing_length < 10:
-                            trust_score -= random.randint(15, 25)
-                            st.warning("⚠️ Insufficient typing sample - trust score decreased!")
-                        else:
-                            trust_score -= random.randint(20, 30)
-                            st.warning("⚠️ Unusual typing pattern (too long/pasted) - trust score decreased!")
-                    
-                    # IP consistency check
-                    if ip_input != st.session_state.last_known_ip:
-                        trust_score -= random.randint(20, 30)
-                        st.warning("⚠️ IP address changed - trust score decreased!")
-                        st.session_state.last_known_ip = ip_input
-                    else:
-                        trust_score += random.randint(5, 10)
-                        st.info("✅ Consistent IP address - trust score maintained!")
-                    
-                    trust_score = max(0, min(100, trust_score))
-                    st.session_state.user_trust_score = trust_score
+                    # Behavioral biometrics scoring: typing rhythm vs. profile, IP consistency and attempt rate
+                    keystrokes = (keystroke_sample or {}).get("keystrokes") or []
+                    decision = get_service().score_login(username, keystrokes, ip_input)
+                    for level, message in decision["reasons"]:
+                        (st.warning if level == "warning" else st.info)(message)
+                    session.last_known_ip = ip_input
+                    trust_score = decision["score"]
+                    session.user_trust_score = trust_score
                     
                     # Invisible MFA logic
-                    if trust_score >= 75:
-                        st.session_state.logged_in_user = username
+                    if not decision["mfa_required"]:
+                        session.logged_in_user = username
                         st.success("🎉 High trust score detected - MFA bypassed!")
                         show_notification(f"✅ Welcome {username}! (MFA bypassed)", type="success")
-                        update_overall_safety_score(random.randint(3, 7))
+                        update_overall_safety_score(demo_rng.randint(3, 7))
                         st.rerun()
                     else:
                         st.warning("🔐 Lower trust score detected - MFA required!")
                         otp_input = st.text_input("Enter OTP (use any 6-digit code):", max_chars=6)
                         if st.form_submit_button("Verify OTP") and len(otp_input) == 6:
-                            st.session_state.logged_in_user = username
+                            session.logged_in_user = username
                             st.success("✅ OTP verified - Login successful!")
                             show_notification(f"✅ Welcome {username}! (MFA completed)", type="success")
-                            update_overall_safety_score(random.randint(1, 4))
+                            update_overall_safety_score(demo_rng.randint(1, 4))
                             st.rerun()
 
     with tab_shopping:
@@ -758,33 +848,52 @@ elif st.session_state.page == "User Features (Shopper/Customer)":
             "<strong>How to Test:</strong> Add items normally. Try exceeding $500 total or adding 6+ luxury items without daily/medium items."
         )
 
-        if not st.session_state.logged_in_user:
+        if not session.logged_in_user:
             st.info("Please log in to access shopping features.")
         else:
             st.subheader("🛒 Shopping Cart")
+            cart_detector = get_cart_risk_detector()
+            cart = cart_detector.status(session.logged_in_user)
             
             # Display current cart status
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Cart Total", f"${st.session_state.cart_value}")
+                st.metric("Cart Total", f"${cart.value}")
             with col2:
-                st.metric("Items in Cart", st.session_state.items_in_cart)
+                st.metric("Items in Cart", cart.items)
             
             # Shopping items grid
             st.markdown("##### Available Items:")
+            catalog = get_catalog()
+            search_col, type_col = st.columns([3, 1])
+            with search_col:
+                catalog_query = st.text_input("Search items", placeholder="e.g. smart, cable", key="catalog_query",
+                                              on_change=reset_catalog_page)
+            with type_col:
+                catalog_type = st.selectbox("Type", ["All", *ITEM_TYPES], key="catalog_type", on_change=reset_catalog_page)
+            min_price, max_price = catalog.price_range()
+            if max_price > min_price:
+                min_price, max_price = st.slider("Price range ($)", min_price, max_price, (min_price, max_price),
+                                                 key="catalog_price", on_change=reset_catalog_page)
+            matches = catalog.search(catalog_query, None if catalog_type == "All" else catalog_type,
+                                     min_price, max_price, limit=None)
+            page_count = max(1, -(-matches.total // CATALOG_PAGE_SIZE))
+            catalog_page = st.number_input(f"Page (of {page_count}, {matches.total} items)", min_value=1,
+                                           max_value=page_count, key="catalog_page")
+            page_start = (catalog_page - 1) * CATALOG_PAGE_SIZE
+            page_items = catalog.items(matches.rows[page_start:page_start + CATALOG_PAGE_SIZE])
+            if not page_items:
+                st.info("No items match your search.")
             
             # Check if shopping is disabled due to suspicious activity
-            shopping_disabled = (
-                st.session_state.cart_value > 600 or 
-                st.session_state.suspicious_shopping_activity_detected
-            )
+            shopping_disabled = cart.locked
             
             if shopping_disabled:
                 st.error("🚨 Shopping temporarily disabled due to suspicious activity!")
             
             # Display items in a grid
             cols = st.columns(3)
-            for i, item in enumerate(SHOPPING_ITEMS):
+            for i, item in enumerate(page_items):
                 with cols[i % 3]:
                     st.markdown(f"**{item['name']}**")
                     st.markdown(f"Price: ${item['price']}")
@@ -792,36 +901,17 @@ elif st.session_state.page == "User Features (Shopper/Customer)":
                     
                     if st.button(
                         f"Add to Cart", 
-                        key=f"add_{item['name']}", 
+                        key=f"add_{item['sku']}", 
                         disabled=shopping_disabled
                     ):
-                        # Update cart
-                        st.session_state.cart_value += item['price']
-                        st.session_state.items_in_cart += 1
-                        
-                        # Track item types for suspicious activity detection
-                        if item['type'] in ['daily', 'medium']:
-                            st.session_state.low_medium_item_count += 1
-                        elif item['type'] == 'luxury':
-                            st.session_state.high_priced_item_count += 1
-                        
-                        # Check for suspicious patterns
-                        if st.session_state.cart_value > 500:
-                            if not st.session_state.suspicious_shopping_activity_detected:
-                                show_notification("⚠️ High-value cart detected! Monitoring increased.", type="warning")
-                                update_overall_safety_score(random.randint(-8, -3))
-                        
-                        if st.session_state.cart_value > 600:
-                            st.session_state.suspicious_shopping_activity_detected = True
-                            show_notification("🚨 Suspicious shopping activity! Cart locked.", type="danger")
-                            update_overall_safety_score(random.randint(-15, -10))
-                        
-                        # Check for luxury-only purchases
-                        if (st.session_state.high_priced_item_count >= 6 and 
-                            st.session_state.low_medium_item_count == 0):
-                            st.session_state.suspicious_shopping_activity_detected = True
-                            show_notification("🚨 Luxury-only purchase pattern detected!", type="danger")
-                            update_overall_safety_score(random.randint(-12, -7))
+                        # Update cart and check value, velocity, item mix and repeated SKUs
+                        alerts = cart_detector.add(session.logged_in_user, item['sku'], item['price'], item['type'])
+                        for alert in alerts:
+                            if alert.locks:
+                                show_notification(f"🚨 {alert.message}", type="danger")
+                            else:
+                                show_notification(f"⚠️ {alert.message}", type="warning")
+                            update_overall_safety_score(demo_rng.randint(*CART_ALERT_PENALTIES[alert.rule]))
                         
                         show_notification(f"✅ {item['name']} added to cart!", type="success")
                         st.rerun()
@@ -834,16 +924,17 @@ elif st.session_state.page == "User Features (Shopper/Customer)":
             "<strong>How to Test:</strong> Modify shipping address or payment method, then try checkout. Use `password123` to verify."
         )
 
-        if not st.session_state.logged_in_user:
+        cart = get_cart_risk_detector().status(session.logged_in_user)
+        if not session.logged_in_user:
             st.info("Please log in to access checkout features.")
-        elif st.session_state.items_in_cart == 0:
+        elif cart.items == 0:
             st.info("Your cart is empty. Add some items to proceed to checkout.")
         else:
             st.subheader("🛍️ Checkout")
             
             # Display order summary
             st.markdown("##### Order Summary:")
-            st.info(f"Total Items: {st.session_state.items_in_cart} | Total Amount: ${st.session_state.cart_value}")
+            st.info(f"Total Items: {cart.items} | Total Amount: ${cart.value}")
             
             # Checkout form
             with st.form("checkout_form"):
@@ -851,22 +942,22 @@ elif st.session_state.page == "User Features (Shopper/Customer)":
                 
                 shipping_address = st.text_area(
                     "Shipping Address", 
-                    value=st.session_state.original_shipping_address,
+                    value=session.original_shipping_address,
                     height=80
                 )
                 
                 payment_method = st.selectbox(
                     "Payment Method",
                     ["Visa ending 1234", "MasterCard ending 5678", "PayPal", "Apple Pay"],
-                    index=0 if st.session_state.original_payment_method == "Visa ending 1234" else 0
+                    index=0 if session.original_payment_method == "Visa ending 1234" else 0
                 )
                 
                 checkout_submit = st.form_submit_button("Proceed to Checkout")
                 
                 if checkout_submit:
                     # Check if critical info has changed
-                    address_changed = shipping_address != st.session_state.original_shipping_address
-                    payment_changed = payment_method != st.session_state.original_payment_method
+                    address_changed = shipping_address != session.original_shipping_address
+                    payment_changed = payment_method != session.original_payment_method
                     
                     if address_changed or payment_changed:
                         st.warning("🔐 Critical information changed - Re-authentication required!")
@@ -890,36 +981,31 @@ elif st.session_state.page == "User Features (Shopper/Customer)":
                             if reauth_password == "password123":
                                 st.success("✅ Re-authentication successful! Order completed.")
                                 show_notification("🎉 Order completed successfully!", type="success")
-                                update_overall_safety_score(random.randint(5, 10))
+                                update_overall_safety_score(demo_rng.randint(5, 10))
                                 
                                 # Reset cart and update stored preferences
-                                st.session_state.cart_value = 0
-                                st.session_state.items_in_cart = 0
-                                st.session_state.original_shipping_address = shipping_address
-                                st.session_state.original_payment_method = payment_method
-                                st.session_state.suspicious_shopping_activity_detected = False
-                                st.session_state.high_priced_item_count = 0
-                                st.session_state.low_medium_item_count = 0
+                                get_cart_risk_detector().checkout(session.logged_in_user)
+                                session.original_shipping_address = shipping_address
+                                session.original_payment_method = payment_method
                                 
                                 st.rerun()
                             else:
                                 st.error("❌ Incorrect password. Please try again.")
                                 show_notification("❌ Re-authentication failed!", type="danger")
-                                update_overall_safety_score(random.randint(-8, -3))
+                                update_overall_safety_score(demo_rng.randint(-8, -3))
                     else:
                         st.success("✅ Order completed successfully!")
                         show_notification("🎉 Order completed successfully!", type="success")
-                        update_overall_safety_score(random.randint(3, 7))
+                        update_overall_safety_score(demo_rng.randint(3, 7))
                         
                         # Reset cart
-                        st.session_state.cart_value = 0
-                        st.session_state.items_in_cart = 0
-                        st.session_state.suspicious_shopping_activity_detected = False
-                        st.session_state.high_priced_item_count = 0
-                        st.session_state.low_medium_item_count = 0
+                        get_cart_risk_detector().checkout(session.logged_in_user)
                         
                         st.rerun()
 
+elif session.page == "Firmware Scanner (Experimental)":
+    firmware_scan_ui()
+
 # --- Footer ---
 st.markdown("---")
 st.markdown("""
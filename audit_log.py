@@ -0,0 +1,253 @@
+# audit_log.py
+"""Incremental JSON-lines audit log tailing with O(1) per-event rolling user features."""
+import datetime
+import json
+import os
+import threading
+from collections import deque, namedtuple
+
+DEFAULT_AUDIT_LOG = os.environ.get("SECURE_RETAIL_AUDIT_LOG", "admin_audit.jsonl")
+READ_CHUNK = 1024 * 1024
+HEAD_BYTES = 64  # leading bytes remembered to spot a replaced file that reused the inode
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+Anomaly = namedtuple("Anomaly", "timestamp user action reasons")
+
+def append_audit_event(path, event):
+    """Appends one event dict to a JSON-lines audit log, stamping it with the current time if needed."""
+    if not event.get("timestamp"):
+        event = dict(event, timestamp=datetime.datetime.now().strftime(TIMESTAMP_FORMAT))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+class AuditLogTailer:
+    """Reads only the lines appended to a JSON-lines file since the last poll.
+
+    The byte offset (with the file's inode and first bytes, to notice rotation) is kept
+    in memory and, when ``offset_path`` is given, persisted there so a restart resumes
+    where it left off. A trailing partial line is left for the next poll; truncation or rotation
+    restarts from the top of the new file.
+    """
+
+    def __init__(self, path, offset_path=None):
+        self.path = path
+        self.offset_path = offset_path
+        self.offset = 0
+        self.inode = None
+        self.head = ""
+        self.malformed = 0
+        if offset_path and os.path.exists(offset_path):
+            try:
+                with open(offset_path, "r", encoding="utf-8") as f:
+                    saved = json.load(f)
+                self.offset, self.inode = int(saved["offset"]), saved.get("inode")
+                self.head = saved.get("head", "")
+            except (ValueError, KeyError, TypeError):
+                pass
+
+    def poll(self, max_bytes=None):
+        """Returns the events appended since the previous poll, oldest first."""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        events = []
+        with f:
+            st = os.fstat(f.fileno())
+            size, inode = st.st_size, st.st_ino
+            # self.head holds the first (up to HEAD_BYTES) bytes already consumed.
+            if inode != self.inode or size < self.offset or f.read(len(self.head) // 2).hex() != self.head:
+                self.offset = 0  # rotated, replaced or truncated
+                self.head = ""
+            self.inode = inode
+            base = self.offset
+            remaining = size - base if max_bytes is None else min(max_bytes, size - base)
+            f.seek(base)
+            pending = b""
+            while remaining > 0:
+                data = f.read(min(READ_CHUNK, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                chunk = pending + data
+                cut = chunk.rfind(b"\n") + 1
+                self._parse(chunk[:cut], events)
+                base += cut
+                pending = chunk[cut:]
+            if base != self.offset:
+                self.offset = base
+                if len(self.head) < 2 * HEAD_BYTES:
+                    f.seek(0)
+                    self.head = f.read(min(HEAD_BYTES, base)).hex()
+                self._save()
+        return events
+
+    def _parse(self, lines, events):
+        for line in lines.splitlines():
+            if not line.strip():
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                event = None
+            if isinstance(event, dict):
+                events.append(event)
+            else:
+                self.malformed += 1
+
+    def _save(self):
+        if not self.offset_path:
+            return
+        tmp_path = self.offset_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"offset": self.offset, "inode": self.inode, "head": self.head}, f)
+        os.replace(tmp_path, self.offset_path)
+
+def is_blocked(status):
+    status = (status or "").lower()
+    return "blocked" in status or "denied" in status or "fail" in status
+
+class _UserWindow:
+    __slots__ = ("events", "blocked", "off_hours", "total")
+
+    def __init__(self):
+        self.events = deque()  # (epoch seconds, blocked, off_hours)
+        self.blocked = 0
+        self.off_hours = 0
+        self.total = 0
+
+class UserActivityTracker:
+    """Per-user rolling features over a sliding time window, updated in O(1) amortized per event.
+
+    Each event enters its user's window once and leaves it once; running counts of
+    blocked and off-hours events are adjusted on the way in and out, so features are
+    never recomputed from history.
+    """
+
+    def __init__(self, window_seconds=3600, work_hours=(8, 20), max_actions_per_window=30,
+                 blocked_ratio_threshold=0.3, min_events_for_ratio=3):
+        self.window_seconds = window_seconds
+        self.work_hours = work_hours
+        self.max_actions_per_window = max_actions_per_window
+        self.blocked_ratio_threshold = blocked_ratio_threshold
+        self.min_events_for_ratio = min_events_for_ratio
+        self._users = {}
+
+    def observe(self, event):
+        """Adds one audit event and returns an Anomaly if it looks suspicious, else None."""
+        user = event.get("user", "unknown")
+        when = _parse_timestamp(event.get("timestamp"))
+        epoch = when.timestamp()
+        blocked = is_blocked(event.get("status"))
+        start, end = self.work_hours
+        off_hours = not (start <= when.hour < end)
+
+        window = self._users.get(user)
+        if window is None:
+            window = self._users[user] = _UserWindow()
+        self._expire(window, epoch)
+        window.events.append((epoch, blocked, off_hours))
+        window.blocked += blocked
+        window.off_hours += off_hours
+        window.total += 1
+
+        reasons = []
+        if blocked:
+            reasons.append(f"blocked action ({event.get('status')})")
+        if off_hours:
+            reasons.append("off-hours activity")
+        count = len(window.events)
+        if count > self.max_actions_per_window:
+            reasons.append(f"action burst ({count} in {self.window_seconds // 60} min)")
+        if count >= self.min_events_for_ratio and window.blocked / count >= self.blocked_ratio_threshold:
+            reasons.append(f"repeated blocked attempts ({window.blocked}/{count})")
+        if not reasons:
+            return None
+        return Anomaly(event.get("timestamp"), user, event.get("action"), tuple(reasons))
+
+    def _expire(self, window, now):
+        cutoff = now - self.window_seconds
+        events = window.events
+        while events and events[0][0] < cutoff:
+            _, blocked, off_hours = events.popleft()
+            window.blocked -= blocked
+            window.off_hours -= off_hours
+
+    def features(self, user):
+        window = self._users.get(user)
+        if window is None:
+            return None
+        count = len(window.events)
+        return {
+            "user": user,
+            "events_in_window": count,
+            "actions_per_hour": round(count * 3600 / self.window_seconds, 2),
+            "blocked_ratio": round(window.blocked / count, 3) if count else 0.0,
+            "off_hours_ratio": round(window.off_hours / count, 3) if count else 0.0,
+            "total_events": window.total,
+        }
+
+    def all_features(self):
+        return [self.features(user) for user in sorted(self._users)]
+
+def _parse_timestamp(value):
+    if value:
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            pass
+    return datetime.datetime.now()
+
+class AuditMonitor:
+    """Tails an audit log into a UserActivityTracker, keeping the newest events and anomalies.
+
+    With a ``scorer`` (see anomaly_scoring.AnomalyScorer) each new event also gets an
+    ``anomaly_score``; scores at or above ``score_threshold`` are flagged too. If scoring
+    fails, the batch still goes through the tracker's rules (the tailer has already moved
+    past it) and the failure is kept in ``scoring_error`` until a batch scores again.
+    """
+
+    def __init__(self, path=DEFAULT_AUDIT_LOG, offset_path=None, tracker=None, keep=500,
+                 scorer=None, score_threshold=0.7):
+        self.tailer = AuditLogTailer(path, offset_path)
+        self.tracker = tracker or UserActivityTracker()
+        self.scorer = scorer
+        self.score_threshold = score_threshold
+        self.events = deque(maxlen=keep)
+        self.anomalies = deque(maxlen=keep)
+        self.scoring_error = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Ingests everything appended since the last refresh; returns the new anomalies."""
+        found = []
+        with self._lock:
+            events = self.tailer.poll()
+            scores = None
+            if self.scorer is not None and events:
+                try:
+                    scores = self.scorer.score(events)
+                    self.scoring_error = None
+                except Exception as exc:  # e.g. a backend error raised through the worker's futures
+                    self.scoring_error = f"{type(exc).__name__}: {exc}"
+            for index, event in enumerate(events):
+                anomaly = self.tracker.observe(event)
+                if scores is not None:
+                    score = scores[index]
+                    event = dict(event, anomaly_score=round(score, 3))
+                    if score >= self.score_threshold:
+                        reason = f"model score {score:.2f}"
+                        anomaly = (anomaly._replace(reasons=anomaly.reasons + (reason,)) if anomaly is not None
+                                   else Anomaly(event.get("timestamp"), event.get("user", "unknown"),
+                                                event.get("action"), (reason,)))
+                self.events.append(event)
+                if anomaly is not None:
+                    found.append(anomaly)
+            self.anomalies.extend(found)
+        return found
+
+    def recent_events(self, n=100):
+        return list(self.events)[-n:][::-1]
+
+    def recent_anomalies(self, n=100):
+        return list(self.anomalies)[-n:][::-1]
@@ -0,0 +1,752 @@
+# benchmarks.py
+"""Headless micro-benchmarks for the Secure Retail subsystems.
+
+Run ``python benchmarks.py`` for every benchmark or ``python benchmarks.py hashing``
+for a single one. Results are printed as JSON.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Registers a benchmark function under the given name."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+def _write_synthetic_image(path, size_mb, seed=b"secure-retail"):
+    block = (seed * (1024 * 1024 // len(seed) + 1))[:1024 * 1024]
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+@benchmark("hashing")
+def bench_hashing(size_mb=64, repeats=3):
+    """Compares whole-file, chunked and mmap hashing throughput on a synthetic image."""
+    import hashlib
+    from detection import hash_file
+
+    def whole_file(path):
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    strategies = {
+        "whole_file_read": whole_file,
+        "chunked_64k": lambda p: hash_file(p, chunk_size=64 * 1024, use_mmap=False),
+        "chunked_1m": lambda p: hash_file(p, chunk_size=1024 * 1024, use_mmap=False),
+        "mmap_1m": lambda p: hash_file(p, chunk_size=1024 * 1024, use_mmap=True),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic_spi.bin")
+        _write_synthetic_image(path, size_mb)
+        for name, func in strategies.items():
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                func(path)
+                best = min(best, time.perf_counter() - start)
+            results[name] = {"seconds": round(best, 4), "mb_per_s": round(size_mb / best, 1)}
+    return {"image_mb": size_mb, "strategies": results}
+
+@benchmark("cold_import")
+def bench_cold_import(modules=("detection", "firmware_detection", "admin_features"), repeats=5):
+    """Measures fresh-interpreter import time of the modules app.py loads at startup.
+
+    This is only the import share of a cold start; streamlit_cold_start times the first render.
+    """
+    import subprocess
+    import sys
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for module in modules:
+        timings = []
+        for _ in range(repeats):
+            code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+            proc = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True)
+            if proc.returncode != 0:
+                timings = None
+                break
+            timings.append(float(proc.stdout.strip()))
+        results[module] = (
+            {"error": "import failed (missing dependency?)"} if timings is None
+            else {"best_ms": round(min(timings) * 1000, 2), "median_ms": round(sorted(timings)[len(timings) // 2] * 1000, 2)}
+        )
+    return results
+
+@benchmark("streamlit_cold_start")
+def bench_streamlit_cold_start(repeats=3, timeout=120):
+    """Cold start to first render: a fresh interpreter imports Streamlit and runs app.py once
+    under AppTest (the script run a new browser session triggers), timing each phase."""
+    import subprocess
+    import sys
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    code = (
+        "import json, time\n"
+        "start = time.perf_counter()\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        "imported = time.perf_counter()\n"
+        f"app = AppTest.from_file('app.py', default_timeout={timeout})\n"
+        "app.run()\n"
+        "rendered = time.perf_counter()\n"
+        "print(json.dumps({'import_s': imported - start, 'first_render_s': rendered - imported,"
+        " 'exceptions': len(app.exception)}))\n"
+    )
+    runs = []
+    for _ in range(repeats):
+        proc = subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True)
+        if proc.returncode != 0:
+            return {"error": "AppTest run failed (is streamlit installed?)", "stderr": proc.stderr[-500:]}
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    def summary(key):
+        values = sorted(run[key] for run in runs)
+        return {"best_ms": round(values[0] * 1000, 1), "median_ms": round(values[len(values) // 2] * 1000, 1)}
+
+    return {"repeats": repeats, "streamlit_import": summary("import_s"), "first_render": summary("first_render_s"),
+            "exceptions": max(run["exceptions"] for run in runs)}
+
+@benchmark("uefi_parse")
+def bench_uefi_parse(size_mb=32, drivers_per_volume=2000, driver_size=4000, repeats=3):
+    """Parses a synthetic image of repeated FFSv2 volumes full of DXE drivers."""
+    import uuid
+    import uefi_parser
+
+    ffs_files = [
+        uefi_parser.build_ffs_file(str(uuid.UUID(int=i)), uefi_parser.FV_FILETYPE_DRIVER,
+                                   bytes([i & 0xFF]) * driver_size, name=f"Driver{i}")
+        for i in range(drivers_per_volume)
+    ]
+    volume = uefi_parser.build_firmware_volume(ffs_files)
+    size = size_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic_uefi.bin")
+        with open(path, "wb") as f:
+            written = 0
+            while written + len(volume) <= size:
+                f.write(volume)
+                written += len(volume)
+            f.write(b"\xFF" * (size - written))
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            with uefi_parser.FirmwareImage.open(path) as image:
+                modules = len(image.module_guids())
+                drivers = len(image.dxe_drivers())
+            best = min(best, time.perf_counter() - start)
+    return {"image_mb": size_mb, "modules": modules, "dxe_drivers": drivers, "seconds": round(best, 4)}
+
+@benchmark("signatures")
+def bench_signatures(counts=(10, 100, 1000, 10000), image_kb=1024, repeats=3):
+    """Single-pass scan throughput as the signature count grows, next to one bytes.find per signature.
+
+    Throughput is not flat: it dips once random input starts reaching trie states
+    beyond the flat DFA table's budget, and the table itself stops fitting in cache.
+    """
+    import random
+    from signatures import Signature, SignatureAutomaton
+
+    rng = random.Random(1234)
+    data = bytes(rng.getrandbits(8) for _ in range(image_kb * 1024))
+    results = {}
+    for count in counts:
+        sigs = [Signature(f"sig{i}", "synthetic", bytes(rng.getrandbits(8) for _ in range(rng.randint(8, 32))))
+                for i in range(count)]
+        start = time.perf_counter()
+        automaton = SignatureAutomaton(sigs)
+        build = time.perf_counter() - start
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            automaton.scan(data)
+            best = min(best, time.perf_counter() - start)
+        # Reference point: one C-level bytes.find pass per signature.
+        start = time.perf_counter()
+        for sig in sigs:
+            data.find(sig.pattern)
+        naive = time.perf_counter() - start
+        results[str(count)] = {"build_s": round(build, 4), "scan_s": round(best, 4),
+                               "mb_per_s": round(image_kb / 1024 / best, 2),
+                               "per_signature_find_s": round(naive, 4)}
+    return {"image_kb": image_kb, "signature_counts": results}
+
+@benchmark("guid_allowlist")
+def bench_guid_allowlist(count=300000, lookups=100000):
+    """Compares the mmap'd GUID allowlist with a set of GUID strings."""
+    import random
+    import sys
+    import tracemalloc
+    import uuid
+    from guid_allowlist import GuidAllowlist
+
+    rng = random.Random(42)
+    tracemalloc.start()
+    guids = [str(uuid.UUID(int=rng.getrandbits(128))).upper() for _ in range(count)]
+    as_set = set(guids)
+    set_bytes = tracemalloc.get_traced_memory()[0] - sys.getsizeof(guids)
+    tracemalloc.stop()
+    misses = [str(uuid.UUID(int=rng.getrandbits(128))).upper() for _ in range(lookups)]
+    hits = rng.sample(guids, lookups)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "known_good.allowlist")
+        start = time.perf_counter()
+        GuidAllowlist.from_guids(guids).save(path)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        allowlist = GuidAllowlist.load(path)
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        assert all(guid in allowlist for guid in hits)
+        hit_s = time.perf_counter() - start
+        start = time.perf_counter()
+        assert not any(guid in allowlist for guid in misses)
+        miss_s = time.perf_counter() - start
+        bloom_passes = sum(allowlist.might_contain(guid) for guid in misses)
+        start = time.perf_counter()
+        for guid in hits:
+            guid in as_set
+        set_s = time.perf_counter() - start
+        file_bytes = os.path.getsize(path)
+        allowlist.close()
+    return {
+        "guids": count,
+        "build_s": round(build, 3),
+        "load_ms": round(load * 1000, 3),
+        "hit_us": round(hit_s / lookups * 1e6, 2),
+        "miss_us": round(miss_s / lookups * 1e6, 2),
+        "set_lookup_us": round(set_s / lookups * 1e6, 2),
+        "bloom_false_positive_rate": round(bloom_passes / lookups, 4),
+        "allowlist_mb": round(file_bytes / 2**20, 2),
+        "set_of_str_mb": round(set_bytes / 2**20, 2),
+    }
+
+@benchmark("payment_ingest")
+def bench_payment_ingest(rows=200000, distinct_cards=5000, repeats=3):
+    """Batch-hashes a settlement file and compares it with the per-row SHA-256 loop."""
+    import hashlib
+    import random
+    import pandas as pd
+    from payment_ingest import CredentialHasher, ingest_transactions
+
+    rng = random.Random(7)
+    cards = [f"Visa ending {i:04d}-{rng.getrandbits(32):08x}" for i in range(distinct_cards)]
+    records = [
+        {"timestamp": f"2026-01-01 {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+         "customer_name": f"Customer {rng.randrange(10000)}", "amount": f"${rng.randint(10, 500)}.00",
+         "payment_method": rng.choice(cards), "status": "Completed"}
+        for i in range(rows)
+    ]
+    frame = pd.DataFrame.from_records(records)
+
+    def per_row(batch):
+        return [
+            {"timestamp": r["timestamp"], "customer_name": r["customer_name"], "amount": r["amount"],
+             "payment_credential_hash": hashlib.sha256(r["payment_method"].encode()).hexdigest(),
+             "status": r["status"]}
+            for r in batch
+        ]
+
+    strategies = {
+        "per_row_sha256": lambda: per_row(records),
+        "batch_from_records": lambda: ingest_transactions(records, hasher=CredentialHasher(b"k" * 32)),
+        "batch_from_dataframe": lambda: ingest_transactions(frame, hasher=CredentialHasher(b"k" * 32)),
+    }
+    results = {}
+    for name, func in strategies.items():
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        results[name] = {"seconds": round(best, 4), "rows_per_s": round(rows / best)}
+    return {"rows": rows, "distinct_cards": distinct_cards, "strategies": results}
+
+@benchmark("payment_feed")
+def bench_payment_feed(rates=(10, 100, 1000, 5000), seconds=2.0, poll_interval=0.05):
+    """Runs the background feed into a transaction store and times a dashboard-style drain."""
+    import random
+    from payment_feed import PaymentFeed
+    from payment_ingest import CredentialHasher
+    from transaction_store import TransactionStore
+
+    rng = random.Random(11)
+    hasher = CredentialHasher(b"k" * 32)
+    cards = [f"Visa ending {i:04d}" for i in range(500)]
+
+    def generate():
+        card = rng.choice(cards)
+        row = {"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "customer_name": "Load Test",
+               "amount": f"${rng.randint(10, 500)}.00", "status": "Completed"}
+        return {"plain": dict(row, payment_method=card), "hashed": dict(row, payment_credential_hash=hasher.hash(card))}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rate in rates:
+            store = TransactionStore(os.path.join(tmp, f"feed_{rate}.sqlite"))
+            feed = PaymentFeed(generate, sink=store.extend, rate=rate).start()
+            cursor, polls, drain_s = 0, 0, 0.0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                time.sleep(poll_interval)
+                start = time.perf_counter()
+                cursor, _ = feed.drain(cursor, limit=1)
+                drain_s += time.perf_counter() - start
+                polls += 1
+            feed.stop()
+            results[str(rate)] = {"delivered_per_s": round(feed.seq / seconds, 1), "stored": len(store),
+                                  "skipped": feed.skipped, "drain_us": round(drain_s / polls * 1e6, 2)}
+            store.close()
+    return {"seconds": seconds, "rates": results}
+
+@benchmark("session_memory")
+def bench_session_memory(sessions=(100, 1000, 5000), catalog_items=12, admin_logs=4, cards=9):
+    """Per-session memory: ~20 session_state keys plus per-run static data vs one slotted object."""
+    import dataclasses
+    import tracemalloc
+    from types import MappingProxyType
+    from session_state import SessionState
+
+    def catalog():
+        return [{"name": f"Catalog item {i}", "price": 15 + i * 40, "type": "daily"} for i in range(catalog_items)]
+
+    def logs():
+        return [{"timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "user": f"user{i}",
+                 "action": "Accessed sales reports", "status": "Success"} for i in range(admin_logs)]
+
+    def card_html():
+        return [f"<div class='feature-card'><h4>Feature {i}</h4><p>{'description ' * 30}</p></div>" for i in range(cards)]
+
+    def legacy_session():
+        # Separate session_state keys, plus the catalog, log and card HTML each script run rebuilds.
+        return {"state": dict(dataclasses.asdict(SessionState())), "catalog": catalog(), "logs": logs(), "cards": card_html()}
+
+    def shared_caches():
+        # Built once per process and referenced by every session.
+        return {"catalog": tuple(MappingProxyType(item) for item in catalog()), "logs": logs(), "cards": card_html()}
+
+    def measure(factory, count):
+        tracemalloc.start()
+        held = [factory() for _ in range(count)]
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del held
+        return used
+
+    results = {}
+    for count in sessions:
+        legacy = measure(legacy_session, count)
+        compact = measure(SessionState, count)
+        results[str(count)] = {"legacy_kb": round(legacy / 1024, 1), "compact_kb": round(compact / 1024, 1),
+                               "legacy_bytes_per_session": legacy // count, "compact_bytes_per_session": compact // count}
+    return {"sessions": results, "shared_cache_kb": round(measure(shared_caches, 1) / 1024, 1)}
+
+@benchmark("audit_tail")
+def bench_audit_tail(lines=200000, appended=100, users=50):
+    """Times the first full ingest of an audit log, then an incremental refresh vs a full re-parse."""
+    import datetime
+    import random
+    from audit_log import AuditMonitor
+
+    rng = random.Random(3)
+    actions = ["Accessed sales reports", "Modified product pricing", "Attempted to download customer data"]
+
+    base = datetime.datetime(2026, 1, 1)
+
+    def write(f, count, first):
+        for i in range(first, first + count):
+            f.write(json.dumps({
+                "timestamp": (base + datetime.timedelta(seconds=15 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+                "user": f"user{rng.randrange(users)}", "action": rng.choice(actions),
+                "status": "Blocked - Insufficient Permissions" if rng.random() < 0.05 else "Success",
+            }) + "\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "admin_audit.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            write(f, lines, 0)
+        monitor = AuditMonitor(path)
+        start = time.perf_counter()
+        monitor.refresh()
+        initial = time.perf_counter() - start
+        with open(path, "a", encoding="utf-8") as f:
+            write(f, appended, lines)
+        start = time.perf_counter()
+        anomalies = monitor.refresh()
+        incremental = time.perf_counter() - start
+        start = time.perf_counter()
+        AuditMonitor(path).refresh()
+        reparse = time.perf_counter() - start
+    return {
+        "lines": lines,
+        "initial_ingest_s": round(initial, 3),
+        "events_per_s": round(lines / initial),
+        "incremental_refresh_ms": round(incremental * 1000, 3),
+        "appended_lines": appended,
+        "anomalies_in_increment": len(anomalies),
+        "full_reparse_s": round(reparse, 3),
+    }
+
+@benchmark("anomaly_scoring")
+def bench_anomaly_scoring(events=50000, distinct_actions=5000, batch_sizes=(1, 16, 64, 256), max_latency=0.005):
+    """Scores a stream of admin actions; reports events/s and p99 submit-to-score latency."""
+    import random
+    from anomaly_scoring import AnomalyScorer, SEED_EXAMPLES
+
+    rng = random.Random(5)
+    words = sorted({word for text, _ in SEED_EXAMPLES for word in text.split("|")[0].split()})
+    actions = [" ".join(rng.choice(words) for _ in range(rng.randint(3, 7))) for _ in range(distinct_actions)]
+    stream = [{"action": rng.choice(actions), "status": rng.choice(["Success", "Blocked - Insufficient Permissions"])}
+              for _ in range(events)]
+
+    def run(scorer):
+        latencies = []
+        start = time.perf_counter()
+        futures = []
+        for event in stream:
+            submitted = time.perf_counter()
+            future = scorer.submit(event)
+            future.add_done_callback(lambda _, t=submitted: latencies.append(time.perf_counter() - t))
+            futures.append(future)
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        return {"events_per_s": round(events / elapsed),
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+                "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3)}
+
+    results = {}
+    for batch_size in batch_sizes:
+        scorer = AnomalyScorer(batch_size=batch_size, max_latency=max_latency)
+        cold = dict(run(scorer), **scorer.stats())
+        warm = run(scorer)
+        start = time.perf_counter()
+        scorer.score(stream)
+        warm["bulk_score_events_per_s"] = round(events / (time.perf_counter() - start))
+        results[str(batch_size)] = {"cold": cold, "warm_cache": warm}
+    return {"events": events, "distinct_fingerprints": len({(e["action"], e["status"]) for e in stream}),
+            "max_latency_ms": max_latency * 1000, "batch_sizes": results}
+
+@benchmark("honeypot_store")
+def bench_honeypot_store(records=100000, ips=2000, lookups=1000):
+    """Captures a burst of honeypot attempts, then compares indexed IP lookups with a file scan."""
+    import random
+    from honeypot_store import HoneypotStore, capture
+
+    rng = random.Random(9)
+    attempts = [capture(f"admin{rng.randrange(50)}", "hunter2", f"10.{rng.randrange(8)}.{rng.randrange(ips // 8)}.7")
+                for _ in range(records)]
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HoneypotStore(tmp, max_bytes=8 * 1024 * 1024, flush_interval=0.25)
+        start = time.perf_counter()
+        for attempt in attempts:
+            store.record(attempt)
+        record_s = time.perf_counter() - start
+        start = time.perf_counter()
+        store.flush()
+        drain_s = time.perf_counter() - start
+        targets = [rng.choice(attempts)["source_ip"] for _ in range(lookups)]
+        start = time.perf_counter()
+        for ip in targets:
+            store.by_ip(ip)
+        index_s = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(store.path, "r", encoding="utf-8") as f:
+            [json.loads(line) for line in f if targets[0] in line]
+        scan_s = time.perf_counter() - start
+        store.close()
+        files = len(os.listdir(tmp))
+    return {
+        "records": records,
+        "records_per_s": round(records / record_s),
+        "final_flush_s": round(drain_s, 3),
+        "fsyncs": store.fsyncs,
+        "files_after_rotation": files,
+        "indexed_lookup_us": round(index_s / lookups * 1e6, 2),
+        "single_file_scan_ms": round(scan_s * 1000, 2),
+    }
+
+@benchmark("trust_score")
+def bench_trust_score(events=1000000, users=50000, threads=(1, 4, 8), latency_sample=100000):
+    """Scores login attempts; reports decisions/s per thread count and p99 per-call latency.
+
+    The scoring is pure Python, so extra threads mostly measure lock-striping overhead
+    under the GIL rather than parallel speedup.
+    """
+    import random
+    import threading
+    from keystroke_biometrics import TypingMatch
+    from trust_score import TrustScoreEngine
+
+    rng = random.Random(19)
+    ips = [f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}" for _ in range(users // 4)]
+    matches = [TypingMatch("match", 0.8), TypingMatch("uncertain", 0.4), TypingMatch("mismatch", 0.1),
+               TypingMatch("enrolling", None), TypingMatch("insufficient", None)]
+    stream = [(f"user{rng.randrange(users)}", rng.choice(matches), rng.choice(ips)) for _ in range(events)]
+
+    results = {}
+    for count in threads:
+        engine = TrustScoreEngine()
+        parts = [stream[i::count] for i in range(count)]
+
+        def work(part):
+            score = engine.score
+            for user, typing, ip in part:
+                score(user, typing, ip)
+
+        workers = [threading.Thread(target=work, args=(part,)) for part in parts]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        results[str(count)] = {"decisions_per_s": round(events / elapsed), "tracked_users": len(engine.table)}
+
+    engine = TrustScoreEngine()
+    latencies = []
+    for user, typing, ip in stream[:latency_sample]:
+        start = time.perf_counter()
+        engine.score(user, typing, ip)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"events": events, "users": users, "threads": results,
+            "p50_us": round(latencies[len(latencies) // 2] * 1e6, 2),
+            "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 2)}
+
+@benchmark("keystroke_biometrics")
+def bench_keystroke_biometrics(sessions=100000, users=10000, keystrokes=40, loop_sample=5000):
+    """Extracts dwell/flight features and verifies sessions against profiles, batched vs one at a time."""
+    import numpy as np
+    from keystroke_biometrics import TypingProfiles, extract_features, extract_features_batch
+
+    rng = np.random.default_rng(20)
+    rhythm = rng.uniform([60, 80], [140, 300], size=(users, 2))  # per-user dwell and flight means (ms)
+    owners = rng.integers(0, users, size=sessions)
+    dwell = rng.normal(rhythm[owners, :1], rhythm[owners, :1] * 0.15, size=(sessions, keystrokes)).clip(10)
+    flight = rng.normal(rhythm[owners, 1:], rhythm[owners, 1:] * 0.2, size=(sessions, keystrokes))
+    down = np.cumsum(dwell + flight, axis=1) - dwell - flight
+    batch = [np.column_stack((d, d + w)) for d, w in zip(down, dwell)]
+    names = [f"user{owner}" for owner in owners]
+
+    start = time.perf_counter()
+    features = extract_features_batch(batch)
+    extract_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    for session in batch[:loop_sample]:
+        extract_features(session)
+    extract_loop = (time.perf_counter() - start) * sessions / loop_sample
+
+    profiles = TypingProfiles()
+    start = time.perf_counter()
+    profiles.update(names, features)
+    enroll = time.perf_counter() - start
+    start = time.perf_counter()
+    results = profiles.verify(names, features, learn=False)
+    verify_batch = time.perf_counter() - start
+    start = time.perf_counter()
+    for name, row in zip(names[:loop_sample], features[:loop_sample]):
+        profiles.verify([name], row, learn=False)
+    verify_loop = (time.perf_counter() - start) * sessions / loop_sample
+
+    def tally(results):
+        statuses = {}
+        for result in results:
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+        return statuses
+
+    impostors = names[1:] + names[:1]  # each session checked against another user's profile
+    return {"sessions": sessions, "users": users, "keystrokes_per_session": keystrokes,
+            "extract_batch_sessions_per_s": round(sessions / extract_batch),
+            "extract_loop_sessions_per_s": round(sessions / extract_loop),
+            "profile_update_sessions_per_s": round(sessions / enroll),
+            "verify_batch_sessions_per_s": round(sessions / verify_batch),
+            "verify_loop_sessions_per_s": round(sessions / verify_loop),
+            "genuine_statuses": tally(results),
+            "impostor_statuses": tally(profiles.verify(impostors, features, learn=False))}
+
+@benchmark("cart_risk")
+def bench_cart_risk(events=2000000, customers=100000, window_seconds=600):
+    """Replays an add-to-cart stream across many customers; reports events/s and alert counts."""
+    import random
+    from cart_risk import CartRiskDetector
+
+    rng = random.Random(21)
+    catalog = [("USB-C Cable", 15, "daily"), ("Phone Case", 25, "daily"), ("Smartwatch", 180, "medium"),
+               ("Noise-Cancelling Headphones", 250, "medium"), ("4K Smart TV 65-inch", 900, "luxury"),
+               ("Premium DSLR Camera", 1500, "luxury")]
+    weights = [30, 30, 15, 10, 10, 5]
+    items = rng.choices(catalog, weights, k=events)
+    owners = [rng.randrange(customers) for _ in range(events)]
+    stream = [(index * 0.01, f"cust{owner}", *item) for index, (owner, item) in enumerate(zip(owners, items))]
+
+    detector = CartRiskDetector(rules={"window_seconds": window_seconds})
+    counts = {}
+    start = time.perf_counter()
+    for alert in detector.replay(stream):
+        counts[alert.rule] = counts.get(alert.rule, 0) + 1
+    elapsed = time.perf_counter() - start
+    return {"events": events, "customers": customers, "events_per_s": round(events / elapsed),
+            "tracked_customers": len(detector), "alerts": counts}
+
+@benchmark("catalog")
+def bench_catalog(skus=100000, queries=2000):
+    """Builds, saves and reloads a synthetic catalog; reports load times and search latency."""
+    import os
+    import random
+    import tempfile
+    from catalog import ITEM_TYPES, Catalog, synthetic_items
+
+    items = synthetic_items(skus, seed=22)
+    start = time.perf_counter()
+    catalog = Catalog.from_items(items)
+    build = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.npz")
+        catalog.save(path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        catalog = Catalog.load(path)
+        load = time.perf_counter() - start
+
+    rng = random.Random(22)
+    words = sorted({word.lower() for item in items[:1000] for word in item["name"].split()})
+    latencies = []
+    for _ in range(queries):
+        query = " ".join(rng.choice(words)[:rng.randint(1, 5)] for _ in range(rng.randint(0, 2)))
+        low = rng.choice([None, 10, 100, 500])
+        kwargs = {"item_type": rng.choice([None, *ITEM_TYPES]), "min_price": low,
+                  "max_price": None if low is None else low * rng.randint(2, 6), "offset": 12 * rng.randint(0, 20)}
+        start = time.perf_counter()
+        catalog.items(catalog.search(query, **kwargs).rows)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"skus": skus, "build_ms": round(build * 1000, 1), "npz_mb": round(size / 1e6, 1),
+            "load_ms": round(load * 1000, 1), "queries": queries,
+            "search_p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+            "search_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3)}
+
+@benchmark("service_api")
+def bench_service_api(batch=1000, batches=20, users=200, keystrokes=30, requests=2000):
+    """Scores login batches and single zero-trust checks through the HTTP API on loopback.
+
+    Single requests are timed over one keep-alive connection and with a new connection
+    each, which is what the keep-alive support saves.
+    """
+    import http.client
+    import random
+    from retail_service import RetailService, ServiceClient
+    from service_api import ServiceAPI
+
+    rng = random.Random(24)
+    rhythm = {f"user{n}": (rng.uniform(60, 140), rng.uniform(80, 300)) for n in range(users)}
+
+    def login(user):
+        dwell, flight = rhythm[user]
+        strokes, t = [], 0.0
+        for _ in range(keystrokes):
+            up = t + max(10.0, rng.gauss(dwell, dwell * 0.15))
+            strokes.append([round(t, 1), round(up, 1)])  # the browser component sends 0.1 ms resolution
+            t = up + rng.gauss(flight, flight * 0.2)
+        return {"user": user, "keystrokes": strokes, "ip": f"10.0.{rng.randint(0, 3)}.{rng.randint(1, 254)}"}
+
+    payloads = [[login(rng.choice(list(rhythm))) for _ in range(batch)] for _ in range(batches)]
+    api = ServiceAPI(RetailService(), port=0).start_in_thread()
+    client = ServiceClient(f"http://127.0.0.1:{api.port}")
+    try:
+        statuses = {}
+        start = time.perf_counter()
+        for logins in payloads:
+            for result in client.score_logins(logins):
+                statuses[result["typing"]["status"]] = statuses.get(result["typing"]["status"], 0) + 1
+        batch_elapsed = time.perf_counter() - start
+
+        body = b'{"user_id":"admin_user","device_id":"device_123","location":"Bengaluru"}'
+        timings = {}
+        for mode in ("keep_alive", "new_connection"):
+            conn = http.client.HTTPConnection("127.0.0.1", api.port)
+            latencies = []
+            for _ in range(requests):
+                if mode == "new_connection":
+                    conn.close()
+                    conn = http.client.HTTPConnection("127.0.0.1", api.port)
+                begin = time.perf_counter()
+                conn.request("POST", "/v1/zero-trust", body, {"Content-Type": "application/json"})
+                conn.getresponse().read()
+                latencies.append(time.perf_counter() - begin)
+            conn.close()
+            latencies.sort()
+            timings[mode] = {"requests_per_s": round(requests / sum(latencies)),
+                             "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3)}
+    finally:
+        client.close()
+        api.stop()
+    return {"batch": batch, "batches": batches, "keystrokes_per_login": keystrokes,
+            "batch_ms": round(batch_elapsed / batches * 1000, 1),
+            "logins_per_s": round(batch * batches / batch_elapsed), "typing_statuses": statuses,
+            "single_zero_trust": timings}
+
+@benchmark("zero_trust")
+def bench_zero_trust(events=500000, users=5000, devices=3000, working_set=20000, latency_sample=100000):
+    """Evaluates zero-trust requests on one core: cache-friendly traffic, all misses, and no cache.
+
+    The all-miss stream grows the cache by one entry per request, so much of its cost is
+    the cyclic garbage collector walking that cache; it is not a steady-state figure.
+    """
+    import random
+    from zero_trust import ZeroTrustEngine, ZeroTrustPolicy, hash_device_id
+
+    rng = random.Random(25)
+    device_ids = [f"device_{n}" for n in range(devices)]
+    locations = ["Bengaluru", "Bengaluru, Karnataka, India", "Mumbai, India", "New York", "Singapore"]
+    policy = ZeroTrustPolicy(allowed_locations=["Bengaluru", "Mumbai"], access_hours="06:00-23:00",
+                             user_hours={f"user{n}": "09:00-18:00" for n in range(0, users, 10)})
+    for device_id in device_ids[::2]:
+        policy.register_device(hash_device_id(device_id))
+    keys = [(f"user{rng.randrange(users)}", rng.choice(device_ids), rng.choice(locations)) for _ in range(working_set)]
+    streams = {
+        "cached": [rng.choice(keys) for _ in range(events)],  # requests repeat within the TTL
+        "all_miss": [(f"user{n}", rng.choice(device_ids), rng.choice(locations)) for n in range(events)],
+    }
+
+    results = {}
+    for name, stream, ttl in (("cached", streams["cached"], 60), ("all_miss", streams["all_miss"], 60),
+                              ("uncached", streams["all_miss"], 0)):
+        engine = ZeroTrustEngine(policy, ttl=ttl)
+        start = time.perf_counter()
+        granted = sum(decision.granted for decision in engine.evaluate_batch(stream))
+        elapsed = time.perf_counter() - start
+        results[name] = {"decisions_per_s": round(events / elapsed), "granted": granted, **engine.stats()}
+
+    engine = ZeroTrustEngine(policy)
+    latencies = []
+    for user_id, device_id, location in streams["cached"][:latency_sample]:
+        start = time.perf_counter()
+        engine.evaluate(user_id, device_id, location)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"events": events, "working_set": working_set, "modes": results,
+            "single_p50_us": round(latencies[len(latencies) // 2] * 1e6, 2),
+            "single_p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 2)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    args = parser.parse_args(argv)
+    names = args.names or list(BENCHMARKS)
+    report = {}
+    for name in names:
+        report[name] = BENCHMARKS[name]()
+    print(json.dumps(report, indent=2))
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# cart_risk.py
+"""Per-customer cart fraud detection over sliding time windows, O(1) amortized per cart event."""
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+# Thresholds the shopping tab used to hard-code, plus the windowed velocity/repeat rules.
+DEFAULT_RULES = {
+    "window_seconds": 600,
+    "high_value_cart": 500,  # cart total above this raises a warning
+    "lock_cart_value": 600,  # cart total above this locks the cart
+    "luxury_only_items": 6,  # this many luxury adds in the window, with no daily/medium ones, locks
+    "max_adds_per_window": 20,  # add-to-cart velocity that locks
+    "repeated_sku": 5,  # the same SKU added this many times in the window raises a warning
+    "idle_seconds": 3600,  # customers idle this long are dropped from memory
+}
+
+CartAlert = namedtuple("CartAlert", "customer rule locks message")
+CartStatus = namedtuple("CartStatus", "value items locked")
+
+class _Customer:
+    __slots__ = ("last_seen", "value", "items", "locked", "fired", "events", "window_value",
+                 "luxury", "daily_medium", "skus")
+
+    def __init__(self):
+        self.last_seen = 0.0
+        self.value = 0  # cart total since the last checkout
+        self.items = 0
+        self.locked = False
+        self.fired = set()  # rules already alerted for this cart
+        self.events = deque()  # (timestamp, sku, price, luxury?) inside the window
+        self.window_value = 0
+        self.luxury = 0
+        self.daily_medium = 0
+        self.skus = {}
+
+class CartRiskDetector:
+    """Watches add-to-cart events per customer against configurable rules (see DEFAULT_RULES).
+
+    Cart totals run until ``checkout``; velocity, value, item mix and repeated SKUs are
+    kept over a sliding ``window_seconds`` window whose counters are adjusted as events
+    enter and leave it, never recomputed. Each rule alerts once per cart. Customers are
+    kept in last-activity order, so idle ones are evicted from the front as events arrive;
+    a locked cart is never evicted but set aside until ``checkout`` or ``release``.
+    ``sku_names`` (e.g. catalog.Catalog.name_of) turns SKUs into product names for alert messages.
+    """
+
+    def __init__(self, rules=None, clock=time.time, sku_names=None):
+        self.rules = dict(DEFAULT_RULES, **(rules or {}))
+        self._sku_names = sku_names
+        self._clock = clock
+        self._customers = OrderedDict()
+        self._held = {}  # idle customers whose carts are locked
+        self._lock = threading.Lock()
+
+    def add(self, customer, sku, price, item_type, timestamp=None):
+        """Records one add-to-cart and returns the alerts it raised (possibly none)."""
+        rules = self.rules
+        now = self._clock() if timestamp is None else timestamp
+        luxury = item_type == "luxury"
+        with self._lock:
+            state = self._customers.pop(customer, None) or self._held.pop(customer, None) or _Customer()
+            self._customers[customer] = state
+            state.last_seen = now
+            self._expire(state, now - rules["window_seconds"])
+            state.events.append((now, sku, price, luxury))
+            state.window_value += price
+            if luxury:
+                state.luxury += 1
+            else:
+                state.daily_medium += 1
+            state.skus[sku] = repeats = state.skus.get(sku, 0) + 1
+            state.value += price
+            state.items += 1
+
+            alerts = []
+            if state.value > rules["high_value_cart"]:
+                self._alert(alerts, state, customer, "high_value_cart", False,
+                            f"High-value cart (${state.value})! Monitoring increased.")
+            if state.value > rules["lock_cart_value"]:
+                self._alert(alerts, state, customer, "lock_cart_value", True,
+                            f"Suspicious shopping activity (cart over ${rules['lock_cart_value']})! Cart locked.")
+            if state.luxury >= rules["luxury_only_items"] and not state.daily_medium:
+                self._alert(alerts, state, customer, "luxury_only", True, "Luxury-only purchase pattern detected!")
+            if len(state.events) > rules["max_adds_per_window"]:
+                self._alert(alerts, state, customer, "velocity", True,
+                            f"{len(state.events)} items added in {rules['window_seconds'] // 60} min! Cart locked.")
+            if repeats >= rules["repeated_sku"]:
+                self._alert(alerts, state, customer, "repeated_sku", False,
+                            f"{self._product(sku)} added {repeats} times in {rules['window_seconds'] // 60} min.")
+            self._evict_idle(now - rules["idle_seconds"])
+        return alerts
+
+    def _product(self, sku):
+        name = self._sku_names(sku) if self._sku_names is not None else None
+        return name or f"SKU {sku}"
+
+    def _alert(self, alerts, state, customer, rule, locks, message):
+        if rule in state.fired:
+            return
+        state.fired.add(rule)
+        if locks:
+            state.locked = True
+        alerts.append(CartAlert(customer, rule, locks, message))
+
+    def _expire(self, state, cutoff):
+        events = state.events
+        while events and events[0][0] < cutoff:
+            _, sku, price, luxury = events.popleft()
+            state.window_value -= price
+            if luxury:
+                state.luxury -= 1
+            else:
+                state.daily_medium -= 1
+            remaining = state.skus[sku] - 1
+            if remaining:
+                state.skus[sku] = remaining
+            else:
+                del state.skus[sku]
+
+    def _evict_idle(self, cutoff):
+        customers = self._customers
+        while customers:
+            customer = next(iter(customers))
+            state = customers[customer]
+            if state.last_seen >= cutoff:
+                return
+            del customers[customer]
+            if state.locked:  # a lock must outlive inactivity, or waiting it out would clear it
+                self._held[customer] = state
+
+    def _get(self, customer):
+        state = self._customers.get(customer)
+        return self._held.get(customer) if state is None else state
+
+    def status(self, customer):
+        with self._lock:
+            state = self._get(customer)
+            if state is None:
+                return CartStatus(0, 0, False)
+            return CartStatus(state.value, state.items, state.locked)
+
+    def features(self, customer, now=None):
+        """Windowed features for one customer, or None if unknown."""
+        now = self._clock() if now is None else now
+        with self._lock:
+            state = self._get(customer)
+            if state is None:
+                return None
+            self._expire(state, now - self.rules["window_seconds"])
+            count = len(state.events)
+            return {
+                "customer": customer,
+                "adds_in_window": count,
+                "value_in_window": state.window_value,
+                "luxury_ratio": round(state.luxury / count, 3) if count else 0.0,
+                "max_sku_repeats": max(state.skus.values(), default=0),
+                "cart_value": state.value,
+                "locked": state.locked,
+            }
+
+    def checkout(self, customer):
+        """Empties the customer's cart and clears its lock and per-cart alerts; the window stays."""
+        with self._lock:
+            state = self._get(customer)
+            if state is not None:
+                state.value = 0
+                state.items = 0
+                state.locked = False
+                state.fired.clear()
+                self._held.pop(customer, None)
+
+    def locked_customers(self):
+        """Customers whose carts are locked, for admin review."""
+        with self._lock:
+            active = [customer for customer, state in self._customers.items() if state.locked]
+            return active + list(self._held)
+
+    def release(self, customer):
+        """Admin review: unlocks the cart and re-arms its alerts, keeping its contents."""
+        with self._lock:
+            state = self._get(customer)
+            if state is not None:
+                state.locked = False
+                state.fired.clear()
+                if self._held.pop(customer, None) is not None:
+                    self._customers[customer] = state  # idle, so evicted again once it reaches the front
+
+    def replay(self, events):
+        """Feeds ``(timestamp, customer, sku, price, item_type)`` tuples in time order; yields alerts."""
+        add = self.add
+        for timestamp, customer, sku, price, item_type in events:
+            yield from add(customer, sku, price, item_type, timestamp)
+
+    def __len__(self):
+        return len(self._customers) + len(self._held)
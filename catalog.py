@@ -0,0 +1,190 @@
+# catalog.py
+"""Columnar product catalog with price-band, type and name-prefix indexes for paginated search."""
+import os
+import random
+import string
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+ITEM_TYPES = ("daily", "medium", "luxury")  # categories; items store the index as an int8 code
+DEFAULT_CATALOG_PATH = os.environ.get("SECURE_RETAIL_CATALOG")  # prebuilt .npz from Catalog.save
+DEFAULT_SYNTHETIC_SKUS = int(os.environ.get("SECURE_RETAIL_SYNTHETIC_SKUS", 0))
+_WORD_BREAKS = str.maketrans(dict.fromkeys(string.punctuation, " "))  # "USB-C" -> "usb", "c"
+_MAX_CHAR = chr(0x10FFFF)
+
+SearchResult = namedtuple("SearchResult", "total rows")  # rows: catalog row positions of the requested page
+
+class Catalog:
+    """Items held column-wise in NumPy arrays: ``sku``, ``name``, ``price`` and ``type_code``
+    (an index into ITEM_TYPES, i.e. a categorical).
+
+    Indexes are precomputed: rows sorted by price (a price band is two binary searches),
+    one row array per type, and an inverted index from the sorted vocabulary of
+    lower-cased name words to rows (a word prefix is two binary searches into the
+    vocabulary). ``search`` intersects those arrays and never scans the columns.
+    ``save``/``load`` keep the columns and indexes in one ``.npz``, so a prebuilt
+    catalog loads without re-tokenizing.
+    """
+
+    def __init__(self, sku, name, price, type_code, indexes=None):
+        self.sku = np.asarray(sku, dtype=np.int64)
+        self.name = np.asarray(name, dtype=str)
+        self.price = np.asarray(price)
+        self.type_code = np.asarray(type_code, dtype=np.int8)
+        if indexes is None:
+            indexes = self._build_indexes()
+        self._price_order, self._vocab, self._postings, self._posting_starts = indexes
+        self._sorted_price = self.price[self._price_order]
+        self._type_masks = {item_type: self.type_code == code for code, item_type in enumerate(ITEM_TYPES)}
+        self._rows_by_name = None
+        self._names_by_sku = None
+
+    @classmethod
+    def from_items(cls, items):
+        """Builds a catalog from dicts with ``name``, ``price``, ``type`` and optionally ``sku``."""
+        items = list(items)
+        codes = {item_type: code for code, item_type in enumerate(ITEM_TYPES)}
+        return cls([item.get("sku", row) for row, item in enumerate(items)],
+                   [item["name"] for item in items],
+                   [item["price"] for item in items],
+                   [codes[item["type"]] for item in items])
+
+    def _build_indexes(self):
+        price_order = np.argsort(self.price, kind="stable")
+        # One split over the whole column; "\n" tokens mark where each name ends.
+        text = "\n".join(self.name.tolist()).lower().translate(_WORD_BREAKS).replace("\n", " \n ")
+        words = np.array(text.split(" "), dtype=object)
+        breaks = words == "\n"
+        rows = np.cumsum(breaks)
+        keep = ~(breaks | (words == ""))
+        words, rows = words[keep], rows[keep]
+        codes, vocab = pd.factorize(words)
+        # Renumber words in sorted order so a prefix is a contiguous range of codes.
+        order = np.argsort(np.asarray(vocab, dtype=str))
+        rank = np.empty(len(vocab), dtype=np.int64)
+        rank[order] = np.arange(len(vocab))
+        codes = rank[codes]
+        by_word = np.argsort(codes, kind="stable")  # rows stay ascending within a word
+        codes, rows = codes[by_word], rows[by_word]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])  # a word repeated in one name
+        codes, rows = codes[keep], rows[keep]
+        starts = np.searchsorted(codes, np.arange(len(vocab) + 1))
+        return price_order, np.asarray(vocab, dtype=str)[order], rows, starts
+
+    def save(self, path):
+        np.savez(path, sku=self.sku, name=self.name, price=self.price, type_code=self.type_code,
+                 price_order=self._price_order, vocab=self._vocab, postings=self._postings,
+                 posting_starts=self._posting_starts)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["sku"], data["name"], data["price"], data["type_code"],
+                       indexes=(data["price_order"], data["vocab"], data["postings"], data["posting_starts"]))
+
+    def __len__(self):
+        return len(self.sku)
+
+    def price_band(self, min_price=None, max_price=None):
+        """Rows priced within ``[min_price, max_price]``, in catalog order."""
+        lo = 0 if min_price is None else np.searchsorted(self._sorted_price, min_price, "left")
+        hi = len(self._sorted_price) if max_price is None else np.searchsorted(self._sorted_price, max_price, "right")
+        return np.sort(self._price_order[lo:hi])
+
+    def _prefix_rows(self, term):
+        lo, hi = np.searchsorted(self._vocab, [term, term + _MAX_CHAR])
+        return self._postings[self._posting_starts[lo]:self._posting_starts[hi]]
+
+    def prefix(self, term):
+        """Rows with a name word starting with ``term`` (case-insensitive), in catalog order."""
+        return np.unique(self._prefix_rows(term.lower()))
+
+    def search(self, query="", item_type=None, min_price=None, max_price=None, offset=0, limit=12):
+        """Returns a SearchResult for items matching every word of ``query`` as a prefix,
+        the type and the price band, paged by ``offset``/``limit`` (None for all matches)
+        in catalog order.
+
+        Each filter marks its posting rows in a boolean mask and the masks are ANDed, so
+        a filter costs its match count plus one pass over a byte per item.
+        """
+        selected = None
+        for term in query.lower().translate(_WORD_BREAKS).split():
+            selected = self._narrow(selected, self._prefix_rows(term))
+        if item_type:
+            selected = self._type_masks[item_type] if selected is None else selected & self._type_masks[item_type]
+        if min_price is not None or max_price is not None:
+            lo = 0 if min_price is None else np.searchsorted(self._sorted_price, min_price, "left")
+            hi = len(self) if max_price is None else np.searchsorted(self._sorted_price, max_price, "right")
+            selected = self._narrow(selected, self._price_order[lo:hi])
+        end = None if limit is None else offset + limit
+        if selected is None:
+            return SearchResult(len(self), np.arange(len(self))[offset:end])
+        rows = np.flatnonzero(selected)
+        return SearchResult(len(rows), rows[offset:end])
+
+    def _narrow(self, selected, rows):
+        mask = np.zeros(len(self), dtype=bool)
+        mask[rows] = True
+        return mask if selected is None else selected & mask
+
+    def items(self, rows):
+        """Item dicts for the given rows."""
+        return [{"sku": sku, "name": name, "price": price, "type": ITEM_TYPES[code]}
+                for sku, name, price, code in zip(self.sku[rows].tolist(), self.name[rows].tolist(),
+                                                  self.price[rows].tolist(), self.type_code[rows].tolist())]
+
+    def get(self, name):
+        if self._rows_by_name is None:
+            self._rows_by_name = dict(zip(self.name.tolist(), range(len(self))))
+        row = self._rows_by_name.get(name)
+        return None if row is None else self.items([row])[0]
+
+    def name_of(self, sku):
+        """The product name for ``sku``, or None if it is not in the catalog."""
+        if self._names_by_sku is None:
+            self._names_by_sku = dict(zip(self.sku.tolist(), self.name.tolist()))
+        return self._names_by_sku.get(sku)
+
+    def price_range(self):
+        if not len(self):
+            return 0, 0
+        return self._sorted_price[0].item(), self._sorted_price[-1].item()
+
+    def to_frame(self, rows=None):
+        """The (selected) rows as a pandas frame with a categorical ``type`` column."""
+        rows = slice(None) if rows is None else rows
+        return pd.DataFrame({
+            "sku": self.sku[rows],
+            "name": self.name[rows],
+            "price": self.price[rows],
+            "type": pd.Categorical.from_codes(self.type_code[rows], categories=ITEM_TYPES),
+        })
+
+_ADJECTIVES = ("Compact", "Wireless", "Premium", "Portable", "Smart", "Ultra", "Classic", "Pro", "Eco", "Rugged")
+_PRODUCTS = {
+    "daily": ("Cable", "Phone Case", "Mouse", "Charger", "Notebook", "Water Bottle", "Keychain", "Screen Protector"),
+    "medium": ("Headset", "Smartwatch", "Speaker", "Keyboard", "Monitor Arm", "Router", "Webcam", "Portable SSD"),
+    "luxury": ("Gaming Laptop", "DSLR Camera", "Smart TV", "Espresso Machine", "Drone", "Home Theater"),
+}
+_PRICE_RANGES = {"daily": (5, 80), "medium": (80, 400), "luxury": (600, 3000)}
+
+def synthetic_items(count, seed=0, start_sku=0):
+    """Generates ``count`` plausible catalog items deterministically from ``seed``."""
+    rng = random.Random(seed)
+    items = []
+    for sku in range(start_sku, start_sku + count):
+        item_type = rng.choices(ITEM_TYPES, (60, 30, 10))[0]
+        low, high = _PRICE_RANGES[item_type]
+        name = f"{rng.choice(_ADJECTIVES)} {rng.choice(_PRODUCTS[item_type])} {sku:06d}"
+        items.append({"sku": sku, "name": name, "price": rng.randint(low, high), "type": item_type})
+    return items
+
+def load_catalog(items=(), path=DEFAULT_CATALOG_PATH, synthetic=DEFAULT_SYNTHETIC_SKUS):
+    """The prebuilt catalog at ``path`` if given, else ``items`` padded with ``synthetic`` generated SKUs."""
+    if path:
+        return Catalog.load(path)
+    items = list(items)
+    return Catalog.from_items(items + synthetic_items(synthetic, start_sku=len(items)))
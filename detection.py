@@ -1,6 +1,11 @@
 # detection.py
 import hashlib
-import shutil
+import mmap
+import os
+import threading
+
+from hash_cache import get_hash_cache, stat_signature
+import merkle
 
 baseline_file = "baseline_firmware.bin"
 files = [
@@ -10,23 +15,245 @@ files = [
     ("evil_maid_modified.bin", "Evil Maid")
 ]
 
-with open(baseline_file, "rb") as f:
-    BASELINE_HASH = hashlib.sha256(f.read()).hexdigest()
+DEFAULT_ALGO = "sha256"
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+# Images at least this large are hashed through mmap instead of read() calls.
+MMAP_THRESHOLD = 16 * 1024 * 1024
+
+def hash_file(path, algo=DEFAULT_ALGO, chunk_size=DEFAULT_CHUNK_SIZE, use_mmap=None):
+    """Hashes a firmware image in fixed-size chunks so memory stays constant per file."""
+    hasher = hashlib.new(algo)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap is None:
+            use_mmap = size >= MMAP_THRESHOLD
+        if use_mmap and size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    for start in range(0, size, chunk_size):
+                        hasher.update(view[start:start + chunk_size])
+                finally:
+                    view.release()
+        else:
+            buf = bytearray(chunk_size)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                hasher.update(view[:n])
+    return hasher.hexdigest()
+
+def cached_hash_file(path, algo=DEFAULT_ALGO, chunk_size=DEFAULT_CHUNK_SIZE, cache=None, full_rehash=False):
+    """Like ``hash_file`` but skips re-hashing files whose stat signature is unchanged.
+
+    ``full_rehash`` ignores the cached digest (the fresh one is still stored).
+    """
+    cache = get_hash_cache() if cache is None else cache
+    signature = stat_signature(path)
+    digest = None if full_rehash else cache.get(path, algo, signature)
+    if digest is None:
+        digest = hash_file(path, algo=algo, chunk_size=chunk_size)
+        cache.put(path, algo, digest, signature)
+    return digest
+
+DEFAULT_BASELINE = "default"
+
+class BaselineRegistry:
+    """Thread-safe registry of named baseline images, one per board model or firmware version.
+
+    Nothing is read from disk until a baseline is first used. Digests and Merkle trees are
+    memoized per baseline and recomputed only if the baseline file's stat signature changes.
+    ``cache`` is the HashCache for baseline digests (default: the process-wide one).
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._paths = {}
+        self._memo = {}
+
+    def register(self, name, path):
+        with self._lock:
+            self._paths[name] = path
+            for key in [key for key in self._memo if key[0] == name]:
+                del self._memo[key]
+
+    def names(self):
+        with self._lock:
+            return list(self._paths)
+
+    def path(self, name=DEFAULT_BASELINE):
+        with self._lock:
+            try:
+                return self._paths[name]
+            except KeyError:
+                raise KeyError(f"Unknown firmware baseline '{name}'") from None
+
+    def hash(self, name=DEFAULT_BASELINE, algo=DEFAULT_ALGO, chunk_size=DEFAULT_CHUNK_SIZE):
+        return self._memoized(name, ("hash", algo),
+                              lambda path: cached_hash_file(path, algo=algo, chunk_size=chunk_size,
+                                                           cache=self.cache))
+
+    def merkle_tree(self, name=DEFAULT_BASELINE, block_size=merkle.BLOCK_SIZE):
+        return self._memoized(name, ("merkle", block_size),
+                              lambda path: merkle.load_or_build(path, block_size,
+                                                                   cached_hash_file(path, cache=self.cache)))
+
+    def _memoized(self, name, kind, compute):
+        path = self.path(name)
+        signature = stat_signature(path)
+        if signature is None:
+            raise FileNotFoundError(f"Baseline '{name}' not found: {path}")
+        key = (name, kind)
+        with self._lock:
+            memo = self._memo.get(key)
+        if memo is not None and memo[0] == (path, signature):
+            return memo[1]
+        value = compute(path)
+        with self._lock:
+            self._memo[key] = ((path, signature), value)
+        return value
 
-def hash_file(filename):
-    with open(filename, "rb") as f:
-        return hashlib.sha256(f.read()).hexdigest()
+BASELINES = BaselineRegistry()
+BASELINES.register(DEFAULT_BASELINE, baseline_file)
 
-def recover_file(filename):
-    shutil.copy(baseline_file, filename)
+def __getattr__(name):
+    # BASELINE_HASH used to be computed at import time; keep it readable but lazy.
+    if name == "BASELINE_HASH":
+        return BASELINES.hash()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def check_and_recover():
+def diff_against_baseline(filename, block_size=merkle.BLOCK_SIZE, baseline=DEFAULT_BASELINE, registry=BASELINES):
+    """Returns the ``(start, end)`` byte ranges where ``filename`` differs from the baseline."""
+    baseline_tree = registry.merkle_tree(baseline, block_size)
+    image_tree = merkle.MerkleTree.from_file(filename, block_size)
+    indices = merkle.diff_blocks(baseline_tree, image_tree)
+    return merkle.block_ranges(indices, block_size, baseline_tree.image_size)
+
+class RecoveryError(Exception):
+    """A patched image still does not match its baseline."""
+
+def recover_file(filename, ranges=None, baseline=DEFAULT_BASELINE):
+    """Writes only the differing baseline blocks back into ``filename``; returns the ranges.
+
+    The patched image is re-hashed; RecoveryError is raised if it still differs from the baseline.
+    """
+    if ranges is None:
+        ranges = diff_against_baseline(filename, baseline=baseline)
+    baseline_path = BASELINES.path(baseline)
+    merkle.patch_ranges(baseline_path, filename, ranges, os.path.getsize(baseline_path))
+    get_hash_cache().invalidate(filename)
+    if cached_hash_file(filename) != BASELINES.hash(baseline):
+        raise RecoveryError(f"{filename} still differs from baseline '{baseline}' after patching "
+                            f"{merkle.format_ranges(ranges) or 'no ranges'}")
+    return ranges
+
+def _recover(filename, label, baseline):
+    try:
+        ranges = recover_file(filename, baseline=baseline)
+    except RecoveryError as exc:
+        return (label, "Recovery failed", str(exc))
+    return (label, "Compromised", f"Recovered {merkle.format_ranges(ranges)}" if ranges else "Recovered")
+
+def check_and_recover(algo=DEFAULT_ALGO, chunk_size=DEFAULT_CHUNK_SIZE, baseline=DEFAULT_BASELINE, full_rehash=False):
+    baseline_hash = BASELINES.hash(baseline, algo, chunk_size)
     result = []
     for filename, label in files:
-        current_hash = hash_file(filename)
-        if current_hash != BASELINE_HASH:
-            recover_file(filename)
-            result.append((label, "Compromised", "Recovered"))
+        current_hash = cached_hash_file(filename, algo=algo, chunk_size=chunk_size, full_rehash=full_rehash)
+        if current_hash != baseline_hash:
+            result.append(_recover(filename, label, baseline))
         else:
             result.append((label, "Safe", ""))
     return result
+
+def load_fleet(source):
+    """Returns (filename, label) pairs from a directory of .bin dumps or a manifest file.
+
+    Manifest lines are ``path[,label]``; blank lines and ``#`` comments are ignored and
+    relative paths are resolved against the manifest's directory.
+    """
+    if os.path.isdir(source):
+        baseline_names = {os.path.basename(BASELINES.path(name)) for name in BASELINES.names()}
+        fleet = []
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            if name.endswith(".bin") and os.path.isfile(path) and name not in baseline_names:
+                fleet.append((path, os.path.splitext(name)[0]))
+        return fleet
+    base_dir = os.path.dirname(os.path.abspath(source))
+    fleet = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path, _, label = line.partition(",")
+            path = path.strip()
+            if not os.path.isabs(path):
+                path = os.path.join(base_dir, path)
+            fleet.append((path, label.strip() or os.path.splitext(os.path.basename(path))[0]))
+    return fleet
+
+def _hash_worker(filename, algo, chunk_size):
+    signature = stat_signature(filename)
+    return hash_file(filename, algo=algo, chunk_size=chunk_size), signature
+
+def _verdict(filename, label, digest, baseline_hash, baseline):
+    if digest != baseline_hash:
+        return _recover(filename, label, baseline)
+    return (label, "Safe", "")
+
+def _missing(filename, label):
+    return (label, "Missing", f"Image not found: {filename}")
+
+def iter_fleet_scan(source=None, workers=None, algo=DEFAULT_ALGO, chunk_size=DEFAULT_CHUNK_SIZE,
+                    baseline=DEFAULT_BASELINE, full_rehash=False):
+    """Hashes a fleet of images on a process pool and yields results as they complete.
+
+    ``source`` is a directory or manifest path (see ``load_fleet``); by default the demo
+    ``files`` list is scanned. Results keep the ``(label, status, action)`` shape of
+    ``check_and_recover`` but arrive in completion order. Images whose stat signature
+    is already in the hash cache are answered without touching the pool, unless
+    ``full_rehash`` is set, which hashes every image from disk. ``baseline``
+    names the entry in ``BASELINES`` the fleet is compared against. Images that do not
+    exist (e.g. a stale manifest line) yield a "Missing" result and the scan carries on;
+    a compromised image that still differs after patching yields "Recovery failed".
+    """
+    fleet = files if source is None else load_fleet(source)
+    if not fleet:
+        return
+    cache = get_hash_cache()
+    baseline_hash = BASELINES.hash(baseline, algo, chunk_size)
+    misses = []
+    for filename, label in fleet:
+        if not os.path.isfile(filename):
+            yield _missing(filename, label)
+            continue
+        digest = None if full_rehash else cache.get(filename, algo)
+        if digest is None:
+            misses.append((filename, label))
+        else:
+            yield _verdict(filename, label, digest, baseline_hash, baseline)
+    cache.flush()
+    if not misses:
+        return
+    # Imported here so that importing detection stays cheap for the Streamlit process.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    workers = min(workers or os.cpu_count() or 1, len(misses))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_hash_worker, filename, algo, chunk_size): (filename, label)
+            for filename, label in misses
+        }
+        for future in as_completed(futures):
+            filename, label = futures[future]
+            try:
+                digest, signature = future.result()
+            except FileNotFoundError:  # removed after the scan started
+                yield _missing(filename, label)
+                continue
+            cache.put(filename, algo, digest, signature)
+            yield _verdict(filename, label, digest, baseline_hash, baseline)
@@ -0,0 +1,48 @@
+# findings.py
+"""Structured firmware scan findings and their text / JSON-lines / CSV renderings."""
+import csv
+import io
+import json
+from collections import namedtuple
+
+Finding = namedtuple("Finding", "check severity subject offset message")
+
+SEVERITY_INFO = "info"
+SEVERITY_WARNING = "warning"
+SEVERITY_CRITICAL = "critical"
+SEVERITY_ICONS = {SEVERITY_INFO: "✔", SEVERITY_WARNING: "⚠", SEVERITY_CRITICAL: "❗"}
+CSV_FIELDS = Finding._fields
+
+def iter_text_lines(findings):
+    """Yields the classic scan log, one line at a time, with a header per check."""
+    current = None
+    for finding in findings:
+        if finding.check != current:
+            yield f"[{finding.check}]" if current is None else f"\n[{finding.check}]"
+            current = finding.check
+        yield f"{SEVERITY_ICONS.get(finding.severity, '-')} {finding.message}"
+    yield "\n[SCAN COMPLETE]"
+
+def render_text(findings):
+    return "\n".join(iter_text_lines(findings))
+
+def iter_jsonl_lines(findings):
+    for finding in findings:
+        yield json.dumps(finding._asdict(), ensure_ascii=False) + "\n"
+
+def render_jsonl(findings):
+    return "".join(iter_jsonl_lines(findings))
+
+def render_csv(findings):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_FIELDS)
+    for finding in findings:
+        writer.writerow(["" if value is None else value for value in finding])
+    return buf.getvalue()
+
+RENDERERS = {
+    "Text": (render_text, "firmware_log.txt", "text/plain"),
+    "JSON lines": (render_jsonl, "firmware_findings.jsonl", "application/x-ndjson"),
+    "CSV": (render_csv, "firmware_findings.csv", "text/csv"),
+}
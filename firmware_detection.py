@@ -1,6 +1,19 @@
 # firmware_gui_streamlit.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 import streamlit as st
 
+from detection import files as DEMO_IMAGES
+from findings import (
+    RENDERERS, SEVERITY_CRITICAL, SEVERITY_INFO, SEVERITY_WARNING, Finding, render_text,
+)
+from guid_allowlist import GuidAllowlist
+from signatures import SignatureAutomaton, get_default_automaton, load_signature_db
+from uefi_parser import FirmwareImage
+
 # --------------------------- Simulated Data ---------------------------
 
 KNOWN_GOOD_GUIDS = {
@@ -27,76 +40,295 @@ UEFI_VARS = {
 SPI_FLASH_HASH = "abcd1234"
 GOLDEN_IMAGE_HASH = "abcd5678"
 
+# Vendor catalog allowlist built with guid_allowlist.py; KNOWN_GOOD_GUIDS is used if absent.
+GUID_ALLOWLIST_PATH = os.environ.get("SECURE_RETAIL_GUID_ALLOWLIST", "known_good_guids.allowlist")
+_guid_allowlist = None
+
+def get_guid_allowlist():
+    """Returns the known-good GUID allowlist, mapping it from disk on first use."""
+    global _guid_allowlist
+    if _guid_allowlist is None:
+        if os.path.isfile(GUID_ALLOWLIST_PATH):
+            _guid_allowlist = GuidAllowlist.load(GUID_ALLOWLIST_PATH)
+        else:
+            _guid_allowlist = GuidAllowlist.from_guids(KNOWN_GOOD_GUIDS)
+    return _guid_allowlist
+
+# --------------------------- Image Parsing ---------------------------
+
+IMPLANT_STATUS_PREFIX = "implant_detected:"
+
+def classify_dxe_driver(body, automaton=None):
+    """Returns "clean", or IMPLANT_STATUS_PREFIX plus every matched signature family
+    (comma-separated, in match order), e.g. ``"implant_detected:LoJax"``."""
+    automaton = automaton or get_default_automaton()
+    families = dict.fromkeys(match.family for match in automaton.scan(body))
+    return IMPLANT_STATUS_PREFIX + ",".join(families) if families else "clean"
+
+def load_firmware_image(path, automaton=None):
+    """Parses a firmware image and returns ({module GUID: offset}, [(DXE driver, offset, status)]).
+
+    Every driver body is classified, including drivers that share a UI name.
+    """
+    with FirmwareImage.open(path) as image:
+        return _image_modules(image, automaton)
+
+def _image_modules(image, automaton):
+    guids = {}
+    for ffs in image.files():
+        guids.setdefault(ffs.guid, ffs.offset)
+    payloads = [(ffs.name or ffs.guid, ffs.offset, classify_dxe_driver(ffs.body, automaton))
+                for ffs in image.dxe_drivers()]
+    return guids, payloads
+
 # --------------------------- Detection Logic ---------------------------
 
-def baseline_checker():
-    log = ["[GUID CHECK]"]
-    for guid in FOUND_GUIDS:
-        if guid in KNOWN_GOOD_GUIDS:
-            log.append(f"✔ GUID {guid} is safe.")
+def baseline_checker(guids=None, allowlist=None):
+    """Yields a finding per module GUID; ``guids`` may map each GUID to its image offset."""
+    allowlist = allowlist or get_guid_allowlist()
+    guids = FOUND_GUIDS if guids is None else guids
+    offsets = guids if isinstance(guids, dict) else {}
+    for guid in guids:
+        if guid in allowlist:
+            yield Finding("GUID CHECK", SEVERITY_INFO, guid, offsets.get(guid), f"GUID {guid} is safe.")
         else:
-            log.append(f"⚠ Unknown GUID {guid} found! Possible injected driver.")
-    return log
+            yield Finding("GUID CHECK", SEVERITY_WARNING, guid, offsets.get(guid),
+                          f"Unknown GUID {guid} found! Possible injected driver.")
 
-def dxe_payload_scanner():
-    log = ["\n[DXE PAYLOAD SCAN]"]
-    for fname, status in DXE_PAYLOADS.items():
+def dxe_payload_scanner(payloads=None):
+    """Yields a finding per DXE driver; ``payloads`` is ``{name: status}`` or ``[(name, offset, status)]``.
+
+    Any status other than "clean" is critical, including ones this scanner does not know.
+    """
+    payloads = DXE_PAYLOADS if payloads is None else payloads
+    if isinstance(payloads, dict):
+        payloads = [(fname, None, status) for fname, status in payloads.items()]
+    for fname, offset, status in payloads:
         if status == "clean":
-            log.append(f"✔ {fname}: clean.")
+            yield Finding("DXE PAYLOAD SCAN", SEVERITY_INFO, fname, offset, f"{fname}: clean.")
         elif status == "moonbounce_behavior_detected":
-            log.append(f"❗ {fname}: matches MoonBounce malware behavior!")
-    return log
+            yield Finding("DXE PAYLOAD SCAN", SEVERITY_CRITICAL, fname, offset,
+                          f"{fname}: matches MoonBounce malware behavior!")
+        elif status.startswith(IMPLANT_STATUS_PREFIX):
+            families = status[len(IMPLANT_STATUS_PREFIX):].replace(",", ", ")
+            yield Finding("DXE PAYLOAD SCAN", SEVERITY_CRITICAL, fname, offset,
+                          f"{fname}: matches {families} implant signatures!")
+        else:
+            yield Finding("DXE PAYLOAD SCAN", SEVERITY_CRITICAL, fname, offset,
+                          f"{fname}: unrecognized status {status!r}; treating the driver as compromised.")
 
 def nvram_variable_checker():
-    log = ["\n[UEFI VARIABLE SCAN]"]
     for var, val in UEFI_VARS.items():
         if var.lower() == "lojaxvar":
-            log.append(f"❗ UEFI var '{var}' indicates LoJax-style persistence!")
+            yield Finding("UEFI VARIABLE SCAN", SEVERITY_CRITICAL, var, None,
+                          f"UEFI var '{var}' indicates LoJax-style persistence!")
         else:
-            log.append(f"✔ UEFI var '{var}': normal.")
-    return log
+            yield Finding("UEFI VARIABLE SCAN", SEVERITY_INFO, var, None, f"UEFI var '{var}': normal.")
 
 def spi_flash_integrity_check():
-    log = ["\n[SPI FLASH INTEGRITY]"]
     if SPI_FLASH_HASH != GOLDEN_IMAGE_HASH:
-        log.append("❗ Firmware hash mismatch detected! Flash may be tampered.")
+        yield Finding("SPI FLASH INTEGRITY", SEVERITY_CRITICAL, "SPI flash", None,
+                      "Firmware hash mismatch detected! Flash may be tampered.")
     else:
-        log.append("✔ SPI flash hash matches expected baseline.")
-    return log
-
-def run_full_scan():
-    log = []
-    log += baseline_checker()
-    log += dxe_payload_scanner()
-    log += nvram_variable_checker()
-    log += spi_flash_integrity_check()
-    log.append("\n[SCAN COMPLETE]")
-    return "\n".join(log)
+        yield Finding("SPI FLASH INTEGRITY", SEVERITY_INFO, "SPI flash", None,
+                      "SPI flash hash matches expected baseline.")
+
+def signature_scanner(targets=None, automaton=None):
+    """Streams each image once through the implant signature automaton."""
+    automaton = automaton or get_default_automaton()
+    if targets is None:
+        targets = [filename for filename, _ in DEMO_IMAGES]
+    for path in targets:
+        if not os.path.isfile(path):
+            yield Finding("SIGNATURE SCAN", SEVERITY_WARNING, path, None, f"{path}: image not found, skipped.")
+            continue
+        matches = automaton.scan_file(path)
+        if not matches:
+            yield Finding("SIGNATURE SCAN", SEVERITY_INFO, path, None, f"{path}: no implant signatures matched.")
+        for match in matches:
+            yield Finding("SIGNATURE SCAN", SEVERITY_CRITICAL, path, match.offset,
+                          f"{path}: {match.name} ({match.family}) at offset 0x{match.offset:08x}")
+
+CHECK_ORDER = ["GUID CHECK", "DXE PAYLOAD SCAN", "UEFI VARIABLE SCAN", "SPI FLASH INTEGRITY", "SIGNATURE SCAN"]
+EXECUTORS = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+
+def _automaton_for(signature_db):
+    return SignatureAutomaton(load_signature_db(signature_db)) if signature_db else None
+
+def _timed(func, *args):
+    # Module-level so it can be shipped to a process pool; materializes the generator there.
+    start = time.perf_counter()
+    result = func(*args)
+    if not isinstance(result, tuple):
+        result = list(result)
+    return result, time.perf_counter() - start
+
+def _parse_image(image_path, signature_db):
+    # Also counts volumes, so an image the parser could not read is not reported as clean.
+    with FirmwareImage.open(image_path) as image:
+        return _image_modules(image, _automaton_for(signature_db)) + (len(image.volumes),)
+
+def _scan_signatures(targets, signature_db):
+    return signature_scanner(targets, _automaton_for(signature_db))
+
+def _timing_finding(check, elapsed):
+    return Finding("SCAN TIMING", SEVERITY_INFO, check, None, f"{check}: {elapsed * 1000:.1f} ms")
+
+def _timeout_finding(check, timeout):
+    return Finding(check, SEVERITY_WARNING, check, None, f"{check} did not finish within {timeout:g}s; skipped.")
+
+def _no_volumes_finding(image_path):
+    return Finding("IMAGE PARSE", SEVERITY_WARNING, image_path, None,
+                   f"{image_path}: no firmware volumes parsed; GUID and DXE checks had nothing to inspect.")
+
+def iter_findings(image_path=None, signature_db=None, executor="thread", timeout=None):
+    """Runs every check and yields findings in CHECK_ORDER, followed by per-check wall times.
+
+    GUID, DXE and signature checks use ``image_path`` when given. ``executor`` is
+    ``"thread"``, ``"process"`` or ``"serial"``; with a pool, independent checks run
+    concurrently and image parsing overlaps the signature scan. ``timeout`` bounds each
+    check's wall time in seconds; a check that overruns is reported and skipped. An image
+    in which no firmware volume could be parsed gets an IMAGE PARSE warning.
+    """
+    targets = [image_path] if image_path else None
+    timings = []
+    if executor == "serial":
+        guids = payloads = None
+        if image_path:
+            (guids, payloads, volumes), elapsed = _timed(_parse_image, image_path, signature_db)
+            timings.append(_timing_finding("IMAGE PARSE", elapsed))
+            if not volumes:
+                yield _no_volumes_finding(image_path)
+        stages = [
+            ("GUID CHECK", baseline_checker, (guids,)),
+            ("DXE PAYLOAD SCAN", dxe_payload_scanner, (payloads,)),
+            ("UEFI VARIABLE SCAN", nvram_variable_checker, ()),
+            ("SPI FLASH INTEGRITY", spi_flash_integrity_check, ()),
+            ("SIGNATURE SCAN", _scan_signatures, (targets, signature_db)),
+        ]
+        for check, func, args in stages:
+            findings, elapsed = _timed(func, *args)
+            timings.append(_timing_finding(check, elapsed))
+            yield from findings
+        yield from timings
+        return
+
+    pool = EXECUTORS[executor](max_workers=len(CHECK_ORDER))
+    try:
+        submitted = time.monotonic()
+        futures = {
+            "UEFI VARIABLE SCAN": pool.submit(_timed, nvram_variable_checker),
+            "SPI FLASH INTEGRITY": pool.submit(_timed, spi_flash_integrity_check),
+            "SIGNATURE SCAN": pool.submit(_timed, _scan_signatures, targets, signature_db),
+        }
+        deadlines = dict.fromkeys(futures, None if timeout is None else submitted + timeout)
+
+        def wait(check, future):
+            remaining = None if deadlines[check] is None else max(0.0, deadlines[check] - time.monotonic())
+            try:
+                return future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                return None
+
+        guids = payloads = None
+        if image_path:
+            deadlines["IMAGE PARSE"] = None if timeout is None else time.monotonic() + timeout
+            parsed = wait("IMAGE PARSE", pool.submit(_timed, _parse_image, image_path, signature_db))
+            if parsed is None:
+                yield _timeout_finding("IMAGE PARSE", timeout)
+                guids, payloads = {}, []
+            else:
+                (guids, payloads, volumes), elapsed = parsed
+                timings.append(_timing_finding("IMAGE PARSE", elapsed))
+                if not volumes:
+                    yield _no_volumes_finding(image_path)
+        dependent_start = time.monotonic()
+        futures["GUID CHECK"] = pool.submit(_timed, baseline_checker, guids)
+        futures["DXE PAYLOAD SCAN"] = pool.submit(_timed, dxe_payload_scanner, payloads)
+        for check in ("GUID CHECK", "DXE PAYLOAD SCAN"):
+            deadlines[check] = None if timeout is None else dependent_start + timeout
+
+        for check in CHECK_ORDER:
+            result = wait(check, futures[check])
+            if result is None:
+                yield _timeout_finding(check, timeout)
+                continue
+            findings, elapsed = result
+            timings.append(_timing_finding(check, elapsed))
+            yield from findings
+        yield from timings
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def run_full_scan(image_path=None, signature_db=None, executor="thread", timeout=None):
+    """Returns the scan as the classic text log."""
+    return render_text(iter_findings(image_path, signature_db, executor, timeout))
 
 # --------------------------- Streamlit UI ---------------------------
 
+FINDINGS_PAGE_SIZES = [25, 100, 500]
+LIVE_PREVIEW_LINES = 20
+
 def firmware_scan_ui():
     st.header("🔍 Firmware Sentinel - UEFI Malware Detection")
 
     # Initialize session state variable if not already
-    if "firmware_log" not in st.session_state:
-        st.session_state.firmware_log = ""
+    if "firmware_findings" not in st.session_state:
+        st.session_state.firmware_findings = []
 
-    # Run scan when button is clicked
+    image_path = st.text_input(
+        "Firmware image to parse (optional)",
+        "",
+        help="Path to a UEFI/SPI flash dump. Leave empty to scan the simulated modules."
+    )
+    with st.expander("Scan settings"):
+        executor = st.selectbox("Run checks on", ["thread", "process", "serial"], key="firmware_executor")
+        timeout = st.number_input("Per-check timeout (seconds, 0 = none)", min_value=0.0, value=0.0, step=5.0,
+                                  key="firmware_timeout")
+
+    # Run scan when button is clicked, showing findings as each check produces them
     if st.button("🔍 Run Firmware Scan"):
+        findings = []
+        live = st.empty()
         with st.spinner("Scanning..."):
-            st.session_state.firmware_log = run_full_scan()
-            st.success("Scan complete!")
-
-    # Display log and download only if scan has been run
-    if st.session_state.firmware_log:
-        st.code(st.session_state.firmware_log)
-        st.download_button(
-            label="📁 Download Log",
-            data=st.session_state.firmware_log,
-            file_name="firmware_log.txt",
-            mime="text/plain"
-        )
+            try:
+                for finding in iter_findings(image_path.strip() or None, executor=executor, timeout=timeout or None):
+                    findings.append(finding)
+                    if finding.severity != SEVERITY_INFO or len(findings) % LIVE_PREVIEW_LINES == 0:
+                        live.code("\n".join(f.message for f in findings[-LIVE_PREVIEW_LINES:]))
+                live.empty()
+                st.session_state.firmware_findings = findings
+                st.success("Scan complete!")
+            except OSError as e:
+                st.error(f"Could not read firmware image: {e}")
+
+    # Display paginated findings and export only if a scan has been run
+    findings = st.session_state.firmware_findings
+    if findings:
+        severities = [SEVERITY_CRITICAL, SEVERITY_WARNING, SEVERITY_INFO]
+        cols = st.columns(len(severities))
+        for col, severity in zip(cols, severities):
+            col.metric(severity.title(), sum(1 for f in findings if f.severity == severity))
+
+        shown = st.multiselect("Severity", severities, default=severities, key="firmware_severity_filter")
+        filtered = [f for f in findings if f.severity in shown]
+        page_size = st.selectbox("Findings per page", FINDINGS_PAGE_SIZES, key="firmware_page_size")
+        pages = max(1, -(-len(filtered) // page_size))
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="firmware_page")
+        page_items = filtered[(page - 1) * page_size:page * page_size]
+        st.dataframe([f._asdict() for f in page_items], use_container_width=True)
+
+        # Render the export only on request so reruns don't re-send the whole log
+        export_format = st.selectbox("Export format", list(RENDERERS), key="firmware_export_format")
+        if st.button("Prepare Download", key="firmware_prepare_download"):
+            render, file_name, mime = RENDERERS[export_format]
+            st.download_button(
+                label="📁 Download Log",
+                data=render(findings),
+                file_name=file_name,
+                mime=mime
+            )
 
 # Call the UI function to display the Streamlit application
 if __name__ == "__main__":
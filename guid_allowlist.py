@@ -0,0 +1,219 @@
+# guid_allowlist.py
+"""Compact known-good GUID allowlist: sorted 16-byte keys behind a Bloom filter.
+
+The on-disk layout is a small header, the Bloom filter bit array and the sorted keys,
+so ``GuidAllowlist.load`` only has to ``mmap`` the file; nothing is parsed up front.
+"""
+import bisect
+import heapq
+import mmap
+import os
+import struct
+import uuid
+
+KEY_SIZE = 16
+BITS_PER_KEY = 10
+# Every FENCE_STRIDE-th key is kept in memory so a lookup bisects the fences in C and
+# then searches a single 4 KB run of keys.
+FENCE_STRIDE = 256
+_HEADER = struct.Struct("<4sHBxQQ")  # magic, version, hash count, key count, bloom bits
+_MAGIC = b"SRGA"
+_VERSION = 1
+
+def guid_key(guid):
+    """Returns the 16-byte key for a GUID string, UUID or raw 16-byte value."""
+    if isinstance(guid, (bytes, bytearray, memoryview)):
+        if len(guid) != KEY_SIZE:
+            raise ValueError(f"GUID keys are {KEY_SIZE} bytes, got {len(guid)}")
+        return bytes(guid)
+    if isinstance(guid, uuid.UUID):
+        return guid.bytes
+    key = bytes.fromhex(guid.strip().strip("{}").replace("-", ""))
+    if len(key) != KEY_SIZE:
+        raise ValueError(f"Malformed GUID {guid!r}")
+    return key
+
+_KEY_HALVES = struct.Struct("<QQ")
+_MASK64 = (1 << 64) - 1
+
+def _fmix64(k):
+    k ^= k >> 33
+    k = (k * 0xFF51AFD7ED558CCD) & _MASK64
+    k ^= k >> 33
+    k = (k * 0xC4CEB9FE1A85EC53) & _MASK64
+    return k ^ (k >> 33)
+
+def _bloom_hashes(key):
+    # MurmurHash3's 64-bit finalizer over the two key halves: far cheaper than a
+    # cryptographic hash and still spreads sequential vendor GUIDs evenly.
+    lo, hi = _KEY_HALVES.unpack(key)
+    h1 = _fmix64(lo ^ _fmix64(hi))
+    h2 = _fmix64(h1 ^ hi ^ 0x9E3779B97F4A7C15)
+    return h1, h2 | 1
+
+def _bloom_positions(key, hash_count, bits):
+    h1, h2 = _bloom_hashes(key)
+    return [(h1 + i * h2) % bits for i in range(hash_count)]
+
+def _bloom_params(count):
+    bits = max(64, count * BITS_PER_KEY)
+    bits = (bits + 7) & ~7
+    return 7, bits
+
+def _build_bloom(keys, hash_count, bits):
+    bloom = bytearray(bits // 8)
+    for key in keys:
+        for pos in _bloom_positions(key, hash_count, bits):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+    return bloom
+
+class GuidAllowlist:
+    """Membership test for known-good module GUIDs.
+
+    Negative lookups usually stop at the Bloom filter; positives are confirmed against
+    the sorted key array through a sparse fence index.
+    """
+
+    def __init__(self, keys, bloom, hash_count, count, mm=None):
+        self._keys = keys
+        self._bloom = bloom
+        self._hash_count = hash_count
+        self._bits = len(bloom) * 8
+        self._count = count
+        self._mm = mm
+        stride = FENCE_STRIDE * KEY_SIZE
+        self._fences = [bytes(keys[i:i + KEY_SIZE]) for i in range(0, count * KEY_SIZE, stride)]
+
+    @classmethod
+    def from_guids(cls, guids):
+        keys = sorted({guid_key(guid) for guid in guids})
+        return cls._from_sorted_keys(keys)
+
+    @classmethod
+    def _from_sorted_keys(cls, keys):
+        hash_count, bits = _bloom_params(len(keys))
+        bloom = _build_bloom(keys, hash_count, bits)
+        return cls(b"".join(keys), bytes(bloom), hash_count, len(keys))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, hash_count, count, bits = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            mm.close()
+            raise ValueError(f"{path} is not a GUID allowlist file")
+        bloom_start = _HEADER.size
+        keys_start = bloom_start + bits // 8
+        if len(mm) != keys_start + count * KEY_SIZE:
+            mm.close()
+            raise ValueError(f"{path} is truncated")
+        view = memoryview(mm)
+        return cls(view[keys_start:], view[bloom_start:keys_start], hash_count, count, mm)
+
+    def save(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self._hash_count, self._count, self._bits))
+            f.write(self._bloom)
+            f.write(self._keys)
+        os.replace(tmp_path, path)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, guid):
+        try:
+            key = guid_key(guid)
+        except ValueError:
+            return False
+        return self._bloom_check(key) and self._search(key)
+
+    def might_contain(self, guid):
+        """Bloom-filter-only test: False is definite, True may be a false positive."""
+        return self._bloom_check(guid_key(guid))
+
+    def _bloom_check(self, key):
+        bloom = self._bloom
+        bits = self._bits
+        h1, h2 = _bloom_hashes(key)
+        for i in range(self._hash_count):
+            pos = (h1 + i * h2) % bits
+            if not bloom[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _search(self, key):
+        block = bisect.bisect_right(self._fences, key) - 1
+        if block < 0:
+            return False
+        start = block * FENCE_STRIDE * KEY_SIZE
+        run = bytes(self._keys[start:start + FENCE_STRIDE * KEY_SIZE])
+        pos = run.find(key)
+        while pos > 0 and pos % KEY_SIZE:
+            pos = run.find(key, pos + 1)
+        return pos >= 0 and pos % KEY_SIZE == 0
+
+    def iter_keys(self):
+        keys = self._keys
+        for i in range(self._count):
+            yield bytes(keys[i * KEY_SIZE:(i + 1) * KEY_SIZE])
+
+    def updated(self, added=(), removed=()):
+        """Returns a new allowlist with ``added`` merged in and ``removed`` dropped."""
+        removed = {guid_key(guid) for guid in removed}
+        added = sorted({guid_key(guid) for guid in added})
+        keys = []
+        for key in heapq.merge(self.iter_keys(), added):
+            if key in removed or (keys and keys[-1] == key):
+                continue
+            keys.append(key)
+        return self._from_sorted_keys(keys)
+
+    def update_from_catalog(self, path):
+        """Applies a vendor catalog file and returns the updated allowlist.
+
+        Catalog lines are ``GUID`` (or ``+GUID``) to add and ``-GUID`` to remove; anything
+        after the first comma is ignored so CSV exports work unchanged.
+        """
+        added, removed = [], []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = line.split(",", 1)[0].strip()
+                if not entry or entry.startswith("#"):
+                    continue
+                if entry[0] == "-":
+                    removed.append(entry[1:])
+                else:
+                    added.append(entry.lstrip("+"))
+        return self.updated(added, removed)
+
+    def close(self):
+        if self._mm is not None:
+            self._keys = self._bloom = b""
+            self._fences = []
+            self._count = 0
+            try:
+                self._mm.close()
+            except BufferError:
+                pass
+            self._mm = None
+
+def apply_catalog(catalog_path, allowlist_path):
+    """Merges a vendor catalog into the allowlist file at ``allowlist_path`` (created if missing)."""
+    if os.path.isfile(allowlist_path):
+        current = GuidAllowlist.load(allowlist_path)
+    else:
+        current = GuidAllowlist.from_guids(())
+    updated = current.update_from_catalog(catalog_path)
+    current.close()
+    updated.save(allowlist_path)
+    return updated
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) not in (2, 3):
+        sys.exit("usage: python guid_allowlist.py CATALOG [ALLOWLIST]")
+    target = sys.argv[2] if len(sys.argv) == 3 else "known_good_guids.allowlist"
+    print(f"✅ {target}: {len(apply_catalog(sys.argv[1], target))} known-good GUIDs.")
@@ -0,0 +1,143 @@
+# hash_cache.py
+"""Persistent firmware hash cache keyed on each file's stat signature."""
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get("SECURE_RETAIL_HASH_CACHE", ".firmware_hash_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 50000
+# Digests older than this are re-hashed even if the stat signature still matches (0 disables).
+DEFAULT_MAX_AGE = float(os.environ.get("SECURE_RETAIL_HASH_MAX_AGE", 24 * 3600))
+_SCHEMA_VERSION = 2  # 2: ctime_ns in the signature, verified_at per entry
+
+def stat_signature(path):
+    """Returns (size, mtime_ns, ctime_ns, inode) for a file, or None if it does not exist.
+
+    mtime can be set back with ``os.utime``/``touch -r``; ctime cannot be set from user
+    space and changes on every write, so a same-size rewrite always misses.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino)
+
+class HashCache:
+    """SQLite-backed digest cache with LRU eviction.
+
+    An entry is only served while the file's (size, mtime, ctime, inode) signature is
+    unchanged and it was hashed less than ``max_age`` seconds ago, so a re-scan of an
+    untouched fleet costs one ``stat`` and one indexed lookup per image, and every image
+    is still fully re-hashed at least once per ``max_age``. Hit timestamps are buffered
+    and written with the next ``put``/``flush``.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            # Entries from an older signature format cannot be trusted; start over.
+            self._conn.execute("DROP TABLE IF EXISTS hashes")
+            self._conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " path TEXT NOT NULL, algo TEXT NOT NULL,"
+            " size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, ctime_ns INTEGER NOT NULL, inode INTEGER NOT NULL,"
+            " digest TEXT NOT NULL, verified_at REAL NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (path, algo))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used)")
+        self._conn.commit()
+
+    def get(self, path, algo, signature=None):
+        """Returns the cached digest for ``path`` if its stat signature still matches and it is fresh."""
+        path = os.path.abspath(path)
+        signature = signature or stat_signature(path)
+        if signature is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, ctime_ns, inode, digest, verified_at FROM hashes WHERE path = ? AND algo = ?",
+                (path, algo),
+            ).fetchone()
+            now = time.time()
+            if row is None or tuple(row[:4]) != signature:
+                return None
+            if self.max_age and now - row[5] > self.max_age:
+                return None
+            self._touched[(path, algo)] = now
+            return row[4]
+
+    def put(self, path, algo, digest, signature=None):
+        """Stores a digest against the file's current stat signature and evicts LRU entries."""
+        path = os.path.abspath(path)
+        signature = signature or stat_signature(path)
+        if signature is None:
+            return
+        with self._lock:
+            self._touched.pop((path, algo), None)
+            now = time.time()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, algo, *signature, digest, now, now),
+            )
+            self._flush_touched()
+            self._evict()
+            self._conn.commit()
+
+    def invalidate(self, path):
+        """Drops every cached digest for ``path``, e.g. after it has been rewritten."""
+        path = os.path.abspath(path)
+        with self._lock:
+            for key in [key for key in self._touched if key[0] == path]:
+                del self._touched[key]
+            self._conn.execute("DELETE FROM hashes WHERE path = ?", (path,))
+            self._conn.commit()
+
+    def flush(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE hashes SET last_used = ? WHERE path = ? AND algo = ?",
+                [(used, path, algo) for (path, algo), used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        excess = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM hashes WHERE rowid IN (SELECT rowid FROM hashes ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_hash_cache():
+    """Returns the process-wide cache, opening it on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HashCache()
+        return _default_cache
@@ -0,0 +1,339 @@
+# honeypot_listener.py
+"""Asyncio honeypot that listens on real TCP ports with fake SSH, HTTP and Telnet banners.
+
+Every connection and credential attempt goes into a HoneypotStore, the same store the
+dashboard's honeypot tab reads. Run it inside the dashboard process by setting
+SECURE_RETAIL_HONEYPOT_PORTS (e.g. ``ssh=2222,http=8080,telnet=2323``), or standalone:
+
+    python honeypot_listener.py --ports ssh=2222,http=8080,telnet=2323
+    python honeypot_listener.py --load-test 10000 --target 127.0.0.1:2323
+"""
+import argparse
+import asyncio
+import base64
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qs
+
+from honeypot_store import HoneypotStore, capture
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_READ_TIMEOUT = 15.0  # seconds a connection may sit idle between lines
+DEFAULT_SESSION_TIMEOUT = 60.0  # hard cap on a connection's lifetime
+DEFAULT_MAX_CONNECTIONS = 20000
+MAX_LINE = 1024  # longest line buffered from a client; bounds per-connection memory
+MAX_HEADERS = 32
+MAX_BODY = 4096
+TELNET_ATTEMPTS = 3
+
+SSH_BANNER = b"SSH-2.0-OpenSSH_8.9p1 Ubuntu-3ubuntu0.6\r\n"
+TELNET_BANNER = b"\r\nUbuntu 22.04.4 LTS\r\nretail-pos-admin login: "
+HTTP_LOGIN_PAGE = (
+    b"<html><head><title>Retail POS Admin</title></head><body><h1>Store Admin Console</h1>"
+    b"<form method='post' action='/login'><input name='username'><input name='password' type='password'>"
+    b"<button>Sign in</button></form></body></html>"
+)
+
+def parse_ports(spec):
+    """Parses ``ssh=2222,http=8080`` into ``{"ssh": 2222, "http": 8080}``."""
+    ports = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        service, _, port = item.partition("=")
+        service = service.strip().lower()
+        if service not in SERVICES:
+            raise ValueError(f"Unknown honeypot service {service!r}; choose from {', '.join(SERVICES)}")
+        ports[service] = int(port)
+    return ports
+
+async def _read_line(reader, timeout):
+    """Reads one line (at most MAX_LINE bytes); returns None on EOF, timeout or overlong input."""
+    try:
+        line = await asyncio.wait_for(reader.readuntil(b"\n"), timeout)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+        return None
+    return line.rstrip(b"\r\n")
+
+# IAC SB ... IAC SE subnegotiation, IAC WILL/WONT/DO/DONT <option>, escaped IAC IAC, other IAC commands.
+_TELNET_COMMAND = re.compile(rb"\xff\xfa.*?(?:\xff\xf0|\Z)|\xff[\xfb-\xfe].?|(\xff)\xff|\xff.?", re.DOTALL)
+
+def _strip_telnet(raw):
+    return _TELNET_COMMAND.sub(lambda m: m.group(1) or b"", raw)
+
+def _text(raw):
+    # Telnet commands go at the byte level (0xFF and its verbs are printable in latin-1),
+    # then anything non-printable, before storing.
+    return "".join(ch for ch in _strip_telnet(raw).decode("latin-1") if ch.isprintable())[:MAX_LINE]
+
+async def _ssh_session(listener, reader, writer, meta):
+    writer.write(SSH_BANNER)
+    await writer.drain()
+    banner = await _read_line(reader, listener.read_timeout)
+    if banner is not None:
+        # Key exchange is encrypted, so the client's version string is all that can be captured.
+        meta["client_banner"] = _text(banner)
+
+async def _telnet_session(listener, reader, writer, meta):
+    writer.write(TELNET_BANNER)
+    await writer.drain()
+    for attempt in range(TELNET_ATTEMPTS):
+        username = await _read_line(reader, listener.read_timeout)
+        if username is None:
+            return
+        writer.write(b"Password: ")
+        await writer.drain()
+        password = await _read_line(reader, listener.read_timeout)
+        if password is None:
+            return
+        listener.record_attempt(meta, _text(username), _text(password))
+        await asyncio.sleep(listener.failure_delay)
+        writer.write(b"\r\nLogin incorrect\r\nretail-pos-admin login: ")
+        await writer.drain()
+
+async def _http_session(listener, reader, writer, meta):
+    request_line = await _read_line(reader, listener.read_timeout)
+    if not request_line:
+        return
+    meta["request"] = _text(request_line)
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = await _read_line(reader, listener.read_timeout)
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        headers[name.strip().lower().decode("latin-1")] = value.strip()
+    if "user-agent" in headers:
+        meta["user_agent"] = _text(headers["user-agent"])
+    authorization = headers.get("authorization", b"")
+    if authorization[:6].lower() == b"basic ":
+        try:
+            username, _, password = base64.b64decode(authorization[6:], validate=True).decode("latin-1").partition(":")
+        except ValueError:
+            pass
+        else:
+            listener.record_attempt(meta, username[:MAX_LINE], password[:MAX_LINE])
+    raw_length = headers.get("content-length", b"0")
+    try:
+        length = int(raw_length)
+    except ValueError:
+        length = -1
+    if length < 0:
+        # Scanners probe parsers with junk and negative lengths; keep it as evidence and read no body.
+        meta["malformed"] = f"Content-Length: {_text(raw_length)}"
+    length = max(0, min(length, MAX_BODY))
+    if length and meta["request"].upper().startswith("POST"):
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), listener.read_timeout)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            body = b""
+        form = parse_qs(body.decode("latin-1"))
+        if "username" in form or "password" in form:
+            listener.record_attempt(meta, form.get("username", [""])[0][:MAX_LINE],
+                                    form.get("password", [""])[0][:MAX_LINE])
+    await asyncio.sleep(listener.failure_delay)
+    writer.write(
+        b"HTTP/1.1 401 Unauthorized\r\nServer: nginx/1.18.0 (Ubuntu)\r\n"
+        b"WWW-Authenticate: Basic realm=\"Retail POS Admin\"\r\nContent-Type: text/html\r\n"
+        b"Connection: close\r\nContent-Length: " + str(len(HTTP_LOGIN_PAGE)).encode() + b"\r\n\r\n" + HTTP_LOGIN_PAGE
+    )
+    await writer.drain()
+
+SERVICES = {"ssh": _ssh_session, "http": _http_session, "telnet": _telnet_session}
+
+class HoneypotListener:
+    """Serves the fake services on ``ports`` (``{"telnet": 2323, ...}``) and records into ``store``.
+
+    Memory per connection is bounded by the StreamReader limit (MAX_LINE) and the small
+    metadata dict; beyond ``max_connections`` new connections are closed immediately and
+    counted as rejected. Idle reads time out after ``read_timeout`` seconds and no
+    connection lives longer than ``session_timeout``.
+    """
+
+    def __init__(self, store, ports, host=DEFAULT_HOST, read_timeout=DEFAULT_READ_TIMEOUT,
+                 session_timeout=DEFAULT_SESSION_TIMEOUT, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 failure_delay=0.5):
+        self.store = store
+        self.ports = dict(ports)
+        self.host = host
+        self.read_timeout = read_timeout
+        self.session_timeout = session_timeout
+        self.max_connections = max_connections
+        self.failure_delay = failure_delay
+        self.active = 0
+        self.connections = 0
+        self.attempts = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._servers = []
+        self._loop = None
+        self._stopped = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        for service, port in self.ports.items():
+            server = await asyncio.start_server(
+                lambda r, w, service=service: self._handle(service, r, w),
+                self.host, port, limit=MAX_LINE, backlog=4096,
+            )
+            if not port:  # port 0: report the one the OS picked
+                self.ports[service] = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+
+    async def serve_forever(self):
+        if not self._servers:
+            await self.start()
+        await self._stopped.wait()
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers = []
+
+    def stop(self):
+        """Stops serving; safe to call from any thread."""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def start_in_thread(self):
+        """Runs the listener on its own event loop thread; returns once the ports are bound."""
+        ready = threading.Event()
+        errors = []
+
+        async def main():
+            try:
+                await self.start()
+            except OSError as exc:
+                errors.append(exc)
+                return
+            finally:
+                ready.set()
+            await self.serve_forever()
+
+        threading.Thread(target=asyncio.run, args=(main(),), name="honeypot-listener", daemon=True).start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    async def _handle(self, service, reader, writer):
+        peer = writer.get_extra_info("peername") or ("unknown", 0)
+        if self.active >= self.max_connections:
+            self.rejected += 1
+            writer.transport.abort()
+            return
+        self.active += 1
+        self.connections += 1
+        started = time.monotonic()
+        meta = {"service": service, "source_ip": peer[0], "source_port": peer[1], "dest_port": self.ports[service]}
+        outcome = "closed"
+        try:
+            await asyncio.wait_for(SERVICES[service](self, reader, writer, meta), self.session_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            outcome = "session timeout"
+        except (ConnectionError, OSError):
+            outcome = "reset"
+        finally:
+            self.active -= 1
+            if outcome == "closed":
+                writer.close()
+            else:
+                writer.transport.abort()
+            self.store.record(capture(None, source_ip=meta.pop("source_ip"), service=meta.pop("service"),
+                                      event="connection", outcome=outcome,
+                                      duration_s=round(time.monotonic() - started, 3), **meta))
+
+    def record_attempt(self, meta, username, password):
+        self.attempts += 1
+        self.store.record(capture(username, password, source_ip=meta["source_ip"], service=meta["service"],
+                                  event="login", source_port=meta["source_port"], dest_port=meta["dest_port"]))
+
+    def stats(self):
+        return {"ports": dict(self.ports), "active": self.active, "connections": self.connections,
+                "attempts": self.attempts, "rejected": self.rejected, "timed_out": self.timed_out}
+
+# ------------------------------------------------------------------ load generator
+
+def _raise_fd_limit():
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+async def load_test(host, port, connections=10000, hold=2.0, login_every=2, connect_concurrency=500):
+    """Opens ``connections`` Telnet sessions at once; every ``login_every``-th one tries a login
+    and the rest sit idle for ``hold`` seconds. Returns connection counts and timings."""
+    _raise_fd_limit()
+    gate = asyncio.Semaphore(connect_concurrency)
+    opened = []
+    results = {"connected": 0, "failed": 0, "logins": 0}
+    connect_times = []
+
+    async def client(index):
+        async with gate:
+            start = time.perf_counter()
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), 30)
+            except (OSError, asyncio.TimeoutError):
+                results["failed"] += 1
+                return
+            connect_times.append(time.perf_counter() - start)
+        results["connected"] += 1
+        opened.append(writer)
+        try:
+            if index % login_every == 0:
+                await reader.readuntil(b"login: ")
+                writer.write(f"loadtest{index}\r\n".encode())
+                await reader.readuntil(b"Password: ")
+                writer.write(b"hunter2\r\n")
+                await writer.drain()
+                results["logins"] += 1
+            await asyncio.sleep(hold)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(connections)))
+    connect_times.sort()
+    return dict(results, requested=connections, elapsed_s=round(time.perf_counter() - start, 2),
+                p99_connect_ms=round(connect_times[int(len(connect_times) * 0.99)] * 1000, 2) if connect_times else None)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--ports", default="ssh=2222,http=8080,telnet=2323", help="service=port list")
+    parser.add_argument("--store", default=None, help="capture directory (default: the dashboard's)")
+    parser.add_argument("--load-test", type=int, metavar="N", help="open N connections against --target and exit")
+    parser.add_argument("--target", default="127.0.0.1:2323", help="host:port of a Telnet honeypot for --load-test")
+    parser.add_argument("--hold", type=float, default=2.0, help="seconds each load-test connection stays open")
+    args = parser.parse_args(argv)
+
+    if args.load_test:
+        host, _, port = args.target.rpartition(":")
+        print(json.dumps(asyncio.run(load_test(host, int(port), args.load_test, hold=args.hold)), indent=2))
+        return
+    _raise_fd_limit()
+    store = HoneypotStore(args.store) if args.store else HoneypotStore()
+    listener = HoneypotListener(store, parse_ports(args.ports), host=args.host)
+
+    async def run():
+        await listener.start()
+        print(f"Honeypot listening on {args.host}: {listener.ports}", flush=True)
+        await listener.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+        print(json.dumps(listener.stats()))
+
+if __name__ == "__main__":
+    main()
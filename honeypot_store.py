@@ -0,0 +1,242 @@
+# honeypot_store.py
+"""Append-only JSON-lines honeypot capture store with batched fsync, size-based rotation and
+in-memory indexes by source IP and username."""
+import ast
+import datetime
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+
+DEFAULT_DIRECTORY = os.environ.get("SECURE_RETAIL_HONEYPOT_DIR", "honeypot_captures")
+CAPTURE_FILE = "captures.jsonl"
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds between batched write + fsync
+DEFAULT_MAX_BUFFERED = 1000  # records buffered before a flush is forced
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def capture(username, password=None, source_ip=None, service="admin-form", **extra):
+    """Builds a capture record; the attempted password is kept only as a hash and length."""
+    record = {
+        "timestamp": datetime.datetime.now().strftime(TIMESTAMP_FORMAT),
+        "service": service,
+        "source_ip": source_ip,
+        "username": username,
+    }
+    if password is not None:
+        record["password_sha256"] = hashlib.sha256(password.encode("utf-8", "surrogateescape")).hexdigest()
+        record["password_length"] = len(password)
+    record.update(extra)
+    return record
+
+class HoneypotStore:
+    """Captures go to ``captures.jsonl`` in ``directory``; older data rotates to
+    ``captures.jsonl.1`` .. ``.<backup_count>`` once the active file would exceed ``max_bytes``.
+
+    ``record`` buffers in memory and indexes immediately; a background thread writes and
+    fsyncs the buffer every ``flush_interval`` seconds (or sooner once ``max_buffered``
+    records are waiting), so a burst of attempts costs one write and one fsync. Records in
+    rotated-out files leave the indexes with them.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL, max_buffered=DEFAULT_MAX_BUFFERED, fsync=True):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, CAPTURE_FILE)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.fsync = fsync
+        self._lock = threading.RLock()  # guards the buffer, segments and indexes
+        self._write_lock = threading.Lock()  # serializes flushes and rotation
+        self._wake = threading.Event()
+        self._closed = False
+        self._buffer = []
+        self._in_flight = []  # swapped out of the buffer, being written
+        # One list of flushed records per file (oldest backup first, active file last).
+        self._segments = []
+        self._by_ip = defaultdict(list)
+        self._by_username = defaultdict(list)
+        self.records_written = 0
+        self.fsyncs = 0
+        self._load()
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._thread = threading.Thread(target=self._run, name="honeypot-flush", daemon=True)
+        self._thread.start()
+
+    # ----------------------------------------------------------------- indexes
+
+    def _load(self):
+        for n in range(self.backup_count, 0, -1):
+            self._load_file(f"{self.path}.{n}")
+        self._load_file(self.path)
+
+    def _load_file(self, path):
+        records = []
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a torn final line from a crash
+                    if isinstance(record, dict):
+                        records.append(record)
+        self._segments.append(records)  # empty for a missing backup, keeping segments aligned with files
+        for record in records:
+            self._index(record)
+
+    def _index(self, record):
+        if record.get("source_ip"):
+            self._by_ip[record["source_ip"]].append(record)
+        if record.get("username"):
+            self._by_username[record["username"]].append(record)
+
+    def _unindex(self, records):
+        dropped = {id(record) for record in records}
+        for index, key in ((self._by_ip, "source_ip"), (self._by_username, "username")):
+            for value in {record.get(key) for record in records if record.get(key)}:
+                kept = [record for record in index[value] if id(record) not in dropped]
+                if kept:
+                    index[value] = kept
+                else:
+                    del index[value]
+
+    # ------------------------------------------------------------------ writes
+
+    def record(self, record):
+        """Adds one capture dict (see ``capture``); it is queryable immediately."""
+        with self._lock:
+            if self._closed:
+                raise ValueError("HoneypotStore is closed")
+            self._buffer.append(record)
+            self._index(record)
+            if len(self._buffer) >= self.max_buffered:
+                self._wake.set()
+        return record
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes buffered captures and fsyncs once for the whole batch.
+
+        Only the buffer swap holds the index lock, so ``record`` never waits on disk I/O.
+        """
+        with self._write_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._in_flight = list(batch)  # shrinks as pieces land in segments
+            if not batch or self._file.closed:
+                return
+            pending, lines, pending_bytes = [], [], 0
+            for record in batch:
+                line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+                if self._size + pending_bytes and self._size + pending_bytes + len(line) > self.max_bytes:
+                    self._write(pending, lines)
+                    pending, lines, pending_bytes = [], [], 0
+                    self._rotate()
+                pending.append(record)
+                lines.append(line)
+                pending_bytes += len(line)
+            self._write(pending, lines)
+
+    def _write(self, records, lines):
+        if not lines:
+            return
+        data = b"".join(lines)
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+            self.fsyncs += 1
+        self._size += len(data)
+        with self._lock:
+            self._segments[-1].extend(records)
+            del self._in_flight[:len(records)]
+            self.records_written += len(records)
+
+    def _rotate(self):
+        self._file.close()
+        for n in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{n}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{n + 1}")
+        if self.backup_count:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, "ab")
+        self._size = 0
+        with self._lock:
+            self._segments.append([])
+            while len(self._segments) > self.backup_count + 1:
+                self._unindex(self._segments.pop(0))
+
+    # ----------------------------------------------------------------- queries
+
+    def by_ip(self, source_ip):
+        """All indexed attempts from ``source_ip``, oldest first."""
+        with self._lock:
+            return list(self._by_ip.get(source_ip, ()))
+
+    def by_username(self, username):
+        with self._lock:
+            return list(self._by_username.get(username, ()))
+
+    def recent(self, n=50):
+        """The newest ``n`` captures, newest first."""
+        out = []
+        with self._lock:
+            for records in (self._buffer, self._in_flight, *reversed(self._segments)):
+                for record in reversed(records):
+                    out.append(record)
+                    if len(out) >= n:
+                        return out
+        return out
+
+    def top_ips(self, n=10):
+        with self._lock:
+            counts = sorted(((len(records), ip) for ip, records in self._by_ip.items()), reverse=True)
+        return [(ip, count) for count, ip in counts[:n]]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buffer) + len(self._in_flight) + sum(len(segment) for segment in self._segments)
+
+    def import_legacy_log(self, path):
+        """Imports a ``repr``-per-line log (the old honeyport_logs.txt format); returns the count."""
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = ast.literal_eval(line.strip())
+                except (ValueError, SyntaxError):
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                record = capture(entry.get("username"), entry.get("password"), entry.get("ip_address"),
+                                 service="admin-form", imported_from=os.path.basename(path))
+                record["timestamp"] = entry.get("timestamp", record["timestamp"])
+                self.record(record)
+                count += 1
+        return count
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        with self._write_lock:
+            self._file.close()
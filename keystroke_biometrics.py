@@ -0,0 +1,180 @@
+# keystroke_biometrics.py
+"""Keystroke-dynamics features (dwell and flight times) and per-user typing profiles, vectorized with NumPy."""
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+FEATURES = ("dwell_mean", "dwell_std", "flight_mean", "flight_std", "keys_per_second")
+MIN_KEYSTROKES = 10  # fewer keys than this is not enough rhythm to judge
+MAX_FLIGHT_MS = 2000.0  # longer gaps are pauses, not typing rhythm
+ENROLL_SESSIONS = 3  # samples a profile needs before it is used for matching
+MATCH_THRESHOLD = 0.5
+MISMATCH_THRESHOLD = 0.3
+
+TypingMatch = namedtuple("TypingMatch", "status score")  # status: match/uncertain/mismatch/enrolling/insufficient
+
+def extract_features(keystrokes):
+    """Feature vector for one session of ``(down_ms, up_ms)`` pairs; all NaN if too short."""
+    return extract_features_batch([keystrokes])[0]
+
+def extract_features_batch(sessions):
+    """Returns an ``(len(sessions), len(FEATURES))`` array for a list of keystroke sessions.
+
+    Each session is a sequence of ``(down_ms, up_ms)`` timestamps, in any order. Dwell
+    is how long a key is held, flight the gap from one key's release to the next key's
+    press (negative when keys overlap). All sessions are concatenated and reduced with
+    ``np.bincount``, so the cost is a handful of array passes regardless of count.
+    Rows for sessions shorter than MIN_KEYSTROKES are NaN.
+    """
+    out = np.full((len(sessions), len(FEATURES)), np.nan)
+    lengths = np.fromiter((len(session) for session in sessions), dtype=np.int64, count=len(sessions))
+    keep = np.flatnonzero(lengths >= MIN_KEYSTROKES)
+    if not len(keep):
+        return out
+    strokes = np.concatenate([np.asarray(sessions[i], dtype=np.float64).reshape(-1, 2) for i in keep])
+    counts = lengths[keep]
+    owner = np.repeat(np.arange(len(keep)), counts)
+    strokes = strokes[np.lexsort((strokes[:, 0], owner))]  # key-down order within each session
+    down, up = strokes[:, 0], strokes[:, 1]
+
+    dwell = up - down
+    dwell_mean, dwell_std = _grouped_mean_std(owner, dwell, len(keep))
+
+    same = owner[1:] == owner[:-1]
+    flight = down[1:] - up[:-1]
+    same &= np.abs(flight) <= MAX_FLIGHT_MS
+    flight_mean, flight_std = _grouped_mean_std(owner[1:][same], flight[same], len(keep))
+
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    span = (np.maximum.reduceat(up, starts) - down[starts]) / 1000.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        keys_per_second = np.where(span > 0, counts / span, np.nan)
+
+    out[keep] = np.column_stack((dwell_mean, dwell_std, flight_mean, flight_std, keys_per_second))
+    return out
+
+def _grouped_mean_std(groups, values, n):
+    count = np.bincount(groups, minlength=n).astype(np.float64)
+    total = np.bincount(groups, weights=values, minlength=n)
+    squares = np.bincount(groups, weights=values * values, minlength=n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / count
+        std = np.sqrt(np.maximum(squares / count - mean * mean, 0.0))
+    return mean, std
+
+class TypingProfiles:
+    """Per-user running mean and variance of typing features, one NumPy row per user.
+
+    Profiles update incrementally (Welford, merged per batch with Chan's formula), so a
+    session's raw timings are never kept. ``verify`` scores a whole batch of sessions
+    against their users' profiles with one set of array operations.
+    """
+
+    def __init__(self, capacity=1024, enroll_sessions=ENROLL_SESSIONS, match_threshold=MATCH_THRESHOLD,
+                 mismatch_threshold=MISMATCH_THRESHOLD, min_relative_std=0.1):
+        self.enroll_sessions = enroll_sessions
+        self.match_threshold = match_threshold
+        self.mismatch_threshold = mismatch_threshold
+        self.min_relative_std = min_relative_std  # floor on std, relative to the mean, for steady typists
+        self._index = {}
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._mean = np.zeros((capacity, len(FEATURES)))
+        self._m2 = np.zeros((capacity, len(FEATURES)))
+        self._lock = threading.Lock()
+
+    def _rows(self, users):
+        index = self._index
+        rows = np.empty(len(users), dtype=np.int64)
+        for i, user in enumerate(users):
+            row = index.get(user)
+            if row is None:
+                row = index[user] = len(index)
+            rows[i] = row
+        if len(index) > len(self._count):
+            grow = max(len(index), 2 * len(self._count)) - len(self._count)
+            self._count = np.concatenate((self._count, np.zeros(grow, dtype=np.int64)))
+            self._mean = np.concatenate((self._mean, np.zeros((grow, len(FEATURES)))))
+            self._m2 = np.concatenate((self._m2, np.zeros((grow, len(FEATURES)))))
+        return rows
+
+    def update(self, users, features):
+        """Folds feature rows into their users' profiles; NaN rows are skipped."""
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        valid = ~np.isnan(features).any(axis=1)
+        with self._lock:
+            rows = self._rows(users)
+            self._merge(rows[valid], features[valid])
+
+    def _merge(self, rows, features):
+        if not len(rows):
+            return
+        unique, inverse = np.unique(rows, return_inverse=True)
+        n_b = np.bincount(inverse).astype(np.float64)[:, None]
+        mean_b = np.zeros((len(unique), len(FEATURES)))
+        np.add.at(mean_b, inverse, features)
+        mean_b /= n_b
+        m2_b = np.zeros_like(mean_b)
+        np.add.at(m2_b, inverse, (features - mean_b[inverse]) ** 2)
+        n_a = self._count[unique].astype(np.float64)[:, None]
+        total = n_a + n_b
+        delta = mean_b - self._mean[unique]
+        self._mean[unique] += delta * (n_b / total)
+        self._m2[unique] += m2_b + delta * delta * (n_a * n_b / total)
+        self._count[unique] += n_b[:, 0].astype(np.int64)
+
+    def score(self, users, features):
+        """Similarity in [0, 1] of each feature row to its user's profile.
+
+        NaN for rows without features or users with fewer than ``enroll_sessions`` samples.
+        The distance is the RMS z-score across features; 1 sigma scores 0.8, 2 sigma 0.5.
+        """
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        with self._lock:
+            rows = np.fromiter((self._index.get(user, -1) for user in users), dtype=np.int64, count=len(users))
+            known = rows >= 0
+            count = np.where(known, self._count[rows], 0)
+            mean = self._mean[rows]
+            m2 = self._m2[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            std = np.sqrt(m2 / np.maximum(count - 1, 1)[:, None])
+            std = np.maximum(std, np.maximum(self.min_relative_std * np.abs(mean), 1e-6))
+            distance = np.sqrt(np.mean(((features - mean) / std) ** 2, axis=1))
+        scores = 1.0 / (1.0 + (distance / 2.0) ** 2)
+        scores[~known | (count < self.enroll_sessions)] = np.nan
+        return scores
+
+    def verify(self, users, features, learn=True):
+        """Scores a batch and returns one TypingMatch per row.
+
+        With ``learn``, rows that enroll or match are folded into the profile afterwards;
+        uncertain and mismatching samples are not, so an impostor cannot drift a profile.
+        """
+        features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        scores = self.score(users, features)
+        missing = np.isnan(features).any(axis=1)
+        status = np.where(scores >= self.match_threshold, "match",
+                          np.where(scores < self.mismatch_threshold, "mismatch", "uncertain")).astype(object)
+        status[np.isnan(scores)] = "enrolling"
+        status[missing] = "insufficient"
+        if learn:
+            accept = (status == "enrolling") | (status == "match")
+            if accept.any():
+                with self._lock:
+                    rows = self._rows([user for user, ok in zip(users, accept) if ok])
+                    self._merge(rows, features[accept])
+        return [TypingMatch(s, None if np.isnan(v) else round(float(v), 3)) for s, v in zip(status, scores)]
+
+    def sessions(self, user):
+        with self._lock:
+            row = self._index.get(user)
+            return 0 if row is None else int(self._count[row])
+
+    def forget(self, user):
+        with self._lock:
+            row = self._index.get(user)
+            if row is not None:
+                self._count[row] = 0
+                self._mean[row] = 0.0
+                self._m2[row] = 0.0
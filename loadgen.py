@@ -0,0 +1,313 @@
+# loadgen.py
+"""Seeded end-to-end load generator for the Secure Retail subsystems.
+
+Drives logins, cart events, payments, firmware scans and honeypot hits through the same
+modules the dashboard uses, without Streamlit, and reports throughput and latency
+percentiles per subsystem as JSON. The same ``--seed`` replays the same workload: each
+subsystem draws from its own ``random.Random`` and runs on a simulated clock, so the
+``outcomes`` section of the report is identical from run to run and machine to machine.
+
+    python loadgen.py                                  # every workload, default sizes
+    python loadgen.py logins cart --events 50000 --rate logins=2000
+    python loadgen.py --output run.json --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+DEFAULT_SEED = 1234
+DEFAULT_TOLERANCE = 0.2  # fractional throughput drop or latency rise flagged by --compare
+DEFAULT_MIN_DELTA_MS = 0.5  # p99 rises smaller than this are timer noise, not regressions
+PERCENTILES = (50, 90, 99, 99.9)
+
+WORKLOADS = {}
+
+def workload(name, events, sim_interval):
+    """Registers a workload factory: ``factory(rng, clock, workdir) -> (step, close)``.
+
+    ``step()`` performs one event and returns an outcome label (or None); ``events`` is
+    the default event count and ``sim_interval`` the simulated seconds between events.
+    """
+    def register(factory):
+        WORKLOADS[name] = (factory, events, sim_interval)
+        return factory
+    return register
+
+class SimulatedClock:
+    """Callable clock advanced explicitly, so windowed rules see the same timeline every run."""
+
+    def __init__(self, start=1_700_000_000.0):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+# ------------------------------------------------------------------ workloads
+
+@workload("logins", events=20000, sim_interval=0.05)
+def login_workload(rng, clock, workdir):
+    """Keystroke biometrics + trust scoring + device fingerprinting, with 10% impostors."""
+    from admin_features import generate_device_fingerprint
+    from keystroke_biometrics import TypingProfiles, extract_features_batch
+    from session_state import SessionState
+    from trust_score import TrustScoreEngine
+
+    users = [(f"user{n}", rng.uniform(60, 140), rng.uniform(80, 300), f"10.0.{n // 250}.{n % 250 + 1}")
+             for n in range(1000)]
+    profiles = TypingProfiles()
+    engine = TrustScoreEngine(clock=clock)
+    session = SessionState()
+    user_agent = "Mozilla/5.0 (X11; Linux x86_64) loadgen"
+
+    def keystrokes(dwell, flight):
+        strokes, t = [], 0.0
+        for _ in range(rng.randint(8, 40)):
+            held = max(10.0, rng.gauss(dwell, dwell * 0.15))
+            strokes.append((t, t + held))
+            t += held + rng.gauss(flight, flight * 0.2)
+        return strokes
+
+    def step():
+        user, dwell, flight, home_ip = rng.choice(users)
+        if rng.random() < 0.1:  # someone else typing on this account
+            _, dwell, flight, _ = rng.choice(users)
+        ip = home_ip if rng.random() < 0.9 else f"203.0.113.{rng.randint(1, 254)}"
+        generate_device_fingerprint(user_agent, ip, rng=rng)
+        typing = profiles.verify([user], extract_features_batch([keystrokes(dwell, flight)]))[0]
+        decision = engine.score(user, typing, ip)
+        session.adjust_safety_score(rng.randint(1, 4) if not decision.mfa_required else rng.randint(-4, -1), rng)
+        return "mfa" if decision.mfa_required else "bypass"
+
+    return step, None
+
+@workload("cart", events=100000, sim_interval=0.01)
+def cart_workload(rng, clock, workdir):
+    """Add-to-cart events from 5,000 customers over a 1,000-SKU catalog, with checkouts."""
+    from cart_risk import CartRiskDetector
+    from catalog import load_catalog, synthetic_items
+
+    catalog = load_catalog(synthetic_items(1000, seed=rng.random()), path=None, synthetic=0)
+    items = catalog.items(catalog.search(limit=None).rows)
+    detector = CartRiskDetector(clock=clock)
+    customers = [f"cust{n}" for n in range(5000)]
+
+    def step():
+        customer = rng.choice(customers)
+        if rng.random() < 0.05:
+            detector.checkout(customer)
+            return "checkout"
+        item = rng.choice(items)
+        alerts = detector.add(customer, item["name"], item["price"], item["type"])
+        return alerts[0].rule if alerts else "ok"
+
+    return step, None
+
+@workload("payments", events=20000, sim_interval=0.05)
+def payment_workload(rng, clock, workdir):
+    """Simulated settlements: credential hashing and the tiered transaction store."""
+    from admin_features import generate_single_transaction_data
+    from payment_ingest import CredentialHasher, load_hmac_key
+    from transaction_store import TransactionStore
+
+    hasher = CredentialHasher(load_hmac_key(os.path.join(workdir, "payment_hmac.key")))
+    store = TransactionStore(cold_path=os.path.join(workdir, "transactions_cold.sqlite"))
+
+    def step():
+        store.append(generate_single_transaction_data(rng, hasher)["hashed"])
+        if rng.random() < 0.01:
+            store.query(page=rng.randint(0, 3))
+            return "append+query"
+        return "append"
+
+    return step, store.close
+
+@workload("firmware", events=50, sim_interval=60.0)
+def firmware_workload(rng, clock, workdir, image_mb=1, fleet=8):
+    """Hash-verifies a random fleet image against the baseline, Merkle-diffs it on mismatch
+    and runs the serial findings scan.
+
+    The shipped demo images are byte-identical, so a synthetic baseline and a fleet of
+    copies (half with a few tampered blocks) is generated in ``workdir`` instead.
+    """
+    from detection import BaselineRegistry, diff_against_baseline, hash_file
+    from firmware_detection import iter_findings
+    from hash_cache import HashCache
+
+    baseline = os.path.join(workdir, "baseline.bin")
+    data = rng.randbytes(image_mb * 1024 * 1024)
+    with open(baseline, "wb") as f:
+        f.write(data)
+    cache = HashCache(os.path.join(workdir, "hash_cache.sqlite"))
+    baselines = BaselineRegistry(cache=cache)
+    baselines.register("loadgen", baseline)
+    images = []
+    for n in range(fleet):
+        image = bytearray(data)
+        if n % 2:
+            for _ in range(rng.randint(1, 4)):
+                offset = rng.randrange(len(image) - 64)
+                image[offset:offset + 64] = rng.randbytes(64)
+        images.append(os.path.join(workdir, f"image{n}.bin"))
+        with open(images[-1], "wb") as f:
+            f.write(image)
+
+    def step():
+        image = rng.choice(images)
+        if hash_file(image) == baselines.hash("loadgen"):
+            outcome = "clean"
+        else:
+            outcome = "tampered" if diff_against_baseline(image, baseline="loadgen", registry=baselines) else "mismatch"
+        for _ in iter_findings(image, executor="serial"):
+            pass
+        return outcome
+
+    return step, cache.close
+
+@workload("honeypot", events=20000, sim_interval=0.02)
+def honeypot_workload(rng, clock, workdir):
+    """Credential-stuffing hits recorded into the capture store, with per-IP lookups."""
+    from honeypot_store import HoneypotStore, capture
+
+    store = HoneypotStore(directory=os.path.join(workdir, "honeypot"))
+    ips = [f"198.51.100.{n}" for n in range(1, 255)]
+    usernames = ["admin", "root", "user", "test", "oracle", "pi", "support", "guest"]
+
+    def step():
+        ip = rng.choice(ips)
+        store.record(capture(rng.choice(usernames), f"pw{rng.randint(0, 9999)}", ip, rng.choice(["ssh", "http", "telnet"])))
+        if rng.random() < 0.05:
+            store.by_ip(ip)
+            return "record+lookup"
+        return "record"
+
+    return step, store.close
+
+# --------------------------------------------------------------------- runner
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+def run_workload(name, events=None, rate=None, seed=DEFAULT_SEED, workdir=None):
+    """Runs one workload and returns its report.
+
+    With ``rate`` (events/s) events are scheduled open-loop and latency counts from each
+    event's scheduled start, so time spent queued behind a slow event is included;
+    without it events run back to back.
+    """
+    factory, default_events, sim_interval = WORKLOADS[name]
+    events = default_events if events is None else events
+    rng = random.Random(f"{seed}:{name}")
+    clock = SimulatedClock()
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        step, close = factory(rng, clock, tmp)
+        outcomes = Counter()
+        latencies = []
+        start = time.perf_counter()
+        for index in range(events):
+            if rate:
+                scheduled = start + index / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+            outcomes[step()] += 1
+            latencies.append(time.perf_counter() - scheduled)
+            clock.advance(sim_interval)
+        elapsed = time.perf_counter() - start
+        if close is not None:
+            close()
+    latencies.sort()
+    report = {"events": events, "target_rate": rate, "elapsed_s": round(elapsed, 3),
+              "throughput_per_s": round(events / elapsed, 1) if elapsed else None}
+    for pct in PERCENTILES:
+        report[f"p{pct:g}_ms"] = round(_percentile(latencies, pct) * 1000, 3)
+    report["max_ms"] = round(latencies[-1] * 1000, 3) if latencies else 0.0
+    report["outcomes"] = dict(sorted(outcomes.items(), key=lambda item: str(item[0])))
+    return report
+
+def run(names=None, events=None, rates=None, seed=DEFAULT_SEED, workdir=None):
+    """Runs the named workloads (default: all) and returns the full JSON-able report."""
+    rates = rates or {}
+    return {
+        "seed": seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "subsystems": {name: run_workload(name, events, rates.get(name), seed, workdir)
+                       for name in names or WORKLOADS},
+    }
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """Lists regressions against a baseline report: lower throughput, higher p99, changed outcomes."""
+    problems = []
+    for name, current in report["subsystems"].items():
+        previous = baseline.get("subsystems", {}).get(name)
+        if previous is None or previous.get("target_rate") != current["target_rate"]:
+            continue  # open-loop and closed-loop runs are not comparable
+        if previous.get("throughput_per_s") and current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            problems.append(f"{name}: throughput {current['throughput_per_s']}/s vs {previous['throughput_per_s']}/s")
+        if (previous.get("p99_ms") and current["p99_ms"] > previous["p99_ms"] * (1 + tolerance)
+                and current["p99_ms"] - previous["p99_ms"] >= min_delta_ms):
+            problems.append(f"{name}: p99 {current['p99_ms']} ms vs {previous['p99_ms']} ms")
+        if (report["seed"] == baseline.get("seed") and current["events"] == previous.get("events")
+                and current["outcomes"] != previous.get("outcomes")):
+            problems.append(f"{name}: outcomes changed for the same seed")
+    return problems
+
+def _parse_rates(values):
+    rates = {}
+    for value in values:
+        name, _, rate = value.partition("=")
+        if name not in WORKLOADS or not rate:
+            raise argparse.ArgumentTypeError(f"expected NAME=EVENTS_PER_S with NAME in {', '.join(WORKLOADS)}")
+        rates[name] = float(rate)
+    return rates
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", metavar="workload",
+                        help=f"workloads to run (default: all of {', '.join(WORKLOADS)})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--events", type=int, help="events per workload (default: per-workload size)")
+    parser.add_argument("--rate", action="append", default=[], metavar="NAME=EVENTS_PER_S",
+                        help="open-loop arrival rate for one workload (default: as fast as possible)")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="exit 1 if the run regresses against this report")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload(s) {', '.join(unknown)}; choose from {', '.join(WORKLOADS)}")
+    try:
+        rates = _parse_rates(args.rate)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+
+    report = run(args.names or None, args.events, rates, args.seed)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance, args.min_delta_ms)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
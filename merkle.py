@@ -0,0 +1,175 @@
+# merkle.py
+"""Block-level Merkle trees for locating and repairing tampered firmware regions."""
+import hashlib
+import os
+import struct
+
+BLOCK_SIZE = 4096
+SIDECAR_SUFFIX = ".merkle"
+_MAGIC = b"SRMK"
+_HEADER = struct.Struct("<4sHIQI32s")  # magic, version, block_size, image_size, leaf_count, image SHA-256
+_VERSION = 2
+_DIGEST_SIZE = hashlib.sha256().digest_size
+
+class MerkleTree:
+    """SHA-256 Merkle tree over fixed-size blocks of a file.
+
+    ``levels[0]`` holds the per-block leaf digests and ``levels[-1]`` the root; ``digest``
+    is the SHA-256 of the whole image the tree was built from.
+    """
+
+    def __init__(self, leaves, block_size, image_size, digest=None):
+        self.block_size = block_size
+        self.image_size = image_size
+        self.digest = digest
+        self.levels = [list(leaves)]
+        while len(self.levels[-1]) > 1:
+            below = self.levels[-1]
+            level = []
+            for i in range(0, len(below), 2):
+                if i + 1 < len(below):
+                    level.append(hashlib.sha256(below[i] + below[i + 1]).digest())
+                else:
+                    level.append(below[i])
+            self.levels.append(level)
+
+    @property
+    def leaves(self):
+        return self.levels[0]
+
+    @property
+    def root(self):
+        return self.levels[-1][0] if self.levels[-1] else hashlib.sha256(b"").digest()
+
+    @classmethod
+    def from_file(cls, path, block_size=BLOCK_SIZE):
+        leaves = []
+        size = 0
+        whole = hashlib.sha256()
+        buf = bytearray(block_size)
+        view = memoryview(buf)
+        with open(path, "rb") as f:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                leaves.append(hashlib.sha256(view[:n]).digest())
+                whole.update(view[:n])
+                size += n
+        return cls(leaves, block_size, size, whole.hexdigest())
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.block_size, self.image_size, len(self.leaves),
+                                 bytes.fromhex(self.digest)))
+            f.write(b"".join(self.leaves))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, block_size, image_size, count, digest = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{path} is not a Merkle sidecar file")
+            data = f.read(count * _DIGEST_SIZE)
+        if len(data) != count * _DIGEST_SIZE:
+            raise ValueError(f"{path} is truncated")
+        leaves = [data[i:i + _DIGEST_SIZE] for i in range(0, len(data), _DIGEST_SIZE)]
+        return cls(leaves, block_size, image_size, digest.hex())
+
+def load_or_build(image_path, block_size=BLOCK_SIZE, digest=None):
+    """Returns the tree stored next to ``image_path``, rebuilding it if stale or missing.
+
+    The sidecar is trusted only if it records the image's current size and SHA-256
+    ``digest`` (hex; pass the hash cache's to avoid a read, else it is computed).
+    Timestamps prove nothing: ``cp -p``, a backup restore or a copied-in sidecar all
+    leave a stale tree looking fresh.
+    """
+    sidecar = image_path + SIDECAR_SUFFIX
+    try:
+        tree = MerkleTree.load(sidecar)
+        if tree.block_size == block_size and tree.image_size == os.path.getsize(image_path):
+            if tree.digest == (digest or _file_digest(image_path)):
+                return tree
+    except (OSError, ValueError, struct.error):
+        pass
+    tree = MerkleTree.from_file(image_path, block_size)
+    try:
+        tree.save(sidecar)
+    except OSError:
+        pass
+    return tree
+
+def _file_digest(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def diff_blocks(expected, actual):
+    """Returns the sorted indices of blocks that differ between two trees.
+
+    Matching subtrees are skipped by comparing interior digests top-down. Blocks
+    that exist in only one of the images always count as different.
+    """
+    if expected.block_size != actual.block_size:
+        raise ValueError("Merkle trees use different block sizes")
+    common = min(len(expected.leaves), len(actual.leaves))
+    differing = []
+    if common and len(expected.levels) == len(actual.levels):
+        stack = [(len(expected.levels) - 1, 0)]
+        while stack:
+            depth, index = stack.pop()
+            left = expected.levels[depth]
+            right = actual.levels[depth]
+            if index >= len(left) or index >= len(right) or left[index] == right[index]:
+                continue
+            if depth == 0:
+                differing.append(index)
+            else:
+                stack.append((depth - 1, 2 * index + 1))
+                stack.append((depth - 1, 2 * index))
+        differing.sort()
+    else:
+        differing = [i for i in range(common) if expected.leaves[i] != actual.leaves[i]]
+    differing.extend(range(common, max(len(expected.leaves), len(actual.leaves))))
+    return differing
+
+def block_ranges(indices, block_size, image_size):
+    """Coalesces block indices into ``(start, end)`` byte ranges, ``end`` exclusive."""
+    ranges = []
+    for index in indices:
+        start = index * block_size
+        end = min(start + block_size, image_size) if start < image_size else start + block_size
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+def patch_ranges(source_path, target_path, ranges, image_size):
+    """Copies only ``ranges`` from ``source_path`` into ``target_path`` in place.
+
+    The target is truncated or extended to ``image_size``. Returns the number of bytes written.
+    """
+    written = 0
+    with open(source_path, "rb") as src, open(target_path, "r+b") as dst:
+        for start, end in ranges:
+            end = min(end, image_size)
+            if start >= end:
+                continue
+            src.seek(start)
+            dst.seek(start)
+            remaining = end - start
+            while remaining:
+                chunk = src.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                written += len(chunk)
+                remaining -= len(chunk)
+        dst.truncate(image_size)
+    return written
+
+def format_ranges(ranges):
+    return ", ".join(f"0x{start:08x}-0x{end - 1:08x}" for start, end in ranges)
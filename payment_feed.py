@@ -0,0 +1,112 @@
+# payment_feed.py
+"""Background payment simulator that publishes into a shared, bounded broadcast queue."""
+import itertools
+import threading
+import time
+from collections import deque
+
+DEFAULT_RATE = 1 / 20  # payments per second; the dashboard's original one every 20 s
+DEFAULT_BUFFER = 10000
+MAX_BATCH = 5000
+_MIN_TICK = 0.02
+_MAX_TICK = 1.0
+
+class PaymentFeed:
+    """Generates payments on a daemon thread at ``rate`` per second.
+
+    Each batch goes to ``sink`` (e.g. the transaction store) and into a ring buffer
+    of the newest ``buffer_size`` payments, tagged with consecutive sequence numbers.
+    Readers keep their own cursor and ``drain`` only what is new, so any number of
+    dashboard sessions can follow the same feed without stealing from each other.
+    """
+
+    def __init__(self, generator, sink=None, rate=DEFAULT_RATE, buffer_size=DEFAULT_BUFFER,
+                 max_batch=MAX_BATCH):
+        self._generator = generator
+        self._sink = sink
+        self._rate = float(rate)
+        self.max_batch = max_batch
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.seq = 0
+        self.skipped = 0  # payments owed but not generated because a tick exceeded max_batch
+        self.errors = 0
+        self.last_error = None
+
+    @property
+    def rate(self):
+        return self._rate
+
+    def set_rate(self, rate):
+        """Changes the feed rate; the producer picks it up immediately."""
+        self._rate = max(0.0, float(rate))
+        self._wake.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="payment-feed", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        owed = 0.0
+        last = time.monotonic()
+        while not self._stopped:
+            now = time.monotonic()
+            rate = self._rate
+            owed += (now - last) * rate
+            last = now
+            due = int(owed)
+            if due:
+                owed -= due
+                if due > self.max_batch:
+                    self.skipped += due - self.max_batch
+                    due = self.max_batch
+                self.publish([self._generator() for _ in range(due)])
+            # Sleep until the next payment is due, but tick often enough at high rates to
+            # keep batches small and notice rate changes promptly.
+            wait = _MAX_TICK if rate <= 0 else min(_MAX_TICK, max(_MIN_TICK, (1 - owed) / rate))
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def publish(self, payments):
+        """Hands a batch of ``{"plain": ..., "hashed": ...}`` payments to the sink and readers."""
+        if not payments:
+            return
+        if self._sink is not None:
+            try:
+                self._sink([payment["hashed"] for payment in payments])
+            except Exception as exc:  # keep the producer alive; surface the failure instead
+                self.errors += 1
+                self.last_error = repr(exc)
+        with self._lock:
+            self._buffer.extend(payments)
+            self.seq += len(payments)
+
+    def drain(self, cursor, limit=None):
+        """Returns ``(new_cursor, payments)`` for payments published after ``cursor``.
+
+        At most ``limit`` of the newest payments are returned (older ones that were
+        not returned, or already left the ring buffer, are simply skipped), so a
+        reader's cost per poll does not grow with the feed rate.
+        """
+        with self._lock:
+            seq = self.seq
+            available = min(seq - cursor, len(self._buffer))
+            if limit is not None:
+                available = min(available, limit)
+            if available <= 0:
+                return seq, []
+            payments = list(itertools.islice(reversed(self._buffer), available))
+        payments.reverse()
+        return seq, payments
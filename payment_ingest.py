@@ -0,0 +1,148 @@
+# payment_ingest.py
+"""Batch ingestion of settlement transactions: keyed credential hashing into a columnar frame."""
+import datetime
+import functools
+import hmac
+import os
+import secrets
+
+import numpy as np
+import pandas as pd
+
+from transaction_store import FIELDS
+
+KEY_ENV = "SECURE_RETAIL_PAYMENT_HMAC_KEY"
+DEFAULT_KEY_PATH = os.environ.get("SECURE_RETAIL_PAYMENT_KEY_FILE", ".payment_hmac.key")
+MIN_KEY_BYTES = 32
+CREDENTIAL_CACHE_SIZE = 1 << 16
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Plain settlement rows look like generate_single_transaction_data()["plain"].
+INPUT_FIELDS = ("timestamp", "customer_name", "amount", "payment_method", "status")
+
+def load_hmac_key(path=DEFAULT_KEY_PATH):
+    """Returns the credential HMAC key.
+
+    ``SECURE_RETAIL_PAYMENT_HMAC_KEY`` (hex) wins; otherwise a random key is read from
+    ``path``, which is created with owner-only permissions on first use. The new key is
+    written to a temporary file and hard-linked into place, so a process starting at the
+    same moment reads either no file or the whole key, and every process ends up with the
+    one that was linked first. Keys shorter than MIN_KEY_BYTES raise ValueError.
+    """
+    env_key = os.environ.get(KEY_ENV)
+    if env_key:
+        return _checked_key(bytes.fromhex(env_key), KEY_ENV)
+    try:
+        return _read_key(path)
+    except FileNotFoundError:
+        pass
+    key = secrets.token_bytes(MIN_KEY_BYTES)
+    tmp_path = f"{path}.{os.getpid()}.{secrets.token_hex(4)}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(key.hex())
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:  # another process got there first; use its key
+            return _read_key(path)
+    finally:
+        os.unlink(tmp_path)
+    return key
+
+def _read_key(path):
+    with open(path, "rb") as f:
+        text = f.read().decode("ascii", errors="replace").strip()
+    try:
+        key = bytes.fromhex(text)
+    except ValueError:
+        raise ValueError(f"Payment HMAC key file {path} does not hold a hex key") from None
+    return _checked_key(key, path)
+
+def _checked_key(key, source):
+    if len(key) < MIN_KEY_BYTES:
+        raise ValueError(f"Payment HMAC key from {source} is {len(key)} bytes; at least {MIN_KEY_BYTES} required")
+    return key
+
+class CredentialHasher:
+    """HMAC-SHA256 of payment credentials, memoized because the same cards recur constantly."""
+
+    def __init__(self, key, cache_size=CREDENTIAL_CACHE_SIZE):
+        self._key = key
+        self.hash = functools.lru_cache(maxsize=cache_size)(self._hash)
+
+    def _hash(self, credential):
+        return hmac.digest(self._key, credential.encode(), "sha256").hex()
+
+    def hash_many(self, credentials):
+        """Hashes a column of credentials; each distinct value is hashed at most once.
+
+        Missing credentials hash to None.
+        """
+        codes, uniques = pd.factorize(pd.Series(credentials, copy=False), use_na_sentinel=True)
+        # The trailing None is what the -1 "missing" code indexes.
+        hashed = np.array([self.hash(str(value)) for value in uniques] + [None], dtype=object)
+        return hashed[codes]
+
+    def cache_info(self):
+        return self.hash.cache_info()
+
+_credential_hasher = None
+
+def get_credential_hasher():
+    """Returns the process-wide hasher, loading the key on first use."""
+    global _credential_hasher
+    if _credential_hasher is None:
+        _credential_hasher = CredentialHasher(load_hmac_key())
+    return _credential_hasher
+
+def hash_credential(credential):
+    """Keyed hash of a single payment credential."""
+    return get_credential_hasher().hash(credential)
+
+def _timestamp_column(column, now):
+    if column is None:
+        return now
+    if pd.api.types.is_datetime64_any_dtype(column):
+        column = column.dt.strftime(TIMESTAMP_FORMAT)
+    return column.where(column.notna(), now)
+
+def _amount_column(column):
+    if pd.api.types.is_numeric_dtype(column):
+        # Match the "$123.00" text the single-transaction path stores.
+        return "$" + column.astype(float).map("{:.2f}".format)
+    return column
+
+def ingest_transactions(transactions, hasher=None, now=None):
+    """Hashes a settlement batch into a frame with the transaction store's FIELDS columns.
+
+    ``transactions`` is a DataFrame or an iterable of plain transaction dicts (see
+    INPUT_FIELDS). Plaintext ``payment_method`` values never reach the returned frame;
+    missing timestamps default to ``now`` and missing statuses to "Completed".
+    """
+    hasher = hasher or get_credential_hasher()
+    now = now or datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+    if isinstance(transactions, pd.DataFrame):
+        frame = transactions
+    else:
+        frame = pd.DataFrame.from_records(iter(transactions), columns=list(INPUT_FIELDS))
+    if "payment_method" not in frame:
+        raise KeyError("Transactions need a 'payment_method' column to hash")
+    status = frame["status"].fillna("Completed") if "status" in frame else "Completed"
+    hashed = pd.DataFrame({
+        "timestamp": _timestamp_column(frame.get("timestamp"), now),
+        "customer_name": frame["customer_name"] if "customer_name" in frame else None,
+        "amount": _amount_column(frame["amount"]) if "amount" in frame else None,
+        "payment_credential_hash": hasher.hash_many(frame["payment_method"]),
+        "status": status,
+    }, index=frame.index)
+    return hashed[list(FIELDS)]
+
+def ingest_into_store(transactions, store, hasher=None, now=None):
+    """Hashes a batch and appends it to ``store`` in timestamp order; returns the frame."""
+    hashed = ingest_transactions(transactions, hasher=hasher, now=now)
+    ordered = hashed.sort_values("timestamp", kind="stable")
+    ordered = ordered.astype(object).where(ordered.notna(), None)  # NaN would be stored as REAL
+    store.extend(ordered.to_dict("records"))
+    return hashed
@@ -0,0 +1,214 @@
+# retail_service.py
+"""Headless service layer: zero-trust checks, login trust scoring, payment credential hashing
+and firmware verification.
+
+RetailService runs the checks in-process; ServiceClient calls the same methods on a
+service_api.py server over keep-alive HTTP. Both return plain JSON-ready dicts and lists,
+so callers (the dashboard, POS terminals, back-office jobs) do not care which one they hold.
+"""
+import http.client
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+from detection import BASELINES, DEFAULT_BASELINE, cached_hash_file, diff_against_baseline
+from keystroke_biometrics import TypingProfiles, extract_features_batch
+from payment_ingest import get_credential_hasher
+from trust_score import TrustScoreEngine
+from zero_trust import ZeroTrustEngine
+
+DEFAULT_API_URL = os.environ.get("SECURE_RETAIL_API_URL")  # e.g. http://127.0.0.1:8750; unset runs in-process
+DEFAULT_FIRMWARE_ROOT = os.environ.get("SECURE_RETAIL_FIRMWARE_ROOT", ".")  # images verify_firmware may read
+MAX_BATCH = 10000  # items per batch call
+
+def _batch(items, name):
+    if not isinstance(items, (list, tuple)):
+        raise ValueError(f"'{name}' must be a list")
+    if len(items) > MAX_BATCH:
+        raise ValueError(f"'{name}' holds {len(items)} items; at most {MAX_BATCH} per call")
+    return items
+
+def _field(item, name, default=None):
+    if not isinstance(item, dict):
+        raise ValueError("Batch items must be objects")
+    value = item.get(name, default)
+    if value is None:
+        raise ValueError(f"'{name}' is required")
+    return value
+
+def _decision(decision):
+    return {"user_id": decision.user_id, "granted": decision.granted,
+            "checks": [check._asdict() for check in decision.checks]}
+
+class RetailService:
+    """The checks behind the dashboard, with no UI calls; safe to share between threads.
+
+    Typing profiles and login history live here, so every client of one service (the
+    dashboard's sessions and any HTTP callers) scores against the same state. Batch
+    methods do the per-batch work once, e.g. one keystroke feature extraction for all logins.
+    """
+
+    def __init__(self, profiles=None, trust_engine=None, zero_trust=None, hasher=None,
+                 firmware_root=DEFAULT_FIRMWARE_ROOT):
+        self.profiles = profiles or TypingProfiles()
+        self.trust_engine = trust_engine or TrustScoreEngine()
+        self.zero_trust = zero_trust or ZeroTrustEngine()
+        self._hasher = hasher
+        self.firmware_root = os.path.realpath(firmware_root)
+
+    def zero_trust_check(self, user_id, device_id, location):
+        """Returns ``{"user_id", "granted", "checks"}``; each check is ``{"check", "passed", "detail"}``."""
+        return _decision(self.zero_trust.evaluate(user_id, device_id, location))
+
+    def zero_trust_batch(self, requests):
+        requests = [(_field(r, "user_id"), _field(r, "device_id"), _field(r, "location"))
+                    for r in _batch(requests, "requests")]
+        return [_decision(decision) for decision in self.zero_trust.evaluate_batch(requests)]
+
+    def score_login(self, user, keystrokes=(), ip=""):
+        return self.score_logins([{"user": user, "keystrokes": keystrokes, "ip": ip}])[0]
+
+    def score_logins(self, logins):
+        """Scores login attempts, each ``{"user", "keystrokes": [[down_ms, up_ms], ...], "ip"}``.
+
+        Returns ``{"user", "score", "mfa_required", "reasons", "typing"}`` per login, in order.
+        """
+        logins = _batch(logins, "logins")
+        users = [str(_field(login, "user")) for login in logins]
+        sessions = [_field(login, "keystrokes", ()) for login in logins]
+        try:
+            features = extract_features_batch(sessions)
+        except (TypeError, ValueError):
+            raise ValueError("'keystrokes' must be a list of [down_ms, up_ms] pairs") from None
+        matches = self.profiles.verify(users, features)
+        results = []
+        for user, login, typing in zip(users, logins, matches):
+            decision = self.trust_engine.score(user, typing, str(login.get("ip") or ""))
+            results.append({"user": user, "score": decision.score, "mfa_required": decision.mfa_required,
+                            "reasons": [list(reason) for reason in decision.reasons],
+                            "typing": {"status": typing.status, "score": typing.score}})
+        return results
+
+    def hash_credentials(self, credentials):
+        """Keyed hashes of payment credentials, in order; missing credentials hash to None."""
+        hasher = self._hasher or get_credential_hasher()
+        return hasher.hash_many(list(_batch(credentials, "credentials"))).tolist()
+
+    def _image_path(self, image):
+        path = os.path.realpath(os.path.join(self.firmware_root, str(image)))
+        if os.path.commonpath([path, self.firmware_root]) != self.firmware_root:
+            raise ValueError(f"Firmware image {image!r} is outside the firmware root")
+        return path
+
+    def verify_firmware(self, images, baseline=DEFAULT_BASELINE):
+        """Hash-checks images (paths under ``firmware_root``) against a registered baseline.
+
+        Returns ``{"image", "status", "ranges"}`` per image: status is clean, tampered (with
+        the differing byte ranges from the Merkle diff), mismatch (e.g. a different size)
+        or missing.
+        """
+        paths = [self._image_path(image) for image in _batch(images, "images")]
+        try:
+            expected = BASELINES.hash(baseline)
+        except KeyError as exc:
+            raise ValueError(exc.args[0]) from None
+        results = []
+        for image, path in zip(images, paths):
+            ranges = []
+            if not os.path.isfile(path):
+                status = "missing"
+            elif cached_hash_file(path) == expected:
+                status = "clean"
+            else:
+                ranges = [list(r) for r in diff_against_baseline(path, baseline=baseline)]
+                status = "tampered" if ranges else "mismatch"
+            results.append({"image": image, "status": status, "ranges": ranges})
+        return results
+
+class ServiceClient:
+    """RetailService's interface over HTTP to a service_api.py server.
+
+    Each thread keeps one persistent connection, discarded after any failure. A call that
+    could not connect is retried once on a fresh connection; one the server dropped is
+    too, except login scoring (which records login history) once its request was sent.
+    Requests the server rejects raise ValueError with its message.
+    """
+
+    def __init__(self, url, timeout=30.0):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, fresh=False):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or fresh:
+            if conn is not None:
+                conn.close()
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return conn
+
+    def _post(self, path, payload, idempotent=True):
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json"}
+        for attempt in range(2):
+            conn = self._connection(fresh=attempt > 0)
+            sent = False
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                conn.request("POST", path, body, headers)
+                sent = True
+                response = conn.getresponse()
+                data = json.loads(response.read() or b"{}")
+                break
+            except (OSError, http.client.HTTPException) as exc:
+                # A half-used HTTPConnection refuses every later request, so never keep it.
+                self.close()
+                dropped = isinstance(exc, (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError))
+                # Once sent, the server may have acted on the request before the connection dropped.
+                if attempt or (sent and not (dropped and idempotent)):
+                    raise
+        if response.status >= 500:
+            raise ConnectionError(f"{path}: HTTP {response.status} {data.get('error', '')}".rstrip())
+        if response.status >= 400:
+            raise ValueError(data.get("error", f"HTTP {response.status}"))
+        return data
+
+    def zero_trust_check(self, user_id, device_id, location):
+        return self._post("/v1/zero-trust", {"user_id": user_id, "device_id": device_id, "location": location})
+
+    def zero_trust_batch(self, requests):
+        return self._post("/v1/zero-trust/batch", {"requests": list(requests)})["results"]
+
+    def score_login(self, user, keystrokes=(), ip=""):
+        return self._post("/v1/logins/score", {"user": user, "keystrokes": list(keystrokes), "ip": ip},
+                          idempotent=False)
+
+    def score_logins(self, logins):
+        return self._post("/v1/logins/score/batch", {"logins": list(logins)}, idempotent=False)["results"]
+
+    def hash_credentials(self, credentials):
+        return self._post("/v1/payments/hash", {"credentials": list(credentials)})["hashes"]
+
+    def verify_firmware(self, images, baseline=DEFAULT_BASELINE):
+        return self._post("/v1/firmware/verify", {"images": list(images), "baseline": baseline})["results"]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_service(url=DEFAULT_API_URL):
+    """Returns a shared ServiceClient for ``url`` if set, else the process-wide RetailService."""
+    with _services_lock:
+        service = _services.get(url)
+        if service is None:
+            service = _services[url] = ServiceClient(url) if url else RetailService()
+        return service
@@ -0,0 +1,299 @@
+# service_api.py
+"""Asyncio HTTP/1.1 JSON API over RetailService, with keep-alive connections and batch endpoints.
+
+    python service_api.py --port 8750
+
+    POST /v1/zero-trust              {"user_id", "device_id", "location"}
+    POST /v1/zero-trust/batch        {"requests": [...]}
+    POST /v1/logins/score            {"user", "keystrokes": [[down_ms, up_ms], ...], "ip"}
+    POST /v1/logins/score/batch      {"logins": [...]}
+    POST /v1/payments/hash           {"credentials": [...]}
+    POST /v1/firmware/verify         {"images": [...], "baseline": "default"}
+    GET  /healthz, GET /v1/stats
+
+Point the dashboard at a running server with SECURE_RETAIL_API_URL, or serve the API from
+the dashboard process with SECURE_RETAIL_API_PORT.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from detection import DEFAULT_BASELINE
+from retail_service import get_service
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8750
+DEFAULT_IDLE_TIMEOUT = 15.0  # seconds a keep-alive connection may wait for its next request
+DEFAULT_MAX_CONNECTIONS = 1000
+DEFAULT_WORKERS = 4  # threads running batch and file-reading handlers off the event loop
+MAX_HEADER_BYTES = 16 * 1024  # request line plus headers; bounds per-connection memory
+MAX_BODY = 16 * 1024 * 1024
+
+ROUTES = {}
+
+def route(method, path):
+    """Registers an async handler ``handler(server, payload)`` returning a JSON-ready object."""
+    def register(handler):
+        ROUTES[(method, path)] = handler
+        return handler
+    return register
+
+class HTTPError(Exception):
+    def __init__(self, status, message, close=False):
+        super().__init__(message)
+        self.status = status
+        self.close = close
+
+def _require(payload, name):
+    value = payload.get(name)
+    if value is None:
+        raise ValueError(f"'{name}' is required")
+    return value
+
+@route("GET", "/healthz")
+async def _healthz(server, payload):
+    return {"status": "ok"}
+
+@route("GET", "/v1/stats")
+async def _stats(server, payload):
+    return server.stats()
+
+# Single checks are a few microseconds of work and run on the event loop; batches and
+# anything that reads files go to the worker threads so other connections keep being served.
+@route("POST", "/v1/zero-trust")
+async def _zero_trust(server, payload):
+    return server.service.zero_trust_check(_require(payload, "user_id"), _require(payload, "device_id"),
+                                           _require(payload, "location"))
+
+@route("POST", "/v1/zero-trust/batch")
+async def _zero_trust_batch(server, payload):
+    return {"results": await server.run(server.service.zero_trust_batch, _require(payload, "requests"))}
+
+@route("POST", "/v1/logins/score")
+async def _score_login(server, payload):
+    return server.service.score_login(_require(payload, "user"), payload.get("keystrokes") or [],
+                                      payload.get("ip") or "")
+
+@route("POST", "/v1/logins/score/batch")
+async def _score_logins(server, payload):
+    return {"results": await server.run(server.service.score_logins, _require(payload, "logins"))}
+
+@route("POST", "/v1/payments/hash")
+async def _hash_credentials(server, payload):
+    return {"hashes": await server.run(server.service.hash_credentials, _require(payload, "credentials"))}
+
+@route("POST", "/v1/firmware/verify")
+async def _verify_firmware(server, payload):
+    return {"results": await server.run(server.service.verify_firmware, _require(payload, "images"),
+                                        payload.get("baseline") or DEFAULT_BASELINE)}
+
+def _response(status, body, keep_alive, idle_timeout):
+    data = json.dumps(body, separators=(",", ":")).encode()
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n")
+    if keep_alive:
+        head += f"Connection: keep-alive\r\nKeep-Alive: timeout={int(idle_timeout)}\r\n\r\n"
+    else:
+        head += "Connection: close\r\n\r\n"
+    return head.encode("latin-1") + data
+
+class ServiceAPI:
+    """Serves ``service`` (a RetailService) on ``host``:``port``.
+
+    Connections are persistent per HTTP/1.1 and handle requests back to back; one left idle
+    for ``idle_timeout`` seconds is closed. Bodies need a Content-Length and at most
+    MAX_BODY bytes. Beyond ``max_connections`` new connections are closed immediately and
+    counted as rejected. Invalid input answers 400 with ``{"error": message}``.
+    """
+
+    def __init__(self, service=None, host=DEFAULT_HOST, port=DEFAULT_PORT, idle_timeout=DEFAULT_IDLE_TIMEOUT,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, workers=DEFAULT_WORKERS):
+        self.service = service or get_service(url=None)
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.max_connections = max_connections
+        self.workers = workers
+        self.active = 0
+        self.connections = 0
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self._server = None
+        self._executor = None
+        self._loop = None
+        self._stopped = None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="service-api")
+        self._server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES, backlog=1024)
+        if not self.port:  # port 0: report the one the OS picked
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        await self._stopped.wait()
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+        self._executor.shutdown(wait=False)
+
+    def stop(self):
+        """Stops serving; safe to call from any thread."""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+
+    def start_in_thread(self):
+        """Runs the API on its own event loop thread; returns once the port is bound."""
+        ready = threading.Event()
+        errors = []
+
+        async def main():
+            try:
+                await self.start()
+            except OSError as exc:
+                errors.append(exc)
+                return
+            finally:
+                ready.set()
+            await self.serve_forever()
+
+        threading.Thread(target=asyncio.run, args=(main(),), name="service-api", daemon=True).start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    async def run(self, func, *args):
+        """Runs a blocking service call on the worker threads."""
+        return await self._loop.run_in_executor(self._executor, func, *args)
+
+    async def _read_request(self, reader):
+        """Returns ``(method, path, headers, body)``, or None when the client is done or idle."""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, "Request headers too large", close=True) from None
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(400, "Malformed request line", close=True) from None
+        headers = {"version": version}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "Chunked bodies are not supported; send Content-Length", close=True)
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body's extent is unknown, so the rest of the stream cannot be trusted either.
+            raise HTTPError(400, "Invalid Content-Length", close=True)
+        if length > MAX_BODY:
+            raise HTTPError(413, f"Body over {MAX_BODY} bytes", close=True)
+        body = b""
+        if length:
+            try:
+                body = await asyncio.wait_for(reader.readexactly(length), self.idle_timeout)
+            except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                return None
+        return method, urlsplit(target).path, headers, body
+
+    async def _dispatch(self, method, path, body):
+        handler = ROUTES.get((method, path))
+        if handler is None:
+            if any(path == known for _, known in ROUTES):
+                raise HTTPError(405, f"{method} not allowed on {path}")
+            raise HTTPError(404, f"No endpoint {path}")
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise HTTPError(400, "Body is not valid JSON") from None
+            if not isinstance(payload, dict):
+                raise HTTPError(400, "Body must be a JSON object")
+        else:
+            payload = {}
+        try:
+            return await handler(self, payload)
+        except (TypeError, ValueError) as exc:
+            raise HTTPError(400, str(exc)) from None
+
+    async def _handle(self, reader, writer):
+        if self.active >= self.max_connections:
+            self.rejected += 1
+            writer.transport.abort()
+            return
+        self.active += 1
+        self.connections += 1
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection != "close" and (headers["version"] != "HTTP/1.0" or connection == "keep-alive")
+                    status, result = 200, await self._dispatch(method, path, body)
+                except HTTPError as exc:
+                    self.errors += 1
+                    keep_alive = keep_alive and not exc.close
+                    status, result = exc.status, {"error": str(exc)}
+                except Exception as exc:  # a bug in a handler must not take the connection's peers down
+                    self.errors += 1
+                    status, result = 500, {"error": f"{type(exc).__name__}: {exc}"}
+                self.requests += 1
+                writer.write(_response(status, result, keep_alive, self.idle_timeout))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    def stats(self):
+        return {"port": self.port, "active": self.active, "connections": self.connections,
+                "requests": self.requests, "errors": self.errors, "rejected": self.rejected}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="threads for batch handlers")
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT)
+    args = parser.parse_args(argv)
+    api = ServiceAPI(host=args.host, port=args.port, idle_timeout=args.idle_timeout, workers=args.workers)
+
+    async def run():
+        await api.start()
+        print(f"Retail service API listening on http://{args.host}:{api.port}", flush=True)
+        await api.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(api.stats()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# session_state.py
+"""Compact per-browser-session state for the dashboard."""
+from dataclasses import dataclass
+
+@dataclass(slots=True)
+class SessionState:
+    """Everything app.py keeps per session, held in one slotted object under a single
+    ``st.session_state`` key instead of ~20 separate keys. Static data (catalog, cards,
+    admin log snapshots) and per-customer carts live in process-wide caches, never here."""
+    overall_safety_score: int = 70
+    logged_in_user: str = None
+    user_trust_score: int = 70
+    device_fingerprint: str = None
+    last_known_ip: str = "192.168.1.1"
+    original_shipping_address: str = "123 Main St, Anytown"
+    original_payment_method: str = "Visa ending 1234"
+    password_reauth_attempted: bool = False
+    last_simulated_payment: dict = None  # shared with the payment feed's buffer, not copied
+    show_payment_details: bool = False
+    payment_feed_cursor: int = 0
+    page: str = "Home & Demo Guide"
+
+    def adjust_safety_score(self, change_amount, rng):
+        """Moves the overall safety score by a random step towards ``change_amount`` (inclusive), clamped to 0-100."""
+        if change_amount > 0:
+            actual_change = rng.randint(1, change_amount)
+        else:
+            actual_change = rng.randint(change_amount, -1) if change_amount < 0 else 0
+        self.overall_safety_score = max(0, min(100, self.overall_safety_score + actual_change))
@@ -0,0 +1,185 @@
+# signatures.py
+"""Multi-pattern firmware implant signatures matched with a single Aho-Corasick automaton."""
+import json
+import mmap
+import os
+from collections import deque, namedtuple
+
+Signature = namedtuple("Signature", "name family pattern")
+Match = namedtuple("Match", "name family offset")
+
+# Upper bound on flat DFA table entries (256 per expanded state, ~8 bytes each).
+DENSE_TRANSITION_BUDGET = 4_000_000
+
+# Demo markers written by generate_files.py plus public IOC strings for each family.
+DEFAULT_SIGNATURES = [
+    Signature("LoJax demo vector", "LoJax", b"LOJAX_ATTACK_VECTOR_"),
+    Signature("LoJax rpcnetp dropper", "LoJax", b"rpcnetp.exe"),
+    Signature("LoJax rpcnetp dropper (UTF-16)", "LoJax", "rpcnetp.exe".encode("utf-16-le")),
+    Signature("LoJax autoche dropper", "LoJax", b"autoche.exe"),
+    Signature("LoJax autoche dropper (UTF-16)", "LoJax", "autoche.exe".encode("utf-16-le")),
+    Signature("MoonBounce demo vector", "MoonBounce", b"MOONBOUNCE_ATTACK_VECTOR_"),
+    Signature("MoonBounce CORE_DXE hook marker", "MoonBounce", b"MOONBOUNCE"),
+    Signature("BootHole demo vector", "BootHole", b"BOOTHOLE_ATTACK_VECTOR_"),
+    Signature("Evil Maid demo vector", "Evil Maid", b"EVIL_MAID_ATTACK_VECTOR_"),
+    Signature("MosaicRegressor IntelUpdate dropper", "MosaicRegressor", b"IntelUpdate.exe"),
+    Signature("MosaicRegressor IntelUpdate dropper (UTF-16)", "MosaicRegressor", "IntelUpdate.exe".encode("utf-16-le")),
+]
+
+def load_signature_db(path):
+    """Loads signatures from a JSON-lines file.
+
+    Each line holds ``name``, ``family`` and either ``hex`` (raw bytes) or ``text``
+    (matched as both ASCII and UTF-16LE).
+    """
+    signatures = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            family = entry.get("family", entry["name"])
+            if "hex" in entry:
+                signatures.append(Signature(entry["name"], family, bytes.fromhex(entry["hex"])))
+            else:
+                text = entry["text"]
+                signatures.append(Signature(entry["name"], family, text.encode("latin-1")))
+                signatures.append(Signature(f"{entry['name']} (UTF-16)", family, text.encode("utf-16-le")))
+    return signatures
+
+class SignatureAutomaton:
+    """Aho-Corasick automaton over byte patterns.
+
+    Build cost is linear in the total pattern length; scanning touches each input
+    byte once (amortized) no matter how many signatures are loaded. States are
+    numbered breadth-first and the shallowest ones, where random input spends nearly
+    all of its time, get complete DFA rows in one flat list (``state << 8 | byte``),
+    as many as ``dense_budget`` entries allow. Deeper states keep a sparse dict and
+    walk failure links.
+    """
+
+    def __init__(self, signatures, dense_budget=DENSE_TRANSITION_BUDGET):
+        self.signatures = [sig for sig in signatures if sig.pattern]
+        trie = [{}]
+        trie_outputs = [()]
+        for index, sig in enumerate(self.signatures):
+            state = 0
+            for byte in sig.pattern:
+                nxt = trie[state].get(byte)
+                if nxt is None:
+                    nxt = len(trie)
+                    trie[state][byte] = nxt
+                    trie.append({})
+                    trie_outputs.append(())
+                state = nxt
+            trie_outputs[state] = trie_outputs[state] + (index,)
+        # Renumber breadth-first, so failure links point to lower numbers and the
+        # shallow states form a prefix.
+        order = [0]
+        for state in order:
+            order.extend(trie[state].values())
+        number = [0] * len(trie)
+        for new, old in enumerate(order):
+            number[old] = new
+        goto = [{byte: number[nxt] for byte, nxt in trie[old].items()} for old in order]
+        outputs = [trie_outputs[old] for old in order]
+        fail = [0] * len(goto)
+        for state in range(len(goto)):
+            for byte, nxt in goto[state].items():
+                f = fail[state]
+                while f and byte not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(byte, 0) if state else 0
+                if outputs[fail[nxt]]:
+                    outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+        self._dense = max(1, min(len(goto), dense_budget // 256))  # the root is always expanded
+        self._table = self._flatten(goto, fail, self._dense)
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+        self._lengths = [len(sig.pattern) for sig in self.signatures]
+
+    @staticmethod
+    def _flatten(goto, fail, dense):
+        # Each state's failure row comes earlier in breadth-first order, so it is already
+        # complete when copied.
+        table = [0] * (dense << 8)
+        for state in range(dense):
+            base = state << 8
+            if state:
+                f = fail[state] << 8
+                table[base:base + 256] = table[f:f + 256]
+            for byte, nxt in goto[state].items():
+                table[base | byte] = nxt
+        return table
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def scanner(self):
+        return StreamScanner(self)
+
+    def scan(self, data):
+        """Returns every match in a single buffer."""
+        scanner = self.scanner()
+        return list(scanner.feed(data))
+
+    def scan_file(self, path, chunk_size=1024 * 1024):
+        """Streams a file through the automaton and returns every match."""
+        scanner = self.scanner()
+        matches = []
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return matches
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for start in range(0, len(mm), chunk_size):
+                    matches.extend(scanner.feed(mm[start:start + chunk_size]))
+        return matches
+
+class StreamScanner:
+    """Carries automaton state across chunks so matches spanning chunk borders are found."""
+
+    def __init__(self, automaton):
+        self._automaton = automaton
+        self.state = 0
+        self.offset = 0
+
+    def feed(self, chunk):
+        automaton = self._automaton
+        table = automaton._table
+        dense = automaton._dense
+        goto = automaton._goto
+        fail = automaton._fail
+        outputs = automaton._outputs
+        lengths = automaton._lengths
+        signatures = automaton.signatures
+        state = self.state
+        base = self.offset
+        matches = []
+        for pos, byte in enumerate(chunk):
+            if state < dense:
+                state = table[state << 8 | byte]
+            else:
+                nxt = goto[state].get(byte)
+                while nxt is None:
+                    state = fail[state]
+                    nxt = table[state << 8 | byte] if state < dense else goto[state].get(byte)
+                state = nxt
+            if outputs[state]:
+                end = base + pos + 1
+                for index in outputs[state]:
+                    sig = signatures[index]
+                    matches.append(Match(sig.name, sig.family, end - lengths[index]))
+        self.state = state
+        self.offset = base + len(chunk)
+        return matches
+
+_default_automaton = None
+
+def get_default_automaton():
+    """Returns the automaton for DEFAULT_SIGNATURES, building it on first use."""
+    global _default_automaton
+    if _default_automaton is None:
+        _default_automaton = SignatureAutomaton(DEFAULT_SIGNATURES)
+    return _default_automaton
@@ -0,0 +1,28 @@
+# test_audit_log.py
+"""AuditMonitor ingestion when the anomaly scorer misbehaves."""
+import pytest
+
+from anomaly_scoring import NaiveBayesBackend
+from audit_log import AuditMonitor, append_audit_event
+
+class _FailingScorer:
+    def score(self, events):
+        raise RuntimeError("worker died")
+
+def test_scorer_failure_falls_back_to_tracker_flags(tmp_path):
+    log = str(tmp_path / "audit.jsonl")
+    append_audit_event(log, {"timestamp": "2026-01-05 10:00:00", "user": "eve", "action": "Escalated privileges",
+                             "status": "Blocked - Insufficient Permissions"})
+    append_audit_event(log, {"timestamp": "2026-01-05 10:01:00", "user": "bob", "action": "Viewed inventory",
+                             "status": "Success"})
+    monitor = AuditMonitor(log, offset_path=str(tmp_path / "audit.offset"), scorer=_FailingScorer())
+
+    anomalies = monitor.refresh()
+    assert [a.user for a in anomalies] == ["eve"]
+    assert len(monitor.recent_events()) == 2
+    assert "worker died" in monitor.scoring_error
+    assert monitor.refresh() == []  # the batch is not re-read
+
+@pytest.mark.parametrize("examples", [[("viewed inventory | success", 0)], [("deleted logs | success", 1)], []])
+def test_naive_bayes_handles_classes_without_examples(examples):
+    assert 0.0 <= NaiveBayesBackend(examples).score_one("exported customer data | success") <= 1.0
@@ -0,0 +1,21 @@
+# test_cart_risk.py
+"""Cart alert messages."""
+from cart_risk import CartRiskDetector
+from catalog import Catalog
+
+def _repeat_alert(detector, sku):
+    alerts = []
+    for second in range(detector.rules["repeated_sku"]):
+        alerts += detector.add("alice", sku, 1, "daily", timestamp=second)
+    (alert,) = [a for a in alerts if a.rule == "repeated_sku"]
+    return alert
+
+def test_repeated_sku_alert_names_the_product():
+    catalog = Catalog.from_items([{"sku": 42, "name": "USB-C Cable", "price": 1, "type": "daily"}])
+    detector = CartRiskDetector(sku_names=catalog.name_of)
+    assert _repeat_alert(detector, 42).message.startswith("USB-C Cable added 5 times")
+
+def test_repeated_sku_alert_falls_back_to_the_sku():
+    catalog = Catalog.from_items([])
+    assert _repeat_alert(CartRiskDetector(sku_names=catalog.name_of), 7).message.startswith("SKU 7 added")
+    assert _repeat_alert(CartRiskDetector(), 7).message.startswith("SKU 7 added")
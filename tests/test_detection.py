@@ -0,0 +1,61 @@
+# test_detection.py
+"""Merkle sidecar trust and verified recovery, on images in a temporary directory."""
+import os
+import shutil
+
+import pytest
+
+import detection
+import hash_cache
+import merkle
+
+BLOCK = merkle.BLOCK_SIZE
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.setattr(hash_cache, "_default_cache", hash_cache.HashCache(str(tmp_path / "cache.sqlite")))
+    baseline = tmp_path / "baseline.bin"
+    baseline.write_bytes(bytes(range(256)) * (4 * BLOCK // 256))
+    detection.BASELINES.register("test", str(baseline))
+    yield tmp_path
+    hash_cache._default_cache.close()
+
+def test_sidecar_for_replaced_older_image_is_rebuilt(workdir):
+    image = workdir / "image.bin"
+    image.write_bytes(b"A" * 2 * BLOCK)
+    merkle.load_or_build(str(image))
+    stamp = os.stat(image).st_mtime_ns - 10**9
+    image.write_bytes(b"A" * BLOCK + b"B" * BLOCK)  # same size, restored with an older mtime
+    os.utime(image, ns=(stamp, stamp))
+    assert os.stat(str(image) + merkle.SIDECAR_SUFFIX).st_mtime_ns >= os.stat(image).st_mtime_ns
+    assert merkle.load_or_build(str(image)).leaves == merkle.MerkleTree.from_file(str(image)).leaves
+
+def test_copied_in_sidecar_is_not_trusted(workdir):
+    other, image = workdir / "other.bin", workdir / "image.bin"
+    other.write_bytes(b"X" * 2 * BLOCK)
+    image.write_bytes(b"Y" * 2 * BLOCK)
+    merkle.load_or_build(str(other))
+    shutil.copy(str(other) + merkle.SIDECAR_SUFFIX, str(image) + merkle.SIDECAR_SUFFIX)
+    digest = detection.hash_file(str(image))
+    assert merkle.load_or_build(str(image), digest=digest).digest == digest
+
+def test_recovery_restores_baseline(workdir):
+    image = workdir / "image.bin"
+    data = bytearray((workdir / "baseline.bin").read_bytes())
+    data[BLOCK + 7] ^= 0xFF
+    image.write_bytes(data)
+    ranges = detection.recover_file(str(image), baseline="test")
+    assert ranges == [(BLOCK, 2 * BLOCK)]
+    assert image.read_bytes() == (workdir / "baseline.bin").read_bytes()
+
+def test_recovery_that_leaves_a_difference_fails(workdir, monkeypatch):
+    image = workdir / "image.bin"
+    data = bytearray((workdir / "baseline.bin").read_bytes())
+    data[7] ^= 0xFF
+    image.write_bytes(data)
+    with pytest.raises(detection.RecoveryError):
+        detection.recover_file(str(image), ranges=[(2 * BLOCK, 3 * BLOCK)], baseline="test")
+    assert detection._recover(str(image), "img", "test") == ("img", "Compromised", "Recovered 0x00000000-0x00000fff")
+    image.write_bytes(data)
+    monkeypatch.setattr(merkle, "patch_ranges", lambda *args: 0)
+    assert detection._recover(str(image), "img", "test")[1] == "Recovery failed"
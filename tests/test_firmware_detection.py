@@ -0,0 +1,44 @@
+# test_firmware_detection.py
+"""Scan-level findings for parsed and unparseable images."""
+import pytest
+
+from findings import SEVERITY_CRITICAL, SEVERITY_WARNING
+from firmware_detection import dxe_payload_scanner, iter_findings
+from uefi_parser import FV_FILETYPE_DRIVER, build_ffs_file, build_firmware_volume
+
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_image_without_volumes_is_flagged(tmp_path, executor):
+    path = tmp_path / "blank.bin"
+    path.write_bytes(b"\xFF" * 4096)
+    findings = list(iter_findings(str(path), executor=executor))
+    (warning,) = [f for f in findings if f.check == "IMAGE PARSE"]
+    assert warning.severity == SEVERITY_WARNING
+    assert "no firmware volumes parsed" in warning.message
+
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_parsed_image_is_not_flagged(tmp_path, executor):
+    path = tmp_path / "image.bin"
+    path.write_bytes(build_firmware_volume([
+        build_ffs_file("11111111-2222-3333-4444-555555555555", FV_FILETYPE_DRIVER, b"MOONBOUNCE", name="Hook"),
+    ]))
+    findings = list(iter_findings(str(path), executor=executor))
+    assert not [f for f in findings if f.check == "IMAGE PARSE"]
+    assert [f.subject for f in findings if f.check == "DXE PAYLOAD SCAN" and f.severity == SEVERITY_CRITICAL] == ["Hook"]
+
+@pytest.mark.parametrize("body, families", [
+    (b"..LOJAX_ATTACK_VECTOR_..", "LoJax"),
+    ("rpcnetp.exe".encode("utf-16-le"), "LoJax"),
+    (b"BOOTHOLE_ATTACK_VECTOR_ then EVIL_MAID_ATTACK_VECTOR_", "BootHole, Evil Maid"),
+])
+def test_any_implant_family_in_a_driver_is_critical(tmp_path, body, families):
+    path = tmp_path / "image.bin"
+    path.write_bytes(build_firmware_volume([
+        build_ffs_file("11111111-2222-3333-4444-555555555555", FV_FILETYPE_DRIVER, body, name="Dropper"),
+    ]))
+    (finding,) = [f for f in iter_findings(str(path), executor="serial") if f.check == "DXE PAYLOAD SCAN"]
+    assert finding.severity == SEVERITY_CRITICAL
+    assert f"matches {families} implant signatures" in finding.message
+
+def test_unknown_payload_status_is_critical():
+    (finding,) = dxe_payload_scanner([("odd.efi", 0x40, "quarantined")])
+    assert finding.severity == SEVERITY_CRITICAL
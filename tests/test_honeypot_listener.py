@@ -0,0 +1,45 @@
+# test_honeypot_listener.py
+"""Telnet capture through a live HoneypotListener."""
+import asyncio
+
+import pytest
+
+from honeypot_listener import HoneypotListener, _text
+
+class _Store:
+    def __init__(self):
+        self.records = []
+
+    def record(self, record):
+        self.records.append(record)
+
+@pytest.mark.parametrize("raw, text", [
+    (b"\xff\xfb\x01\xff\xfd\x03admin", "admin"),
+    (b"\xff\xfa\x18\x00xterm\xff\xf0root", "root"),  # terminal-type subnegotiation
+    (b"pa\xff\xffss", "pa\xffss"),  # escaped 0xFF data byte
+    (b"guest\xff\xf1", "guest"),  # NOP
+    (b"user\xff\xfa\x18", "user"),  # unterminated subnegotiation
+])
+def test_text_strips_telnet_commands(raw, text):
+    assert _text(raw) == text
+
+def test_telnet_login_is_captured_without_negotiation_bytes():
+    store = _Store()
+
+    async def run():
+        listener = HoneypotListener(store, {"telnet": 0}, failure_delay=0)
+        await listener.start()
+        reader, writer = await asyncio.open_connection("127.0.0.1", listener.ports["telnet"])
+        await reader.readuntil(b"login: ")
+        writer.write(b"\xff\xfb\x01\xff\xfd\x03admin\r\n")
+        await reader.readuntil(b"Password: ")
+        writer.write(b"\xff\xfc\x01hunter2\r\n")
+        await reader.readuntil(b"login: ")
+        writer.close()
+        listener.stop()
+        await listener.serve_forever()
+
+    asyncio.run(run())
+    (login,) = [r for r in store.records if r["event"] == "login"]
+    assert login["username"] == "admin"
+    assert login["password_length"] == len("hunter2")
@@ -0,0 +1,15 @@
+# test_loadgen.py
+"""Workloads keep their state inside the run's temporary directory."""
+import pytest
+
+import loadgen
+
+@pytest.mark.parametrize("name", ["payments", "firmware"])
+def test_workload_leaves_no_files_in_cwd(tmp_path, monkeypatch, name):
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+    monkeypatch.chdir(cwd)
+    monkeypatch.delenv("SECURE_RETAIL_PAYMENT_KEY", raising=False)
+    report = loadgen.run_workload(name, events=20, workdir=str(tmp_path))
+    assert sum(report["outcomes"].values()) == 20
+    assert list(cwd.iterdir()) == []
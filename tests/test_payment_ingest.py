@@ -0,0 +1,35 @@
+# test_payment_ingest.py
+"""HMAC key file creation and validation."""
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import payment_ingest
+from payment_ingest import MIN_KEY_BYTES, load_hmac_key
+
+@pytest.fixture(autouse=True)
+def _no_env_key(monkeypatch):
+    monkeypatch.delenv(payment_ingest.KEY_ENV, raising=False)
+
+def test_key_file_is_created_once(tmp_path):
+    path = str(tmp_path / "hmac.key")
+    key = load_hmac_key(path)
+    assert len(key) == MIN_KEY_BYTES
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert load_hmac_key(path) == key
+    assert os.listdir(tmp_path) == ["hmac.key"]  # no temporary files left behind
+
+def test_concurrent_first_use_agrees_on_one_key(tmp_path):
+    path = str(tmp_path / "hmac.key")
+    with ThreadPoolExecutor(16) as pool:
+        keys = set(pool.map(lambda _: load_hmac_key(path), range(64)))
+    assert keys == {load_hmac_key(path)}
+
+@pytest.mark.parametrize("content", [b"", b"abcd", b"not hex at all"])
+def test_short_or_garbled_key_is_rejected(tmp_path, content):
+    path = tmp_path / "hmac.key"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        load_hmac_key(str(path))
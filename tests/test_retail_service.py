@@ -0,0 +1,29 @@
+# test_retail_service.py
+"""ServiceClient against a real service_api.py server."""
+import socket
+
+import pytest
+
+from retail_service import RetailService, ServiceClient
+from service_api import ServiceAPI
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_client_recovers_after_refused_connection():
+    port = _free_port()
+    client = ServiceClient(f"http://127.0.0.1:{port}", timeout=5)
+    with pytest.raises(ConnectionRefusedError):
+        client.zero_trust_check("admin", "device_123", "Bengaluru")
+    with pytest.raises(ConnectionRefusedError):
+        client.score_login("admin")
+
+    api = ServiceAPI(RetailService(), port=port).start_in_thread()
+    try:
+        assert client.zero_trust_check("admin", "device_123", "Bengaluru")["granted"]
+        assert client.score_login("admin")["user"] == "admin"
+    finally:
+        client.close()
+        api.stop()
@@ -0,0 +1,132 @@
+# test_uefi_parser.py
+"""Parses synthetic firmware volumes built with uefi_parser's own builders."""
+import struct
+import uuid
+
+import pytest
+
+import uefi_parser
+from firmware_detection import load_firmware_image
+from uefi_parser import (
+    DXE_FILE_TYPES, FV_FILETYPE_DRIVER, FV_FILETYPE_FIRMWARE_VOLUME_IMAGE, FV_FILETYPE_FREEFORM, FV_FILETYPE_RAW,
+    SECTION_FIRMWARE_VOLUME_IMAGE, SECTION_PE32, SECTION_USER_INTERFACE, FirmwareImage, build_compression_section,
+    build_ffs_file, build_firmware_volume, build_lzma_section, build_section, iter_sections, iter_volumes,
+)
+
+GUID_A = "11111111-2222-3333-4444-555555555555"
+GUID_B = "AAAAAAAA-BBBB-CCCC-DDDD-EEEEEEEEEEEE"
+
+def _image(tmp_path, data, name="image.bin"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+def _ui(name):
+    return build_section(SECTION_USER_INTERFACE, (name + "\x00").encode("utf-16-le"))
+
+def test_volume_and_file_headers():
+    volume = build_firmware_volume([
+        build_ffs_file(GUID_A, FV_FILETYPE_DRIVER, b"driver body", name="NetDxe"),
+        build_ffs_file(GUID_B, FV_FILETYPE_RAW, b"raw payload", raw=True),
+    ])
+    image = b"\xFF" * 0x100 + volume + b"\xFF" * 0x40
+    (fv,) = iter_volumes(image)
+    assert fv.offset == 0x100
+    assert fv.length == len(volume)
+    assert fv.fs_guid == str(uuid.UUID(bytes_le=uefi_parser.EFI_FIRMWARE_FILE_SYSTEM2_GUID.bytes_le)).upper()
+    driver, raw = fv.files
+    assert (driver.guid, driver.type, driver.name, bytes(driver.body)) == (GUID_A, FV_FILETYPE_DRIVER, "NetDxe", b"driver body")
+    assert image[driver.offset:driver.offset + 16] == uuid.UUID(GUID_A).bytes_le
+    assert (raw.guid, raw.type, raw.name, bytes(raw.body)) == (GUID_B, FV_FILETYPE_RAW, None, b"raw payload")
+
+def test_nested_volume_files_are_walked():
+    inner = build_firmware_volume([build_ffs_file(GUID_B, FV_FILETYPE_DRIVER, b"inner driver", name="Inner")])
+    outer = build_firmware_volume([
+        build_ffs_file(GUID_A, FV_FILETYPE_FIRMWARE_VOLUME_IMAGE,
+                       build_section(SECTION_FIRMWARE_VOLUME_IMAGE, inner), raw=True),
+    ])
+    files = list(FirmwareImage(outer).files())
+    assert [(ffs.guid, ffs.type) for ffs in files] == [(GUID_A, FV_FILETYPE_FIRMWARE_VOLUME_IMAGE),
+                                                      (GUID_B, FV_FILETYPE_DRIVER)]
+    assert bytes(files[1].body) == b"inner driver"
+    assert files[1].offset > files[0].offset
+
+def test_large_file_header():
+    body = bytes(range(256)) * 64
+    volume = build_firmware_volume([
+        build_ffs_file(GUID_A, FV_FILETYPE_DRIVER, body, name="BigDxe", large=True),
+        build_ffs_file(GUID_B, FV_FILETYPE_DRIVER, b"after", name="Next"),
+    ])
+    big, following = FirmwareImage(volume).dxe_drivers()
+    assert (big.name, bytes(big.body)) == ("BigDxe", body)
+    assert (following.name, bytes(following.body)) == ("Next", b"after")
+
+def test_lzma_and_uncompressed_sections():
+    sections = build_section(SECTION_PE32, b"compressed driver") + b"\x00" * 3 + _ui("Packed")
+    assert (len(build_section(SECTION_PE32, b"compressed driver")) + 3) % 4 == 0
+    for wrapped in (build_lzma_section(sections), build_compression_section(sections)):
+        assert [(stype, bytes(body)) for stype, body in iter_sections(wrapped)] == [
+            (SECTION_PE32, b"compressed driver"), (SECTION_USER_INTERFACE, "Packed\x00".encode("utf-16-le"))]
+        volume = build_firmware_volume([build_ffs_file(GUID_A, FV_FILETYPE_DRIVER, wrapped, raw=True)])
+        (driver,) = FirmwareImage(volume).dxe_drivers()
+        assert (driver.name, bytes(driver.body)) == ("Packed", b"compressed driver")
+
+def test_corrupt_lzma_section_is_skipped():
+    broken = bytearray(build_lzma_section(build_section(SECTION_PE32, b"x" * 64)))
+    broken[-8:] = b"\xFF" * 8
+    broken += b"\x00" * (-len(broken) % 4)
+    sections = [(stype, bytes(body)) for stype, body in iter_sections(bytes(broken) + _ui("Still"))]
+    assert sections == [(SECTION_USER_INTERFACE, "Still\x00".encode("utf-16-le"))]
+
+def test_duplicate_ui_names_are_all_classified(tmp_path):
+    volume = build_firmware_volume([
+        build_ffs_file(GUID_A, FV_FILETYPE_DRIVER, b"hook MOONBOUNCE here", name="Same"),
+        build_ffs_file(GUID_B, FV_FILETYPE_DRIVER, b"benign driver", name="Same"),
+    ])
+    drivers = FirmwareImage(volume).dxe_drivers()
+    assert [(ffs.name, ffs.guid) for ffs in drivers] == [("Same", GUID_A), ("Same", GUID_B)]
+    assert all(ffs.type in DXE_FILE_TYPES for ffs in drivers)
+
+    _, payloads = load_firmware_image(_image(tmp_path, volume))
+    assert [(name, status) for name, _, status in payloads] == [
+        ("Same", "implant_detected:MoonBounce"), ("Same", "clean")]
+    assert payloads[0][1] != payloads[1][1]
+
+def test_bad_volume_checksum_is_rejected():
+    volume = bytearray(build_firmware_volume([build_ffs_file(GUID_A, FV_FILETYPE_DRIVER, b"x", name="X")]))
+    volume[50] ^= 0xFF  # header checksum
+    assert list(iter_volumes(bytes(volume))) == []
+
+@pytest.mark.parametrize("large", [False, True])
+def test_bad_file_header_checksum_is_skipped(large):
+    bad = bytearray(build_ffs_file(GUID_A, FV_FILETYPE_DRIVER, b"tampered", name="Bad", large=large))
+    bad[16] ^= 0x01
+    volume = build_firmware_volume([bytes(bad), build_ffs_file(GUID_B, FV_FILETYPE_FREEFORM, b"ok", name="Good")])
+    assert [ffs.guid for ffs in FirmwareImage(volume).files()] == [GUID_B]
+
+def _refresh_fv_checksum(volume):
+    header_length = struct.unpack_from("<H", volume, 48)[0]
+    struct.pack_into("<H", volume, 50, 0)
+    struct.pack_into("<H", volume, 50, -sum(memoryview(bytes(volume[:header_length])).cast("H")) & 0xFFFF)
+
+def test_extended_header_past_volume_end_is_rejected():
+    volume = bytearray(build_firmware_volume([build_ffs_file(GUID_A, FV_FILETYPE_DRIVER, b"x", name="X")]))
+    struct.pack_into("<H", volume, 52, len(volume) - 4)  # ExtHeaderOffset
+    _refresh_fv_checksum(volume)
+    assert list(iter_volumes(bytes(volume))) == []
+
+def test_truncated_large_file_header_ends_the_walk():
+    filler = build_ffs_file(GUID_A, FV_FILETYPE_RAW, b"\x00" * (0x1000 - 72 - 24 - 24), raw=True)
+    volume = bytearray(build_firmware_volume([filler]))
+    volume[-24:] = build_ffs_file(GUID_B, FV_FILETYPE_DRIVER, b"cut off", large=True)[:24]
+    assert [ffs.guid for ffs in FirmwareImage(bytes(volume)).files()] == [GUID_A]
+
+def test_truncated_extended_section_size_is_ignored():
+    assert list(iter_sections(b"\xFF\xFF\xFF" + bytes([SECTION_PE32]) + b"\x01")) == []
+
+def test_lzma_section_over_the_output_cap_is_skipped(monkeypatch):
+    wrapped = build_lzma_section(build_section(SECTION_PE32, b"\x00" * 4096))
+    monkeypatch.setattr(uefi_parser, "MAX_DECOMPRESSED_SECTION", 1024)
+    assert list(iter_sections(wrapped)) == []
+    monkeypatch.setattr(uefi_parser, "MAX_DECOMPRESSED_SECTION", 8192)
+    assert [stype for stype, _ in iter_sections(wrapped)] == [SECTION_PE32]
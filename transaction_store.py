@@ -0,0 +1,151 @@
+# transaction_store.py
+"""Bounded transaction store: an in-memory hot tier with a time index over an SQLite cold tier."""
+import bisect
+import os
+import sqlite3
+import threading
+from collections import deque
+
+DEFAULT_COLD_PATH = os.environ.get("SECURE_RETAIL_TRANSACTION_DB", "transactions_cold.sqlite")
+DEFAULT_HOT_CAPACITY = 2000
+DEFAULT_SPILL_BATCH = 200
+FIELDS = ("timestamp", "customer_name", "amount", "payment_credential_hash", "status")
+
+class TransactionStore:
+    """Keeps the newest ``hot_capacity`` hashed transactions in memory, ordered by timestamp.
+
+    Older records spill to an SQLite table indexed on timestamp in batches of
+    ``spill_batch``. Every hot timestamp is >= every cold timestamp, so a newest-first
+    page is a slice of the hot tier followed by one indexed range query on the cold tier.
+    Timestamps are ``%Y-%m-%d %H:%M:%S`` strings, which sort chronologically.
+    """
+
+    def __init__(self, cold_path=DEFAULT_COLD_PATH, hot_capacity=DEFAULT_HOT_CAPACITY,
+                 spill_batch=DEFAULT_SPILL_BATCH):
+        self.hot_capacity = hot_capacity
+        self.spill_batch = spill_batch
+        self._lock = threading.RLock()
+        self._hot = deque()
+        self._hot_ts = deque()  # parallel to _hot; the time index bisected by range queries
+        self._spill = []
+        self._cold_count = 0
+        self._cold_max_ts = ""
+        self._conn = sqlite3.connect(cold_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL,"
+            " customer_name TEXT, amount TEXT, payment_credential_hash TEXT, status TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS transactions_ts ON transactions (timestamp, id)")
+        self._conn.commit()
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(timestamp), '') FROM transactions").fetchone()
+        self._cold_count, self._cold_max_ts = row
+
+    def __len__(self):
+        with self._lock:
+            return len(self._hot) + len(self._spill) + self._cold_count
+
+    def append(self, record):
+        """Adds one hashed transaction dict (see FIELDS)."""
+        ts = record["timestamp"]
+        with self._lock:
+            if ts < self._cold_max_ts or (self._spill and ts < self._spill[-1]["timestamp"]):
+                # Late arrival older than data already spilled; it belongs to the cold tier.
+                self._spill.append(record)
+                self._flush_spill()
+                return
+            if not self._hot_ts or ts >= self._hot_ts[-1]:
+                self._hot.append(record)
+                self._hot_ts.append(ts)
+            else:
+                index = bisect.bisect_right(self._hot_ts, ts)
+                self._hot.insert(index, record)
+                self._hot_ts.insert(index, ts)
+            while len(self._hot) > self.hot_capacity:
+                self._hot_ts.popleft()
+                self._spill.append(self._hot.popleft())
+            if len(self._spill) >= self.spill_batch:
+                self._flush_spill()
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def flush(self):
+        with self._lock:
+            self._flush_spill()
+
+    def _flush_spill(self):
+        if not self._spill:
+            return
+        self._conn.executemany(
+            "INSERT INTO transactions (timestamp, customer_name, amount, payment_credential_hash, status)"
+            " VALUES (?, ?, ?, ?, ?)",
+            [tuple(record.get(field) for field in FIELDS) for record in self._spill],
+        )
+        self._conn.commit()
+        self._cold_count += len(self._spill)
+        self._cold_max_ts = max(self._cold_max_ts, max(record["timestamp"] for record in self._spill))
+        self._spill.clear()
+
+    def _hot_bounds(self, start, end):
+        lo = 0 if start is None else bisect.bisect_left(self._hot_ts, start)
+        hi = len(self._hot_ts) if end is None else bisect.bisect_right(self._hot_ts, end)
+        return lo, max(lo, hi)
+
+    @staticmethod
+    def _cold_where(start, end):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def count(self, start=None, end=None):
+        """Number of transactions with ``start <= timestamp <= end`` (bounds optional)."""
+        with self._lock:
+            self._flush_spill()
+            lo, hi = self._hot_bounds(start, end)
+            if start is None and end is None:
+                return hi - lo + self._cold_count
+            where, params = self._cold_where(start, end)
+            return hi - lo + self._conn.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()[0]
+
+    def query(self, page=0, page_size=50, start=None, end=None):
+        """Returns one newest-first page of transactions within the optional time range."""
+        offset = page * page_size
+        with self._lock:
+            self._flush_spill()
+            lo, hi = self._hot_bounds(start, end)
+            hot_matches = hi - lo
+            rows = []
+            if offset < hot_matches:
+                first = hi - 1 - offset
+                last = max(lo, first - page_size + 1)
+                rows = [self._hot[i] for i in range(first, last - 1, -1)]
+            remaining = page_size - len(rows)
+            if remaining > 0:
+                where, params = self._cold_where(start, end)
+                cold_offset = max(0, offset - hot_matches)
+                cursor = self._conn.execute(
+                    f"SELECT {', '.join(FIELDS)} FROM transactions{where}"
+                    " ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                    params + [remaining, cold_offset],
+                )
+                rows.extend(dict(zip(FIELDS, row)) for row in cursor)
+            return rows
+
+    def latest(self, n=10):
+        return self.query(page=0, page_size=n)
+
+    def close(self):
+        """Moves the hot tier to disk so nothing is lost across restarts, then closes."""
+        with self._lock:
+            self._spill.extend(self._hot)
+            self._hot.clear()
+            self._hot_ts.clear()
+            self._flush_spill()
+            self._conn.close()
@@ -0,0 +1,157 @@
+# trust_score.py
+"""Deterministic login trust scoring over a sharded, lock-striped per-user state table."""
+import threading
+import time
+from collections import namedtuple
+
+TrustDecision = namedtuple("TrustDecision", "user score mfa_required reasons")
+
+# Point changes are the midpoints of the ranges the login form used to draw at random.
+DEFAULT_RULES = {
+    "base_score": 70,
+    "mfa_threshold": 75,  # scores at or above this skip MFA
+    # Keyed by keystroke_biometrics.TypingMatch status.
+    "typing_match": 15,
+    "typing_uncertain": 0,
+    "typing_mismatch": -25,
+    "typing_enrolling": 10,  # a full sample, but no profile to check it against yet
+    "typing_insufficient": -20,
+    "ip_changed": -25,
+    "ip_consistent": 7,
+    "first_seen_ip": 0,
+    "attempt_window": 60,  # seconds
+    "max_attempts_per_window": 5,
+    "rapid_attempts": -30,
+}
+
+class ShardedTTLTable:
+    """Dict-like table split over ``shards`` independently locked shards.
+
+    Each shard keeps entries in last-write order, so expiring entries older than ``ttl``
+    only ever pops from the front of the shard: eviction is O(1) amortized and runs on
+    the writes themselves, with no sweeper thread.
+    """
+
+    def __init__(self, shards=64, ttl=3600.0, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._count = shards
+
+    def _shard(self, key):
+        return self._shards[hash(key) % self._count]
+
+    def update(self, key, func):
+        """Atomically replaces the value for ``key`` with ``func(old_value_or_None)``; returns it."""
+        data, lock = self._shard(key)
+        now = self._clock()
+        with lock:
+            entry = data.pop(key, None)
+            old = entry[1] if entry is not None and now - entry[0] <= self.ttl else None
+            value = func(old)
+            data[key] = (now, value)
+            self._expire(data, now)
+        return value
+
+    def put(self, key, value):
+        data, lock = self._shard(key)
+        now = self._clock()
+        with lock:
+            data.pop(key, None)
+            data[key] = (now, value)
+            self._expire(data, now)
+
+    def get(self, key):
+        data, lock = self._shard(key)
+        with lock:
+            entry = data.get(key)
+        if entry is None or self._clock() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def discard(self, key):
+        data, lock = self._shard(key)
+        with lock:
+            data.pop(key, None)
+
+    def _expire(self, data, now):
+        cutoff = now - self.ttl
+        while data:
+            key = next(iter(data))
+            if data[key][0] >= cutoff:
+                return
+            del data[key]
+
+    def __len__(self):
+        return sum(len(data) for data, _ in self._shards)
+
+_TYPING_REASONS = {
+    "match": ("info", "✅ Typing rhythm matches your profile - trust score increased!"),
+    "uncertain": ("info", "ℹ️ Typing rhythm is inconclusive - trust score unchanged."),
+    "mismatch": ("warning", "⚠️ Typing rhythm does not match your profile - trust score decreased!"),
+    "enrolling": ("info", "✅ Typing sample recorded - learning your rhythm for future logins."),
+    "insufficient": ("warning", "⚠️ Insufficient typing sample - trust score decreased!"),
+}
+
+_UserState = namedtuple("_UserState", "ip window_start attempts score")
+
+class TrustScoreEngine:
+    """Scores login attempts from the keystroke-biometrics match, IP consistency and attempt rate.
+
+    Rules are plain numbers (see DEFAULT_RULES) so the same inputs always give the same
+    score. Per-user state (last IP, attempt counter, last score) lives in a
+    ShardedTTLTable, so logins for different users score concurrently from many threads.
+    """
+
+    def __init__(self, rules=None, shards=64, ttl=3600.0, clock=time.monotonic):
+        self.rules = dict(DEFAULT_RULES, **(rules or {}))
+        self._clock = clock
+        self.table = ShardedTTLTable(shards=shards, ttl=ttl, clock=clock)
+
+    def score(self, user, typing, ip):
+        """Scores one login attempt and records it; returns a TrustDecision.
+
+        ``typing`` is a keystroke_biometrics.TypingMatch (None when no sample was captured).
+        ``reasons`` is a tuple of ``(level, message)`` pairs, level "info" or "warning".
+        """
+        rules = self.rules
+        now = self._clock()
+        status = "insufficient" if typing is None else typing.status
+        typing_points = rules["typing_" + status]
+        typing_reason = _TYPING_REASONS[status]
+        if typing is not None and typing.score is not None:
+            typing_reason = (typing_reason[0], f"{typing_reason[1]} (similarity {typing.score:.2f})")
+        result = []
+
+        def apply(state):
+            score = rules["base_score"] + typing_points
+            reasons = [typing_reason]
+            if state is None or state.ip is None:
+                score += rules["first_seen_ip"]
+                reasons.append(("info", "ℹ️ First login seen from this IP address."))
+            elif ip != state.ip:
+                score += rules["ip_changed"]
+                reasons.append(("warning", "⚠️ IP address changed - trust score decreased!"))
+            else:
+                score += rules["ip_consistent"]
+                reasons.append(("info", "✅ Consistent IP address - trust score maintained!"))
+            if state is None or now - state.window_start > rules["attempt_window"]:
+                window_start, attempts = now, 1
+            else:
+                window_start, attempts = state.window_start, state.attempts + 1
+            if attempts > rules["max_attempts_per_window"]:
+                score += rules["rapid_attempts"]
+                reasons.append(("warning", f"⚠️ {attempts} login attempts within {rules['attempt_window']}s - trust score decreased!"))
+            score = max(0, min(100, score))
+            result.append(TrustDecision(user, score, score < rules["mfa_threshold"], tuple(reasons)))
+            return _UserState(ip, window_start, attempts, score)
+
+        self.table.update(user, apply)
+        return result[0]
+
+    def last_score(self, user):
+        state = self.table.get(user)
+        return None if state is None else state.score
+
+    def forget(self, user):
+        self.table.discard(user)
@@ -0,0 +1,319 @@
+# uefi_parser.py
+"""Zero-copy parser for UEFI firmware volumes (PI spec FV / FFS / section layout).
+
+The image is mapped with ``mmap`` and every header is decoded from a ``memoryview``
+slice, so file bodies are never copied while an image is being walked.
+"""
+import lzma
+import mmap
+import struct
+import uuid
+from collections import namedtuple
+
+FVH_SIGNATURE = b"_FVH"
+_FVH_SIGNATURE_OFFSET = 40
+_FV_HEADER = struct.Struct("<16s16sQ4sIHHHBB")  # up to and including Revision
+_FV_EXT_HEADER = struct.Struct("<16sI")
+_FFS_HEADER = struct.Struct("<16sHBB3sB")
+_FFS_HEADER2_EXTRA = struct.Struct("<Q")
+_SECTION_HEADER = struct.Struct("<3sB")
+_GUID_SECTION_HEADER = struct.Struct("<16sHH")
+_COMPRESSION_SECTION_HEADER = struct.Struct("<IB")  # UncompressedLength, CompressionType
+_NOT_COMPRESSED = 0x00
+
+EFI_FIRMWARE_FILE_SYSTEM2_GUID = uuid.UUID("8C8CE578-8A3D-4F1C-9935-896185C32DD3")
+EFI_FIRMWARE_FILE_SYSTEM3_GUID = uuid.UUID("5473C07A-3DCB-4DCA-BD6F-1E9689E7349A")
+LZMA_CUSTOM_DECOMPRESS_GUID = uuid.UUID("EE4E5898-3914-4259-9D6E-DC7BD79403CF")
+_ERASE_POLARITY = 0x00000800
+MAX_DECOMPRESSED_SECTION = 64 * 1024 * 1024  # larger LZMA sections are skipped, not inflated
+_FFS_ATTRIB_LARGE_FILE = 0x01
+
+# FFS file types (PI spec vol. 3, EFI_FV_FILETYPE_*).
+FV_FILETYPE_RAW = 0x01
+FV_FILETYPE_FREEFORM = 0x02
+FV_FILETYPE_DXE_CORE = 0x05
+FV_FILETYPE_PEIM = 0x06
+FV_FILETYPE_DRIVER = 0x07
+FV_FILETYPE_COMBINED_PEIM_DRIVER = 0x08
+FV_FILETYPE_APPLICATION = 0x09
+FV_FILETYPE_FIRMWARE_VOLUME_IMAGE = 0x0B
+FV_FILETYPE_FFS_PAD = 0xF0
+DXE_FILE_TYPES = frozenset({FV_FILETYPE_DXE_CORE, FV_FILETYPE_DRIVER, FV_FILETYPE_COMBINED_PEIM_DRIVER})
+
+# Section types (EFI_SECTION_*).
+SECTION_COMPRESSION = 0x01
+SECTION_GUID_DEFINED = 0x02
+SECTION_PE32 = 0x10
+SECTION_TE = 0x12
+SECTION_USER_INTERFACE = 0x15
+SECTION_FIRMWARE_VOLUME_IMAGE = 0x17
+
+FirmwareVolume = namedtuple("FirmwareVolume", "offset fs_guid length files")
+FfsFile = namedtuple("FfsFile", "guid type offset data name body")
+
+def format_guid(raw):
+    """Formats a 16-byte little-endian EFI_GUID the way KNOWN_GOOD_GUIDS spells it."""
+    return str(uuid.UUID(bytes_le=bytes(raw))).upper()
+
+def _align(value, alignment):
+    return (value + alignment - 1) & ~(alignment - 1)
+
+def _u24(raw):
+    return raw[0] | (raw[1] << 8) | (raw[2] << 16)
+
+def _header_checksum_ok(view, length):
+    if length % 2 or length > len(view):
+        return False
+    return sum(memoryview(view[:length]).cast("H")) & 0xFFFF == 0
+
+def _ffs_header_checksum_ok(header):
+    # State (byte 23) and the file checksum (byte 17) are excluded, i.e. counted as zero.
+    return (sum(header) - header[17] - header[23]) & 0xFF == 0
+
+def iter_volumes(buf, start=0):
+    """Yields every firmware volume found in ``buf`` (any buffer-protocol object)."""
+    view = memoryview(buf)
+    size = len(view)
+    find = getattr(buf, "find", None) or bytes(view).find
+    pos = start + _FVH_SIGNATURE_OFFSET
+    while True:
+        pos = find(FVH_SIGNATURE, pos)
+        if pos < 0:
+            return
+        base = pos - _FVH_SIGNATURE_OFFSET
+        volume = _parse_volume(view, base, size) if base >= start else None
+        if volume is None:
+            pos += 1
+            continue
+        yield volume
+        pos = base + volume.length + _FVH_SIGNATURE_OFFSET
+
+def _parse_volume(view, base, size):
+    if base + _FV_HEADER.size > size:
+        return None
+    (_, fs_guid, fv_length, _, attributes, header_length, _, ext_offset, _, _) = \
+        _FV_HEADER.unpack_from(view, base)
+    if header_length < _FV_HEADER.size or fv_length < header_length or base + fv_length > size:
+        return None
+    if not _header_checksum_ok(view[base:], header_length):
+        return None
+    fs_guid = uuid.UUID(bytes_le=bytes(fs_guid))
+    volume_view = view[base:base + fv_length]
+    files = []
+    if fs_guid in (EFI_FIRMWARE_FILE_SYSTEM2_GUID, EFI_FIRMWARE_FILE_SYSTEM3_GUID):
+        first = header_length
+        if ext_offset:
+            if ext_offset + _FV_EXT_HEADER.size > fv_length:
+                return None
+            _, ext_size = _FV_EXT_HEADER.unpack_from(volume_view, ext_offset)
+            first = ext_offset + ext_size
+        erased = 0xFF if attributes & _ERASE_POLARITY else 0x00
+        files = list(_iter_files(volume_view, _align(first, 8), base, erased))
+    return FirmwareVolume(base, format_guid(view[base + 16:base + 32]), fv_length, files)
+
+def _iter_files(volume, pos, base, erased):
+    end = len(volume)
+    while pos + _FFS_HEADER.size <= end:
+        header = volume[pos:pos + _FFS_HEADER.size]
+        if all(b == erased for b in header):
+            return
+        name, _, ftype, attributes, raw_size, _ = _FFS_HEADER.unpack_from(volume, pos)
+        header_size = _FFS_HEADER.size
+        file_size = _u24(raw_size)
+        if attributes & _FFS_ATTRIB_LARGE_FILE:
+            if pos + header_size + _FFS_HEADER2_EXTRA.size > end:
+                return
+            (file_size,) = _FFS_HEADER2_EXTRA.unpack_from(volume, pos + header_size)
+            header_size += _FFS_HEADER2_EXTRA.size
+        if file_size < header_size or pos + file_size > end:
+            return
+        data = volume[pos + header_size:pos + file_size]
+        if not _ffs_header_checksum_ok(volume[pos:pos + header_size]):
+            pass  # corrupt header: skipped, as the DXE dispatcher would not load it either
+        elif ftype != FV_FILETYPE_FFS_PAD:
+            ui_name, body = _describe_sections(data, ftype)
+            yield FfsFile(format_guid(name), ftype, base + pos, data, ui_name, body)
+            if ftype == FV_FILETYPE_FIRMWARE_VOLUME_IMAGE:
+                yield from _nested_volume_files(data, base + pos + header_size)
+        pos = _align(pos + file_size, 8)
+
+def iter_sections(data):
+    """Yields ``(type, body)`` for each section of an FFS file, following GUID-defined (LZMA)
+    and uncompressed compression wrappers. EFI/Tiano-compressed sections are yielded as-is."""
+    pos = 0
+    end = len(data)
+    while pos + _SECTION_HEADER.size <= end:
+        raw_size, stype = _SECTION_HEADER.unpack_from(data, pos)
+        size = _u24(raw_size)
+        header_size = _SECTION_HEADER.size
+        if size == 0xFFFFFF:
+            if pos + header_size + 4 > end:
+                return
+            (size,) = struct.unpack_from("<I", data, pos + header_size)
+            header_size += 4
+        if size < header_size or pos + size > end:
+            return
+        body = data[pos + header_size:pos + size]
+        if stype == SECTION_GUID_DEFINED and len(body) >= _GUID_SECTION_HEADER.size:
+            guid, data_offset, _ = _GUID_SECTION_HEADER.unpack_from(body)
+            inner = data[pos + data_offset:pos + size]
+            if uuid.UUID(bytes_le=guid) == LZMA_CUSTOM_DECOMPRESS_GUID:
+                inner = _lzma_decompress(inner)
+            if inner is not None:
+                yield from iter_sections(inner)
+        elif (stype == SECTION_COMPRESSION and len(body) >= _COMPRESSION_SECTION_HEADER.size
+              and body[4] == _NOT_COMPRESSED):
+            yield from iter_sections(body[_COMPRESSION_SECTION_HEADER.size:])
+        else:
+            yield stype, body
+        pos = _align(pos + size, 4)
+
+def _lzma_decompress(data):
+    # Bounded, so a few bytes of hostile input cannot inflate into gigabytes; corrupt,
+    # truncated and oversized streams all come back as None.
+    decompressor = lzma.LZMADecompressor(format=lzma.FORMAT_ALONE)
+    try:
+        out = decompressor.decompress(bytes(data), max_length=MAX_DECOMPRESSED_SECTION)
+    except lzma.LZMAError:
+        return None
+    return memoryview(out) if decompressor.eof else None
+
+def _describe_sections(data, ftype):
+    if ftype in (FV_FILETYPE_RAW, FV_FILETYPE_FFS_PAD):
+        return None, data
+    name = None
+    body = None
+    for stype, section in iter_sections(data):
+        if stype == SECTION_USER_INTERFACE and name is None:
+            name = bytes(section).decode("utf-16-le", errors="replace").rstrip("\x00")
+        elif stype in (SECTION_PE32, SECTION_TE) and body is None:
+            body = section
+    return name, data if body is None else body
+
+def _nested_volume_files(data, offset):
+    for stype, section in iter_sections(data):
+        if stype == SECTION_FIRMWARE_VOLUME_IMAGE:
+            for volume in iter_volumes(section):
+                for ffs in volume.files:
+                    # Nested offsets are approximate: relative to the enclosing file's data.
+                    yield ffs._replace(offset=offset + ffs.offset)
+
+class FirmwareImage:
+    """A memory-mapped firmware image; use as a context manager.
+
+    Views handed out by ``volumes``/``files`` are only valid until the image is closed.
+    """
+
+    def __init__(self, buf, mm=None):
+        self._mm = mm
+        self._view = memoryview(buf)
+        self._volumes = None
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                return cls(b"")
+        return cls(mm, mm)
+
+    @property
+    def volumes(self):
+        if self._volumes is None:
+            self._volumes = list(iter_volumes(self._mm if self._mm is not None else self._view))
+        return self._volumes
+
+    def files(self):
+        for volume in self.volumes:
+            yield from volume.files
+
+    def module_guids(self):
+        """Returns the GUIDs of every module in the image, in image order."""
+        return [ffs.guid for ffs in self.files()]
+
+    def dxe_drivers(self):
+        """Returns the FfsFile of every DXE-phase driver in image order.
+
+        UI names are not unique (nor is a GUID across nested volumes), so drivers are
+        identified by ``(guid, offset)``, never by name.
+        """
+        return [ffs for ffs in self.files() if ffs.type in DXE_FILE_TYPES]
+
+    def close(self):
+        self._volumes = None
+        self._view.release()
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # a caller still holds a view; the mapping is freed with it
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# --------------------------- Synthetic image builders ---------------------------
+
+def _guid_bytes(guid):
+    return uuid.UUID(str(guid)).bytes_le
+
+def build_section(stype, body):
+    size = _SECTION_HEADER.size + len(body)
+    return struct.pack("<I", size)[:3] + bytes([stype]) + bytes(body)
+
+def build_lzma_section(sections):
+    """Wraps already-built sections in an LZMA-compressed GUID-defined section."""
+    header_size = _SECTION_HEADER.size + _GUID_SECTION_HEADER.size
+    body = _GUID_SECTION_HEADER.pack(LZMA_CUSTOM_DECOMPRESS_GUID.bytes_le, header_size, 0x01)  # PROCESSING_REQUIRED
+    return build_section(SECTION_GUID_DEFINED, body + lzma.compress(bytes(sections), format=lzma.FORMAT_ALONE))
+
+def build_compression_section(sections):
+    """Wraps already-built sections in an EFI_SECTION_COMPRESSION of type EFI_NOT_COMPRESSED."""
+    return build_section(SECTION_COMPRESSION,
+                         _COMPRESSION_SECTION_HEADER.pack(len(sections), _NOT_COMPRESSED) + bytes(sections))
+
+def build_ffs_file(guid, ftype, body=b"", name=None, raw=False, large=False):
+    """Builds one FFS file; unless ``raw``, ``body`` is wrapped in PE32 (+ UI) sections.
+
+    ``large`` writes an FFS2 header (FFS_ATTRIB_LARGE_FILE with a 64-bit size).
+    """
+    if raw:
+        payload = bytes(body)
+    else:
+        payload = build_section(SECTION_PE32, body)
+        if name:
+            payload += b"\x00" * (_align(len(payload), 4) - len(payload))
+            payload += build_section(SECTION_USER_INTERFACE, (name + "\x00").encode("utf-16-le"))
+    if large:
+        size = _FFS_HEADER.size + _FFS_HEADER2_EXTRA.size + len(payload)
+        header = bytearray(_FFS_HEADER.pack(_guid_bytes(guid), 0, ftype, _FFS_ATTRIB_LARGE_FILE, b"\x00" * 3, 0))
+        header += _FFS_HEADER2_EXTRA.pack(size)
+    else:
+        size = _FFS_HEADER.size + len(payload)
+        header = bytearray(_FFS_HEADER.pack(_guid_bytes(guid), 0, ftype, 0, struct.pack("<I", size)[:3], 0))
+    header_sum = (sum(header) - header[16] - header[17] - header[23]) & 0xFF
+    header[16] = (-header_sum) & 0xFF
+    header[17] = 0xAA
+    header[23] = 0xF8  # EFI_FILE_HEADER_CONSTRUCTION | VALID | DATA_VALID, inverted for erase polarity 1
+    return bytes(header) + payload
+
+def build_firmware_volume(ffs_files, block_size=0x1000):
+    """Builds an FFSv2 firmware volume (erase polarity 1) containing the given FFS files."""
+    header_length = _FV_HEADER.size + 16  # one block-map entry plus terminator
+    body = bytearray()
+    for ffs in ffs_files:
+        body += b"\xFF" * (_align(header_length + len(body), 8) - header_length - len(body))
+        body += ffs
+    length = _align(header_length + len(body), block_size)
+    header = bytearray(_FV_HEADER.pack(
+        b"\x00" * 16, EFI_FIRMWARE_FILE_SYSTEM2_GUID.bytes_le, length, FVH_SIGNATURE,
+        0x0004FEFF, header_length, 0, 0, 0, 2,
+    ))
+    header += struct.pack("<IIII", length // block_size, block_size, 0, 0)
+    checksum = (-sum(memoryview(bytes(header)).cast("H"))) & 0xFFFF
+    struct.pack_into("<H", header, 50, checksum)
+    volume = bytes(header) + bytes(body)
+    return volume + b"\xFF" * (length - len(volume))
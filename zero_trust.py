@@ -0,0 +1,211 @@
+# zero_trust.py
+"""Zero-trust access policy: geo allowlist, trusted-device registry and access-hour windows,
+compiled into set, dict and per-minute lookups, with a TTL cache of decisions."""
+import functools
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+
+from trust_score import ShardedTTLTable
+
+DEFAULT_ALLOWED_LOCATIONS = tuple(os.environ.get("SECURE_RETAIL_ZT_LOCATIONS", "Bengaluru").split(";"))
+DEFAULT_ACCESS_HOURS = os.environ.get("SECURE_RETAIL_ZT_HOURS", "00:00-24:00")  # local time, e.g. "08:00-20:00"
+DEFAULT_TRUSTED_DEVICES = ("device_123",)  # the dashboard's demo device
+DEFAULT_TTL = 60.0
+MINUTES_PER_DAY = 24 * 60
+MAX_SHARED_CHECKS = 16384
+
+PolicyCheck = namedtuple("PolicyCheck", "check passed detail")
+ZeroTrustDecision = namedtuple("ZeroTrustDecision", "user_id granted checks")
+
+_TPM_PASSED = PolicyCheck("tpm", True, "Simulated TPM Check")
+_DEVICE_TRUSTED = PolicyCheck("device", True, "Device ID: Trusted")
+_DEVICE_UNKNOWN = PolicyCheck("device", False, "Device ID: Untrusted (not in the trusted-device registry)")
+_DEVICE_OTHER_USER = PolicyCheck("device", False, "Device ID: Untrusted (registered to another user)")
+
+def hash_device_id(device_id):
+    """Registry key for a device; raw device IDs are never stored."""
+    return hashlib.sha256(str(device_id).encode()).hexdigest()
+
+_device_hash = functools.lru_cache(maxsize=65536)(hash_device_id)  # the same devices check in all day
+
+def _location_parts(location):
+    # "Bengaluru, Karnataka, India" matches an allowlist entry for the city, state or country.
+    return [part.strip().lower() for part in str(location).split(",")]
+
+def _minute(text):
+    hours, _, minutes = text.strip().partition(":")
+    try:
+        value = int(hours) * 60 + int(minutes or 0)
+    except ValueError:
+        value = -1
+    if not 0 <= value <= MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time of day {text!r}")
+    return value
+
+class AccessHours:
+    """Allowed times of day from a spec like ``"08:00-12:00,13:00-18:00"`` (``"22:00-06:00"`` wraps).
+
+    Compiled into one flag per minute of the day, plus, per minute, how many minutes
+    remain until the flag changes, so cached decisions can expire exactly at a boundary.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        allowed = bytearray(MINUTES_PER_DAY)
+        for window in filter(None, (part.strip() for part in spec.split(","))):
+            start, sep, end = window.partition("-")
+            if not sep:
+                raise ValueError(f"Invalid access window {window!r}; expected HH:MM-HH:MM")
+            start, end = _minute(start) % MINUTES_PER_DAY, _minute(end)
+            if end > start:
+                allowed[start:end] = b"\x01" * (end - start)
+            else:
+                allowed[start:] = b"\x01" * (MINUTES_PER_DAY - start)
+                allowed[:end] = b"\x01" * end
+        self.allowed = bytes(allowed)
+        self.until_change = self._until_change(self.allowed)
+        self.checks = (PolicyCheck("hours", False, f"Access hours: outside {spec}"),
+                       PolicyCheck("hours", True, f"Access hours: inside {spec}"))
+
+    @staticmethod
+    def _until_change(allowed):
+        if len(set(allowed)) == 1:
+            return None  # open (or closed) all day
+        until = [0] * MINUTES_PER_DAY
+        steps = 1
+        for minute in range(2 * MINUTES_PER_DAY - 1, -1, -1):  # two laps so windows can wrap midnight
+            here, following = minute % MINUTES_PER_DAY, (minute + 1) % MINUTES_PER_DAY
+            steps = 1 if allowed[here] != allowed[following] else steps + 1
+            until[here] = steps
+        return until
+
+class ZeroTrustPolicy:
+    """Allow rules for admin access, each compiled into an indexed lookup.
+
+    Locations match if any comma-separated part is in the allowlist (a set of lower-cased
+    names). The device registry maps SHA-256 device hashes to the users allowed on that
+    device (None for any user). Access hours apply to everyone unless ``user_hours``
+    gives a user their own windows. Changing the registry bumps ``version``, which
+    invalidates decisions cached by a ZeroTrustEngine.
+    """
+
+    def __init__(self, allowed_locations=DEFAULT_ALLOWED_LOCATIONS, trusted_devices=DEFAULT_TRUSTED_DEVICES,
+                 access_hours=DEFAULT_ACCESS_HOURS, user_hours=None):
+        self.locations = frozenset(location.strip().lower() for location in allowed_locations if location.strip())
+        self.hours = AccessHours(access_hours)
+        self.user_hours = {user: AccessHours(spec) for user, spec in (user_hours or {}).items()}
+        self.version = 0
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._geo = functools.lru_cache(maxsize=4096)(self._geo_check)  # few distinct locations recur
+        self._clock_minute = (None, 0, 0.0)  # (epoch minute, minute of day, start of minute)
+        self._checks = {}
+        for device_id in trusted_devices:
+            self.register_device(hash_device_id(device_id))
+
+    def register_device(self, device_hash, users=None):
+        """Trusts a device (by ``hash_device_id``) for ``users``, or for anyone if None."""
+        with self._lock:
+            self._devices[device_hash] = None if users is None else frozenset(users)
+            self.version += 1
+
+    def revoke_device(self, device_hash):
+        with self._lock:
+            self._devices.pop(device_hash, None)
+            self.version += 1
+
+    def trusted_devices(self):
+        with self._lock:
+            return dict(self._devices)
+
+    def _geo_check(self, location):
+        if any(part in self.locations for part in _location_parts(location)):
+            return PolicyCheck("geo", True, f"Geo-location: Access from {location} is in the allowlist")
+        return PolicyCheck("geo", False, f"Geo-location: Access from {location} - Outside Allowed Area")
+
+    def _minute_of_day(self, now):
+        # UTC offsets are whole minutes, so local minutes start on epoch-minute boundaries.
+        epoch_minute = now // 60
+        memo = self._clock_minute
+        if memo[0] != epoch_minute:
+            local = time.localtime(now)
+            memo = self._clock_minute = (epoch_minute, local.tm_hour * 60 + local.tm_min, epoch_minute * 60)
+        return memo[1], memo[2]
+
+    def decide(self, user_id, device_id, location, now):
+        """Evaluates every rule; returns the decision and the time it stays valid until."""
+        geo = self._geo(location)
+
+        users = self._devices.get(_device_hash(device_id), False)
+        if users is False:
+            device = _DEVICE_UNKNOWN
+        elif users is None or user_id in users:
+            device = _DEVICE_TRUSTED
+        else:
+            device = _DEVICE_OTHER_USER
+
+        hours = self.user_hours.get(user_id, self.hours)
+        minute, minute_start = self._minute_of_day(now)
+        allowed = hours.allowed[minute]
+        if hours.until_change is None:
+            valid_until = math.inf
+        else:
+            valid_until = minute_start + hours.until_change[minute] * 60
+
+        hours_check = hours.checks[allowed]
+        checks = self._checks.get((geo, device, hours_check))
+        if checks is None:  # few distinct outcomes, so decisions share their checks tuples
+            if len(self._checks) >= MAX_SHARED_CHECKS:  # locations come from callers; stay bounded
+                self._checks.clear()
+            checks = self._checks[geo, device, hours_check] = (_TPM_PASSED, geo, device, hours_check)
+        return ZeroTrustDecision(user_id, geo.passed and device.passed and bool(allowed), checks), valid_until
+
+class ZeroTrustEngine:
+    """Evaluates access requests against a ZeroTrustPolicy, caching decisions for ``ttl`` seconds.
+
+    The cache is keyed by ``(user, device, location)`` and held in a ShardedTTLTable whose
+    TTL runs on ``monotonic``, so wall-clock steps neither extend nor cut it short. Access
+    windows are judged on the wall ``clock``: an entry is only reused between the instant
+    it was decided and its window's next opening or closing, which also catches the clock
+    being set back. Registry changes to the policy invalidate every entry. Nothing here renders
+    anything.
+    """
+
+    def __init__(self, policy=None, ttl=DEFAULT_TTL, shards=16, clock=time.time, monotonic=time.monotonic):
+        self.policy = policy or ZeroTrustPolicy()
+        self.ttl = ttl
+        self._clock = clock
+        self.cache = ShardedTTLTable(shards=shards, ttl=ttl, clock=monotonic)
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, user_id, device_id, location, now=None):
+        """Returns a ZeroTrustDecision for one request."""
+        return self._evaluate(user_id, device_id, location, self._clock() if now is None else now)
+
+    def evaluate_batch(self, requests, now=None):
+        """Returns a ZeroTrustDecision per ``(user_id, device_id, location)``, all judged at one instant."""
+        now = self._clock() if now is None else now
+        evaluate = self._evaluate
+        return [evaluate(user_id, device_id, location, now) for user_id, device_id, location in requests]
+
+    def _evaluate(self, user_id, device_id, location, now):
+        key = (user_id, device_id, location)
+        policy = self.policy
+        entry = self.cache.get(key)  # (policy version, decided at, valid until, decision), wall-clock times
+        if entry is not None and entry[0] == policy.version and entry[1] <= now < entry[2]:
+            self.hits += 1
+            return entry[3]
+        self.misses += 1
+        version = policy.version
+        decision, valid_until = policy.decide(user_id, device_id, location, now)
+        if self.ttl > 0:
+            self.cache.put(key, (version, now, valid_until, decision))
+        return decision
+
+    def stats(self):
+        return {"cached": len(self.cache), "hits": self.hits, "misses": self.misses}